@@ -8,6 +8,14 @@ import io
 
 # Prüfe --debug Argument GANZ am Anfang (vor allen Imports)
 DEBUG_MODE = '--debug' in sys.argv
+TRACE_MODE = '--trace' in sys.argv
+PROFILE_MODE = '--profile' in sys.argv
+TRACEMALLOC_MODE = '--tracemalloc' in sys.argv
+
+# tracemalloc so früh wie möglich starten, damit auch Start-Allokationen erfasst werden
+if TRACEMALLOC_MODE:
+    import tracemalloc
+    tracemalloc.start(5)
 
 # Bei Debug in EXE: Konsole sofort allozieren
 if DEBUG_MODE and getattr(sys, 'frozen', False) and sys.stdout is None:
@@ -47,7 +55,7 @@ if sys.platform == 'win32' and sys.stdout is not None and not DEBUG_MODE:
 from gevent import monkey
 monkey.patch_all(thread=False, select=False)
 
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, Response
 from flask_socketio import SocketIO, emit
 import json
 import os
@@ -60,13 +68,24 @@ from datetime import datetime
 from log_parser import LogParser
 from stats_manager import StatsManager
 from config_manager import ConfigManager
+from tracing import tracer, span
+from profiler import profiler
+from memory_monitor import memory_monitor
+from metrics import registry, SocketIOJSON, RSI_FETCHES, RSI_FETCH_SECONDS
+from persistence import persistence
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'verse-combat-log-secret'
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='gevent')
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode='gevent', json=SocketIOJSON)
 
 # Globale Instanzen
 config_manager = ConfigManager()
+
+# Optionales SQLite-Backend - muss vor dem Erzeugen der Datenspeicher aktiv sein
+if config_manager.get_storage_backend() == 'sqlite':
+    from sqlite_store import enable_sqlite
+    enable_sqlite(config_manager.get_versions())
+
 stats_managers = {}
 log_parsers = {}
 monitoring_threads = {}
@@ -85,6 +104,14 @@ for version in config_manager.get_versions():
 
 current_version = config_manager.get_current_version()
 
+# Pipeline-Tracing per Startparameter aktivieren
+if TRACE_MODE:
+    tracer.start()
+
+# CPU-Profiling per Startparameter aktivieren
+if PROFILE_MODE:
+    profiler.start()
+
 
 @app.route('/')
 def index():
@@ -201,65 +228,139 @@ def update_language():
     return jsonify({'success': False, 'error': 'Invalid language'}), 400
 
 
+def rename_counts(counts: dict, names: dict) -> dict:
+    """Ersetzt interne Namen durch Display-Namen (names aus resolve_many)"""
+    return {names[internal]: count for internal, count in counts.items()}
+
+
+def merge_counts(counts: dict, names: dict) -> dict:
+    """Wie rename_counts, fasst aber Zähler mit gleichem Display-Namen zusammen"""
+    merged = {}
+    for internal, count in counts.items():
+        display = names[internal]
+        merged[display] = merged.get(display, 0) + count
+    return merged
+
+
 @app.route('/api/stats/<version>')
+@profiler.profiled('route.get_stats')
 def get_stats(version):
     """Gibt Statistiken zurück"""
     if version not in stats_managers:
         return jsonify({'error': 'Invalid version'}), 400
 
-    from weapon_database import WeaponDatabase
-    from vehicle_database import VehicleDatabase
-
-    weapon_db = WeaponDatabase()
-    vehicle_db = VehicleDatabase()
+    from catalogs import get_weapon_db, get_vehicle_db
 
     # Stats enthalten INTERNE Namen
     stats = stats_managers[version].get_all_stats()
+    sections = [stats[stats_type] for stats_type in ('session', 'total') if stats_type in stats]
+
+    # Alle vorkommenden Namen sammeln - jeder wird nur einmal aufgelöst
+    weapons = set()
+    vehicles = set()
+    for section in sections:
+        weapons.update(section.get('weapon_kills', ()), section.get('death_weapons', ()))
+        for victim_weapons in section.get('pvp_victims', {}).values():
+            weapons.update(victim_weapons)
+        vehicles.update(section.get('vehicle_kills', ()))
+        for player_vehicles in section.get('vehicle_losses_by_player', {}).values():
+            vehicles.update(player_vehicles)
+    weapon_names = get_weapon_db().resolve_many(weapons)
+    vehicle_names = get_vehicle_db().resolve_many(vehicles)
 
     # Konvertiere interne Namen zu Display-Namen
-    for stats_type in ['session', 'total']:
-        if stats_type in stats:
-            # Waffen-Kills
-            if 'weapon_kills' in stats[stats_type]:
-                stats[stats_type]['weapon_kills'] = {
-                    weapon_db.get_display_name(internal): count
-                    for internal, count in stats[stats_type]['weapon_kills'].items()
-                }
-
-            # Death-Waffen
-            if 'death_weapons' in stats[stats_type]:
-                stats[stats_type]['death_weapons'] = {
-                    weapon_db.get_display_name(internal): count
-                    for internal, count in stats[stats_type]['death_weapons'].items()
-                }
-
-            # Fahrzeug-Kills
-            if 'vehicle_kills' in stats[stats_type]:
-                stats[stats_type]['vehicle_kills'] = {
-                    vehicle_db.get_display_name(internal): count
-                    for internal, count in stats[stats_type]['vehicle_kills'].items()
-                }
-
-            # PvP Victims Waffen
-            if 'pvp_victims' in stats[stats_type]:
-                stats[stats_type]['pvp_victims'] = {
-                    victim: [weapon_db.get_display_name(w) for w in weapons]
-                    for victim, weapons in stats[stats_type]['pvp_victims'].items()
-                }
-
-            # Fahrzeugverluste durch Spieler
-            if 'vehicle_losses_by_player' in stats[stats_type]:
-                stats[stats_type]['vehicle_losses_by_player'] = {
-                    player: {
-                        vehicle_db.get_display_name(vehicle_internal): count
-                        for vehicle_internal, count in vehicles.items()
-                    }
-                    for player, vehicles in stats[stats_type]['vehicle_losses_by_player'].items()
-                }
+    for section in sections:
+        # Waffen-Kills
+        if 'weapon_kills' in section:
+            section['weapon_kills'] = rename_counts(section['weapon_kills'], weapon_names)
+
+        # Death-Waffen
+        if 'death_weapons' in section:
+            section['death_weapons'] = rename_counts(section['death_weapons'], weapon_names)
+
+        # Fahrzeug-Kills
+        if 'vehicle_kills' in section:
+            section['vehicle_kills'] = rename_counts(section['vehicle_kills'], vehicle_names)
+
+        # PvP Victims Waffen (Zähler pro Anzeigename zusammenfassen)
+        if 'pvp_victims' in section:
+            section['pvp_victims'] = {
+                victim: merge_counts(victim_weapons, weapon_names)
+                for victim, victim_weapons in section['pvp_victims'].items()
+            }
+
+        # Fahrzeugverluste durch Spieler
+        if 'vehicle_losses_by_player' in section:
+            section['vehicle_losses_by_player'] = {
+                player: rename_counts(player_vehicles, vehicle_names)
+                for player, player_vehicles in section['vehicle_losses_by_player'].items()
+            }
 
     return jsonify(stats)
 
 
+@app.route('/api/stats/<version>/trends')
+@profiler.profiled('route.get_trends')
+def get_trends(version):
+    """
+    Gibt Stunden- oder Tages-Buckets eines Zeitraums zurück
+
+    Query-Parameter: resolution (hour/day), from und to (ISO-Zeitpunkte, UTC, inklusive)
+    """
+    if version not in stats_managers:
+        return jsonify({'error': 'Invalid version'}), 400
+
+    from stats_rollups import RESOLUTIONS
+    from catalogs import get_weapon_db, get_vehicle_db
+
+    resolution = request.args.get('resolution', 'day')
+    if resolution not in RESOLUTIONS:
+        return jsonify({'error': 'Invalid resolution'}), 400
+
+    try:
+        start, end = [
+            datetime.fromisoformat(value.replace('Z', '+00:00')) if value else None
+            for value in (request.args.get('from'), request.args.get('to'))
+        ]
+    except ValueError:
+        return jsonify({'error': 'Invalid time range'}), 400
+
+    buckets = stats_managers[version].rollups.query(resolution, start, end)
+
+    # Konvertiere interne Namen zu Display-Namen (Zähler pro Anzeigename zusammenfassen)
+    for key, db in (('weapon_kills', get_weapon_db()), ('vehicle_kills', get_vehicle_db())):
+        names = db.resolve_many(internal for bucket in buckets for internal in bucket[key])
+        for bucket in buckets:
+            bucket[key] = merge_counts(bucket[key], names)
+
+    return jsonify({'version': version, 'resolution': resolution, 'buckets': buckets})
+
+
+@app.route('/api/stats/<version>/sessions')
+def get_session_history(version):
+    """Gibt eine Seite archivierter Sessions zurück (neueste zuerst)"""
+    if version not in stats_managers:
+        return jsonify({'error': 'Invalid version'}), 400
+
+    from catalogs import get_weapon_db
+
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = min(100, max(1, request.args.get('per_page', 20, type=int)))
+
+    history = stats_managers[version].history.get_page(page, per_page)
+
+    # Konvertiere interne Waffennamen zu Display-Namen
+    weapon_names = get_weapon_db().resolve_many(
+        internal for session in history['sessions'] for internal, _ in session.get('top_weapons', []))
+    for session in history['sessions']:
+        session['top_weapons'] = [
+            [weapon_names[internal], count]
+            for internal, count in session.get('top_weapons', [])
+        ]
+
+    return jsonify(history)
+
+
 @app.route('/api/stats/<version>/reset_session', methods=['POST'])
 def reset_session(version):
     """Setzt Session zurück"""
@@ -271,10 +372,7 @@ def reset_session(version):
     
     stats_managers[version].reset_session(remove_from_total)
     
-    socketio.emit('stats_updated', {
-        'version': version,
-        'stats': stats_managers[version].get_all_stats()
-    })
+    emit_stats_updates(stats_managers[version])
     
     return jsonify({'success': True})
 
@@ -290,35 +388,83 @@ def get_events(version):
     })
 
 
+def is_catalog_search() -> bool:
+    """Seitenweise Suche angefragt (sonst alle Namen, z.B. für loadNameMappings)"""
+    return 'q' in request.args or 'limit' in request.args
+
+
+def search_catalog(kind: str, key, build_entries, usage: dict) -> dict:
+    """
+    Seitenweise Suche für die Verwaltung (Query-Parameter: q, sort, limit, offset)
+
+    Der Katalog wird nur zusammengestellt, wenn sich key geändert hat (siehe catalog_search.get_index)
+
+    Returns:
+        {'total': Anzahl Treffer, 'items': [(internal_name, display_name, usage), ...], 'limit', 'offset'}
+    """
+    from catalog_search import get_index, MAX_LIMIT
+
+    limit = min(MAX_LIMIT, max(1, request.args.get('limit', 100, type=int)))
+    offset = max(0, request.args.get('offset', 0, type=int))
+    sort = request.args.get('sort', 'usage')
+
+    result = get_index(kind, key, build_entries).search(request.args.get('q', ''), usage, sort, limit, offset)
+    result.update({'limit': limit, 'offset': offset})
+    return result
+
+
 @app.route('/api/weapons')
+@profiler.profiled('route.get_weapons')
 def get_weapons():
-    """Gibt Waffen-Datenbank zurück"""
+    """
+    Gibt Waffen-Datenbank zurück
+
+    Mit q oder limit (plus offset/sort): nur eine Seite der Suchtreffer (Verwaltung), sonst alle Namen
+    """
+    from catalogs import get_weapon_db
+    from catalog_search import count_usage
+    from names_parser import NamesParser
     from weapon_database import WeaponDatabase
-    weapon_db = WeaponDatabase()
+    weapon_db = get_weapon_db()
 
-    # Sammle alle verwendeten Waffen aus allen Stats
+    # Sammle alle verwendeten Waffen aus allen Stats (Nutzung = Kills + Tode, Gesamt enthält Session)
     used_weapons = set()
+    usage_counters = []
     for stats_mgr in stats_managers.values():
         all_stats = stats_mgr.get_all_stats()
-        # Aus weapon_kills
-        used_weapons.update(all_stats['session']['weapon_kills'].keys())
-        used_weapons.update(all_stats['total']['weapon_kills'].keys())
-        # Aus death_weapons
-        used_weapons.update(all_stats['session']['death_weapons'].keys())
-        used_weapons.update(all_stats['total']['death_weapons'].keys())
+        for section in ('session', 'total'):
+            used_weapons.update(all_stats[section]['weapon_kills'].keys())
+            used_weapons.update(all_stats[section]['death_weapons'].keys())
+        usage_counters += [all_stats['total']['weapon_kills'], all_stats['total']['death_weapons']]
 
-    return jsonify({
-        'weapons': weapon_db.get_all_weapons(list(used_weapons)),
-        'blacklist': weapon_db.get_blacklist(),
-        'custom_names': weapon_db.custom_names
-    })
+    if not is_catalog_search():
+        return jsonify({
+            'weapons': weapon_db.get_all_weapons(list(used_weapons)),
+            'blacklist': weapon_db.get_blacklist(),
+            'custom_names': weapon_db.custom_names
+        })
+
+    key = (WeaponDatabase.names_revision, NamesParser.revision, frozenset(used_weapons))
+    result = search_catalog('weapons', key, lambda: weapon_db.get_all_weapons(list(used_weapons)),
+                            count_usage(usage_counters))
+    result['items'] = [
+        {
+            'internal': internal,
+            'display': display,
+            'usage': count,
+            'blacklisted': weapon_db.is_blacklisted(internal),
+            'custom': internal in weapon_db.custom_names
+        }
+        for internal, display, count in result['items']
+    ]
+    return jsonify(result)
 
 
 @app.route('/api/weapons/update', methods=['POST'])
 def update_weapon():
     """Aktualisiert Waffennamen"""
-    from weapon_database import WeaponDatabase
-    weapon_db = WeaponDatabase()
+    from catalogs import get_weapon_db
+    weapon_db = get_weapon_db()
     
     data = request.json
     internal_name = data.get('internal_name')
@@ -334,8 +480,8 @@ def update_weapon():
 @app.route('/api/weapons/blacklist', methods=['POST'])
 def toggle_weapon_blacklist():
     """Togglet Blacklist"""
-    from weapon_database import WeaponDatabase
-    weapon_db = WeaponDatabase()
+    from catalogs import get_weapon_db
+    weapon_db = get_weapon_db()
 
     data = request.json
     internal_name = data.get('internal_name')
@@ -351,11 +497,33 @@ def toggle_weapon_blacklist():
     return jsonify({'success': False}), 400
 
 
+@app.route('/api/weapons/bulk', methods=['POST'])
+def bulk_edit_weapons():
+    """
+    Wendet viele Änderungen (Namen, Blacklist) in einem Request an - alle oder keine
+
+    Body: {'edits': [{'internal_name', 'action': 'rename'|'remove_name'|'blacklist', ...}, ...]}
+    """
+    from catalogs import get_weapon_db
+    weapon_db = get_weapon_db()
+
+    edits = (request.json or {}).get('edits')
+    if not isinstance(edits, list):
+        return jsonify({'success': False, 'error': 'Invalid data'}), 400
+
+    try:
+        changed = weapon_db.apply_edits(edits)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    return jsonify({'success': True, 'changed': changed})
+
+
 @app.route('/api/weapons/custom', methods=['POST'])
 def add_weapon_custom():
     """Fügt Custom-Waffennamen hinzu"""
-    from weapon_database import WeaponDatabase
-    weapon_db = WeaponDatabase()
+    from catalogs import get_weapon_db
+    weapon_db = get_weapon_db()
 
     data = request.json
     internal_name = data.get('internal_name')
@@ -371,46 +539,71 @@ def add_weapon_custom():
 @app.route('/api/weapons/custom', methods=['DELETE'])
 def delete_weapon_custom():
     """Löscht Custom-Waffennamen"""
-    from weapon_database import WeaponDatabase
-    weapon_db = WeaponDatabase()
+    from catalogs import get_weapon_db
+    weapon_db = get_weapon_db()
 
     data = request.json
     internal_name = data.get('internal_name')
 
-    if internal_name and internal_name in weapon_db.custom_names:
-        del weapon_db.custom_names[internal_name]
-        weapon_db.save()
+    if internal_name and weapon_db.remove_custom_name(internal_name):
         return jsonify({'success': True})
 
     return jsonify({'success': False}), 400
 
 
 @app.route('/api/vehicles')
+@profiler.profiled('route.get_vehicles')
 def get_vehicles():
-    """Gibt Fahrzeug-Datenbank zurück"""
+    """
+    Gibt Fahrzeug-Datenbank zurück
+
+    Mit q oder limit (plus offset/sort): nur eine Seite der Suchtreffer (Verwaltung), sonst alle Namen
+    """
+    from catalogs import get_vehicle_db
+    from catalog_search import count_usage
+    from names_parser import NamesParser
     from vehicle_database import VehicleDatabase
-    vehicle_db = VehicleDatabase()
+    vehicle_db = get_vehicle_db()
 
-    # Sammle alle verwendeten Fahrzeuge aus allen Stats
+    # Sammle alle verwendeten Fahrzeuge aus allen Stats (Nutzung = Kills, Gesamt enthält Session)
     used_vehicles = set()
+    usage_counters = []
     for stats_mgr in stats_managers.values():
         all_stats = stats_mgr.get_all_stats()
         # Aus vehicle_kills
         used_vehicles.update(all_stats['session']['vehicle_kills'].keys())
         used_vehicles.update(all_stats['total']['vehicle_kills'].keys())
+        usage_counters.append(all_stats['total']['vehicle_kills'])
 
-    return jsonify({
-        'vehicles': vehicle_db.get_all_vehicles(list(used_vehicles)),
-        'custom_names': vehicle_db.custom_names,
-        'parent_vehicles': vehicle_db.parent_vehicles
-    })
+    if not is_catalog_search():
+        return jsonify({
+            'vehicles': vehicle_db.get_all_vehicles(list(used_vehicles)),
+            'custom_names': vehicle_db.custom_names,
+            'parent_vehicles': vehicle_db.parent_vehicles
+        })
+
+    usage = count_usage(usage_counters, vehicle_db.normalize_vehicle_name)
+    key = (VehicleDatabase.names_revision, NamesParser.revision, frozenset(used_vehicles))
+    result = search_catalog('vehicles', key, lambda: vehicle_db.get_all_vehicles(list(used_vehicles)),
+                            usage)
+    result['items'] = [
+        {
+            'internal': internal,
+            'display': display,
+            'usage': count,
+            'parent': vehicle_db.parent_vehicles.get(internal, internal),
+            'custom': internal in vehicle_db.custom_names
+        }
+        for internal, display, count in result['items']
+    ]
+    return jsonify(result)
 
 
 @app.route('/api/vehicles/update', methods=['POST'])
 def update_vehicle():
     """Aktualisiert Fahrzeugnamen"""
-    from vehicle_database import VehicleDatabase
-    vehicle_db = VehicleDatabase()
+    from catalogs import get_vehicle_db
+    vehicle_db = get_vehicle_db()
 
     data = request.json
     internal_name = data.get('internal_name')
@@ -423,11 +616,33 @@ def update_vehicle():
     return jsonify({'success': False}), 400
 
 
+@app.route('/api/vehicles/bulk', methods=['POST'])
+def bulk_edit_vehicles():
+    """
+    Wendet viele Änderungen (Namen, Parent-Vehicles) in einem Request an - alle oder keine
+
+    Body: {'edits': [{'internal_name', 'action': 'rename'|'remove_name'|'parent', ...}, ...]}
+    """
+    from catalogs import get_vehicle_db
+    vehicle_db = get_vehicle_db()
+
+    edits = (request.json or {}).get('edits')
+    if not isinstance(edits, list):
+        return jsonify({'success': False, 'error': 'Invalid data'}), 400
+
+    try:
+        changed = vehicle_db.apply_edits(edits)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    return jsonify({'success': True, 'changed': changed})
+
+
 @app.route('/api/vehicles/custom', methods=['POST'])
 def add_vehicle_custom():
     """Fügt Custom-Fahrzeugnamen hinzu"""
-    from vehicle_database import VehicleDatabase
-    vehicle_db = VehicleDatabase()
+    from catalogs import get_vehicle_db
+    vehicle_db = get_vehicle_db()
 
     data = request.json
     internal_name = data.get('internal_name')
@@ -443,15 +658,13 @@ def add_vehicle_custom():
 @app.route('/api/vehicles/custom', methods=['DELETE'])
 def delete_vehicle_custom():
     """Löscht Custom-Fahrzeugnamen"""
-    from vehicle_database import VehicleDatabase
-    vehicle_db = VehicleDatabase()
+    from catalogs import get_vehicle_db
+    vehicle_db = get_vehicle_db()
 
     data = request.json
     internal_name = data.get('internal_name')
 
-    if internal_name and internal_name in vehicle_db.custom_names:
-        del vehicle_db.custom_names[internal_name]
-        vehicle_db.save()
+    if internal_name and vehicle_db.remove_custom_name(internal_name):
         return jsonify({'success': True})
 
     return jsonify({'success': False}), 400
@@ -460,8 +673,8 @@ def delete_vehicle_custom():
 @app.route('/api/vehicles/parent', methods=['POST'])
 def set_vehicle_parent():
     """Setzt Parent-Vehicle für Statistik-Aggregation"""
-    from vehicle_database import VehicleDatabase
-    vehicle_db = VehicleDatabase()
+    from catalogs import get_vehicle_db
+    vehicle_db = get_vehicle_db()
 
     data = request.json
     internal_name = data.get('internal_name')
@@ -474,48 +687,54 @@ def set_vehicle_parent():
     return jsonify({'success': False}), 400
 
 
+def player_display_stats(data: dict, weapon_names: dict, vehicle_names: dict) -> dict:
+    """Konvertiert die Zähler eines Spielers zu Display-Namen (Namen aus resolve_many)"""
+    return {
+        'kills_by_me': {
+            'total': data['kills_by_me']['total'],
+            'weapons': rename_counts(data['kills_by_me']['weapons'], weapon_names)
+        },
+        'deaths_by_them': {
+            'total': data['deaths_by_them']['total'],
+            'weapons': rename_counts(data['deaths_by_them']['weapons'], weapon_names)
+        },
+        'my_vehicles_destroyed_by_them': rename_counts(data['my_vehicles_destroyed_by_them'], vehicle_names),
+        'first_encounter': data['first_encounter'],
+        'last_encounter': data['last_encounter'],
+        'avatar_url': data.get('avatar_url')
+    }
+
+
+def resolve_player_names(players) -> tuple:
+    """Löst alle Waffen- und Fahrzeugnamen mehrerer Spieler auf einmal auf"""
+    from catalogs import get_weapon_db, get_vehicle_db
+
+    weapons = set()
+    vehicles = set()
+    for data in players:
+        weapons.update(data['kills_by_me']['weapons'], data['deaths_by_them']['weapons'])
+        vehicles.update(data['my_vehicles_destroyed_by_them'])
+    return get_weapon_db().resolve_many(weapons), get_vehicle_db().resolve_many(vehicles)
+
+
 @app.route('/api/players/<version>')
+@profiler.profiled('route.get_players')
 def get_players(version):
     """Gibt Player Database zurück"""
     if version not in log_parsers:
         return jsonify({'error': 'Invalid version'}), 400
 
-    from weapon_database import WeaponDatabase
-    from vehicle_database import VehicleDatabase
-
-    weapon_db = WeaponDatabase()
-    vehicle_db = VehicleDatabase()
     player_db = log_parsers[version].player_db
 
     # Hole alle Spieler
     all_players = player_db.get_all_players()
 
-    # Konvertiere interne Namen zu Display-Namen
-    players_display = {}
-    for player_name, data in all_players.items():
-        players_display[player_name] = {
-            'kills_by_me': {
-                'total': data['kills_by_me']['total'],
-                'weapons': {
-                    weapon_db.get_display_name(internal): count
-                    for internal, count in data['kills_by_me']['weapons'].items()
-                }
-            },
-            'deaths_by_them': {
-                'total': data['deaths_by_them']['total'],
-                'weapons': {
-                    weapon_db.get_display_name(internal): count
-                    for internal, count in data['deaths_by_them']['weapons'].items()
-                }
-            },
-            'my_vehicles_destroyed_by_them': {
-                vehicle_db.get_display_name(internal): count
-                for internal, count in data['my_vehicles_destroyed_by_them'].items()
-            },
-            'first_encounter': data['first_encounter'],
-            'last_encounter': data['last_encounter'],
-            'avatar_url': data.get('avatar_url')
-        }
+    # Konvertiere interne Namen zu Display-Namen (jeder Name wird nur einmal aufgelöst)
+    weapon_names, vehicle_names = resolve_player_names(all_players.values())
+    players_display = {
+        player_name: player_display_stats(data, weapon_names, vehicle_names)
+        for player_name, data in all_players.items()
+    }
 
     return jsonify({
         'players': players_display,
@@ -526,16 +745,12 @@ def get_players(version):
 
 
 @app.route('/api/players/<version>/<player_name>')
+@profiler.profiled('route.get_player_detail')
 def get_player_detail(version, player_name):
     """Gibt detaillierte Infos zu einem Spieler zurück"""
     if version not in log_parsers:
         return jsonify({'error': 'Invalid version'}), 400
 
-    from weapon_database import WeaponDatabase
-    from vehicle_database import VehicleDatabase
-
-    weapon_db = WeaponDatabase()
-    vehicle_db = VehicleDatabase()
     player_db = log_parsers[version].player_db
 
     stats = player_db.get_player_stats(player_name)
@@ -543,30 +758,9 @@ def get_player_detail(version, player_name):
         return jsonify({'error': 'Player not found'}), 404
 
     # Konvertiere zu Display-Namen
-    stats_display = {
-        'kills_by_me': {
-            'total': stats['kills_by_me']['total'],
-            'weapons': {
-                weapon_db.get_display_name(internal): count
-                for internal, count in stats['kills_by_me']['weapons'].items()
-            }
-        },
-        'deaths_by_them': {
-            'total': stats['deaths_by_them']['total'],
-            'weapons': {
-                weapon_db.get_display_name(internal): count
-                for internal, count in stats['deaths_by_them']['weapons'].items()
-            }
-        },
-        'my_vehicles_destroyed_by_them': {
-            vehicle_db.get_display_name(internal): count
-            for internal, count in stats['my_vehicles_destroyed_by_them'].items()
-        },
-        'first_encounter': stats['first_encounter'],
-        'last_encounter': stats['last_encounter'],
-        'avatar_url': stats.get('avatar_url'),
-        'summary': player_db.get_player_summary(player_name)
-    }
+    weapon_names, vehicle_names = resolve_player_names([stats])
+    stats_display = player_display_stats(stats, weapon_names, vehicle_names)
+    stats_display['summary'] = player_db.get_player_summary(player_name)
 
     return jsonify(stats_display)
 
@@ -574,19 +768,44 @@ def get_player_detail(version, player_name):
 @app.route('/api/npcs')
 def get_npcs():
     """Gibt NPC-Patterns zurück"""
-    from npc_database import NPCDatabase
-    npc_db = NPCDatabase()
+    from catalogs import get_npc_db
+    npc_db = get_npc_db()
 
     return jsonify({
         'patterns': npc_db.get_patterns()
     })
 
 
+def reclassify_npcs(npc_db, pattern: str):
+    """
+    Bewertet Stats und Spieler-DB aller Versionen nach einer Pattern-Änderung neu
+
+    Geprüft werden nur Namen, die das Pattern enthalten - die gemeinsame NPCDatabase
+    (auch die der Parser), damit jedes Urteil über alle Versionen hinweg nur einmal berechnet wird.
+    """
+    for version in config_manager.get_versions():
+        stats_mgr = stats_managers[version]
+        if stats_mgr.recalculate_npc_stats(npc_db, pattern):
+            # Sende Update an Frontend
+            emit_stats_updates(stats_mgr)
+
+        # Bereinige Player-Datenbank von NPCs
+        if version in log_parsers:
+            removed_count = log_parsers[version].player_db.remove_npcs(npc_db, pattern)
+            if removed_count > 0:
+                print(f"[{version}] {removed_count} NPCs aus Spielerdatenbank entfernt")
+                # Sende Player-Update an Frontend
+                socketio.emit('players_updated', {
+                    'version': version,
+                    'message': f'{removed_count} NPCs entfernt'
+                })
+
+
 @app.route('/api/npcs/pattern', methods=['POST'])
 def add_npc_pattern():
     """Fügt NPC-Pattern hinzu"""
-    from npc_database import NPCDatabase
-    npc_db = NPCDatabase()
+    from catalogs import get_npc_db
+    npc_db = get_npc_db()
 
     data = request.json
     pattern = data.get('pattern')
@@ -595,26 +814,7 @@ def add_npc_pattern():
         npc_db.add_pattern(pattern)
 
         # Berechne Stats für alle Versionen neu UND bereinige Player-Datenbank
-        for version in config_manager.get_versions():
-            stats_managers[version].recalculate_npc_stats(npc_db)
-
-            # Bereinige Player-Datenbank von NPCs
-            if version in log_parsers:
-                player_db = log_parsers[version].player_db
-                removed_count = player_db.remove_npcs(npc_db)
-                if removed_count > 0:
-                    print(f"[{version}] {removed_count} NPCs aus Spielerdatenbank entfernt")
-                    # Sende Player-Update an Frontend
-                    socketio.emit('players_updated', {
-                        'version': version,
-                        'message': f'{removed_count} NPCs entfernt'
-                    })
-
-            # Sende Update an Frontend
-            socketio.emit('stats_updated', {
-                'version': version,
-                'stats': stats_managers[version].get_all_stats()
-            })
+        reclassify_npcs(npc_db, pattern)
 
         return jsonify({'success': True})
 
@@ -624,8 +824,8 @@ def add_npc_pattern():
 @app.route('/api/npcs/pattern/<pattern>', methods=['DELETE'])
 def remove_npc_pattern(pattern):
     """Entfernt NPC-Pattern"""
-    from npc_database import NPCDatabase
-    npc_db = NPCDatabase()
+    from catalogs import get_npc_db
+    npc_db = get_npc_db()
 
     npc_db.remove_pattern(pattern)
 
@@ -633,14 +833,7 @@ def remove_npc_pattern(pattern):
     # WICHTIG: Nach dem Entfernen eines Patterns könnten ehemalige NPCs
     # jetzt als Spieler zählen - aber wir korrigieren nur in eine Richtung
     # (NPCs die als PVP gespeichert sind werden zu PVE, nicht umgekehrt)
-    for version in config_manager.get_versions():
-        stats_managers[version].recalculate_npc_stats(npc_db)
-
-        # Sende Update an Frontend
-        socketio.emit('stats_updated', {
-            'version': version,
-            'stats': stats_managers[version].get_all_stats()
-        })
+    reclassify_npcs(npc_db, pattern)
 
     return jsonify({'success': True})
 
@@ -671,7 +864,7 @@ def get_player_profile(handle):
             'Upgrade-Insecure-Requests': '1'
         }
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = fetch_rsi_page(url, headers, kind='profile')
         
         if response.status_code != 200:
             return jsonify({
@@ -825,7 +1018,7 @@ def get_player_avatar(handle):
             'Upgrade-Insecure-Requests': '1'
         }
 
-        response = requests.get(url, headers=headers, timeout=10)
+        response = fetch_rsi_page(url, headers, kind='avatar')
 
         if response.status_code != 200:
             return jsonify({
@@ -889,6 +1082,126 @@ def get_player_avatar(handle):
         }), 500
 
 
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus Text-Format Metriken (Parser, Speicherung, Socket.IO, RSI)"""
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
+@app.route('/api/debug/trace')
+def download_trace():
+    """Lädt aufgezeichnete Spans als Chrome/Perfetto Trace herunter"""
+    trace = tracer.export_chrome_trace()
+    filename = f"vcl_trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+
+    return Response(
+        json.dumps(trace),
+        mimetype='application/json',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+
+@app.route('/api/debug/trace/status')
+def get_trace_status():
+    """Gibt Tracing-Status zurück"""
+    return jsonify(tracer.get_status())
+
+
+@app.route('/api/debug/trace', methods=['POST'])
+def toggle_trace():
+    """Aktiviert/Deaktiviert Tracing"""
+    data = request.json or {}
+    enabled = data.get('enabled')
+
+    if enabled is None:
+        return jsonify({'success': False, 'error': 'Missing enabled'}), 400
+
+    if data.get('clear', False):
+        tracer.clear()
+
+    if enabled:
+        tracer.start()
+    else:
+        tracer.stop()
+
+    return jsonify({'success': True, **tracer.get_status()})
+
+
+@app.route('/api/debug/profile')
+def get_profile_status():
+    """Gibt Profiling-Status zurück"""
+    return jsonify(profiler.get_status())
+
+
+@app.route('/api/debug/profile', methods=['POST'])
+def toggle_profile():
+    """Aktiviert/Deaktiviert CPU-Profiling (beim Deaktivieren werden Profile geschrieben)"""
+    data = request.json or {}
+    enabled = data.get('enabled')
+
+    if enabled is None:
+        return jsonify({'success': False, 'error': 'Missing enabled'}), 400
+
+    files = []
+    if enabled:
+        profiler.start()
+    else:
+        files = profiler.stop()
+
+    return jsonify({'success': True, 'files': files, **profiler.get_status()})
+
+
+@app.route('/api/debug/profile/dump', methods=['POST'])
+def dump_profiles():
+    """Schreibt alle bisher gesammelten Profile (Profiling läuft weiter)"""
+    files = profiler.dump_all()
+    return jsonify({'success': True, 'files': files})
+
+
+@app.route('/api/debug/memory')
+def get_memory_report():
+    """Gibt tracemalloc-Status und Größen der langlebigen Strukturen zurück"""
+    return jsonify({
+        **memory_monitor.get_status(),
+        'structures': memory_monitor.get_structure_sizes(log_parsers)
+    })
+
+
+@app.route('/api/debug/memory', methods=['POST'])
+def toggle_memory_tracing():
+    """Aktiviert/Deaktiviert tracemalloc"""
+    data = request.json or {}
+    enabled = data.get('enabled')
+
+    if enabled is None:
+        return jsonify({'success': False, 'error': 'Missing enabled'}), 400
+
+    if enabled:
+        memory_monitor.start()
+    else:
+        memory_monitor.stop()
+
+    return jsonify({'success': True, **memory_monitor.get_status()})
+
+
+@app.route('/api/debug/memory/snapshot', methods=['POST'])
+def take_memory_snapshot():
+    """Nimmt Snapshot und zeigt Wachstum seit letztem/erstem Snapshot"""
+    if not memory_monitor.enabled:
+        return jsonify({'success': False, 'error': 'tracemalloc not enabled'}), 400
+
+    data = request.get_json(silent=True) or {}
+    try:
+        limit = int(data.get('limit', memory_monitor.TOP_N))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'Invalid limit'}), 400
+
+    report = memory_monitor.take_snapshot(limit)
+    report['structures'] = memory_monitor.get_structure_sizes(log_parsers)
+    report['success'] = True
+    return jsonify(report)
+
+
 @socketio.on('connect')
 def handle_connect():
     """Client verbunden"""
@@ -900,10 +1213,7 @@ def handle_connect():
         'player_info': config_manager.get_player_info(current_version)
     })
 
-    emit('stats_updated', {
-        'version': current_version,
-        'stats': stats_managers[current_version].get_all_stats()
-    })
+    emit('stats_updated', stats_managers[current_version].get_snapshot())
 
     # Sende aktuellen Star Citizen Status
     sc_running = is_star_citizen_running()
@@ -920,6 +1230,17 @@ def handle_disconnect():
     print('Client disconnected')
 
 
+@socketio.on('request_stats')
+def handle_request_stats(data):
+    """Client fordert vollständige Stats an (Lücke in stats_delta oder Reconnect)"""
+    version = (data or {}).get('version', current_version)
+
+    if version not in stats_managers:
+        return
+
+    emit('stats_updated', stats_managers[version].get_snapshot())
+
+
 @socketio.on('start_monitoring')
 def handle_start_monitoring(data):
     """Startet Monitoring"""
@@ -977,10 +1298,7 @@ def handle_session_change_response(data):
         parser.stats.session_start = datetime.now()
 
         # Sende Stats-Update
-        socketio.emit('stats_updated', {
-            'version': version,
-            'stats': parser.stats.get_all_stats()
-        })
+        emit_stats_updates(parser.stats)
 
         emit('session_change_processed', {
             'version': version,
@@ -989,6 +1307,27 @@ def handle_session_change_response(data):
         })
 
 
+def emit_stats_updates(stats_manager):
+    """Sendet ausstehende Stats-Änderungen an alle Clients (stats_delta bzw. stats_updated)"""
+    for event_name, payload in stats_manager.pop_updates():
+        socketio.emit(event_name, payload)
+
+
+def fetch_rsi_page(url: str, headers: dict, kind: str, timeout: int = 10):
+    """Ruft eine RSI-Seite ab und erfasst Latenz und Ergebnis in den Metriken"""
+    start = time.perf_counter()
+    try:
+        response = requests.get(url, headers=headers, timeout=timeout)
+    except Exception:
+        RSI_FETCHES.inc(kind=kind, result='error')
+        raise
+    finally:
+        RSI_FETCH_SECONDS.observe(time.perf_counter() - start, kind=kind)
+
+    RSI_FETCHES.inc(kind=kind, result=str(response.status_code))
+    return response
+
+
 def is_star_citizen_running():
     """Prüft ob Star Citizen läuft"""
     import psutil
@@ -1006,7 +1345,8 @@ def monitor_log(version):
     parser = log_parsers[version]
 
     print(f"[{version}] Starte initiales Scannen...", flush=True)
-    parser.initial_scan()
+    with profiler.profile(f'initial_scan_{version.lower()}', dump_after=True):
+        parser.initial_scan()
     print(f"[{version}] Initiales Scannen abgeschlossen", flush=True)
 
     socketio.emit('initial_scan_complete', {'version': version})
@@ -1031,13 +1371,16 @@ def monitor_log(version):
                     'version': version
                 })
 
-            if parser.check_server_swap():
-                socketio.emit('server_swap_detected', {
-                    'version': version,
-                    'message': 'Server-Wechsel erkannt - Session übernommen'
-                })
+            with profiler.profile(f'monitor_{version.lower()}'):
+                with span('monitor.server_swap_check', version=version):
+                    swapped = parser.check_server_swap()
+                if swapped:
+                    socketio.emit('server_swap_detected', {
+                        'version': version,
+                        'message': 'Server-Wechsel erkannt - Session übernommen'
+                    })
 
-            parser.parse_new_lines()
+                parser.parse_new_lines()
 
             time.sleep(2)
 
@@ -1045,6 +1388,10 @@ def monitor_log(version):
             print(f"[{version}] Monitoring-Fehler: {e}")
             time.sleep(5)
 
+    # Gesammeltes Live-Profil dieser Version schreiben
+    if profiler.enabled:
+        profiler.dump(f'monitor_{version.lower()}')
+
     print(f"[{version}] Monitoring gestoppt")
 
 
@@ -1105,6 +1452,12 @@ if __name__ == '__main__':
     if DEBUG_MODE:
         print("DEBUG-MODUS AKTIVIERT")
         print("Entwicklertools: Rechtsklick → Inspect / F12")
+    if TRACE_MODE:
+        print("TRACING AKTIVIERT - Download: http://127.0.0.1:5000/api/debug/trace")
+    if PROFILE_MODE:
+        print(f"PROFILING AKTIVIERT - Ausgabe: {profiler.output_dir}")
+    if TRACEMALLOC_MODE:
+        print("TRACEMALLOC AKTIVIERT - Snapshot: POST http://127.0.0.1:5000/api/debug/memory/snapshot")
     print("=" * 50)
 
     import webview
@@ -1119,6 +1472,10 @@ if __name__ == '__main__':
             print(f"✅ {message}")
 
             if needs_reload:
+                # Neue Namen sofort verwenden (verwirft auch gecachte Anzeigenamen)
+                from names_parser import NamesParser
+                NamesParser().reload()
+
                 # Mindestens 3 Sekunden warten, damit Ladebildschirm sichtbar ist
                 elapsed = time.time() - start_time
                 min_display_time = 3.0
@@ -1166,4 +1523,11 @@ if __name__ == '__main__':
     # Starte mit Debug-Modus im Development
     webview.start(debug=DEBUG_MODE)
 
+    # Offene Profile beim Beenden schreiben
+    if profiler.enabled:
+        profiler.stop()
+
+    # Ausstehende Änderungen aller Datenspeicher schreiben
+    persistence.shutdown()
+
     print("Anwendung beendet.")
\ No newline at end of file
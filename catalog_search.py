@@ -0,0 +1,134 @@
+"""
+Verse Combat Log - Catalog Search
+Index für die Suche in der Waffen- und Fahrzeugverwaltung (serverseitig, seitenweise)
+
+Interne und Anzeigenamen werden in Tokens zerlegt (Trenner und CamelCase, z.B.
+'GLSN_BallisticGatling_S4' -> glsn, ballisticgatling, ballistic, gatling, s4). Jedes Wort
+der Suche muss Präfix eines Tokens sein - über eine sortierte Token-Liste per Binärsuche,
+statt bei jedem Tastendruck alle Einträge im Browser zu filtern.
+"""
+
+import bisect
+import heapq
+import re
+from typing import Callable, Dict, Hashable, Iterable, List, Set, Tuple
+
+WORD_SPLIT = re.compile(r'[^0-9A-Za-z]+')
+CAMEL_CASE = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+')
+
+# Maximale Seitengröße pro Anfrage
+MAX_LIMIT = 500
+
+
+def tokenize(text: str) -> Set[str]:
+    """Zerlegt einen Namen in kleingeschriebene Such-Tokens"""
+    tokens = set()
+    for word in WORD_SPLIT.split(text):
+        if not word:
+            continue
+        tokens.add(word.lower())
+        tokens.update(part.lower() for part in CAMEL_CASE.findall(word))
+    return tokens
+
+
+class CatalogIndex:
+    """
+    Unveränderlicher Suchindex über internal_name -> display_name
+
+    Wird neu gebaut, sobald sich die Einträge ändern (siehe get_index()) - Nutzungszahlen
+    fließen erst beim Sortieren ein und erfordern keinen Neuaufbau.
+    """
+
+    def __init__(self, entries: Dict[str, str]):
+        self.entries = dict(entries)
+        postings: Dict[str, Set[str]] = {}
+        for internal, display in self.entries.items():
+            for token in tokenize(internal) | tokenize(display):
+                postings.setdefault(token, set()).add(internal)
+        self._tokens: List[str] = sorted(postings)
+        self._postings = postings
+        # Position nach Anzeigename - Sortieren braucht dann nur noch einen Dict-Zugriff pro Treffer
+        by_name = sorted(self.entries, key=lambda internal: (self.entries[internal].lower(), internal))
+        self._name_rank = {internal: rank for rank, internal in enumerate(by_name)}
+
+    def _prefix_matches(self, prefix: str) -> Set[str]:
+        """Alle Einträge mit einem Token, das mit prefix beginnt"""
+        start = bisect.bisect_left(self._tokens, prefix)
+        found = set()
+        for token in self._tokens[start:]:
+            if not token.startswith(prefix):
+                break
+            found |= self._postings[token]
+        return found
+
+    def search(self, query: str, usage: Dict[str, int], sort: str = 'usage',
+               limit: int = 100, offset: int = 0) -> Dict:
+        """
+        Sucht Einträge (alle Wörter der Suche müssen passen) und gibt eine Seite zurück
+
+        Args:
+            query: Suchtext (leer = alle Einträge)
+            usage: internal_name -> Nutzungsanzahl (Kills/Tode)
+            sort: 'usage' (häufigste zuerst) oder 'name' (nach Anzeigename)
+            limit, offset: Seite
+
+        Returns:
+            {'total': Anzahl Treffer, 'items': [(internal_name, display_name, usage), ...]}
+        """
+        words = tokenize(query)
+        if words:
+            # Seltenstes Wort zuerst - Schnittmenge schrumpft am schnellsten
+            hits = None
+            for found in sorted((self._prefix_matches(word) for word in words), key=len):
+                hits = found if hits is None else hits & found
+                if not hits:
+                    break
+        else:
+            hits = self.entries.keys()
+
+        entries = self.entries
+        name_rank = self._name_rank
+        if sort == 'name':
+            key = name_rank.__getitem__
+        else:
+            key = lambda internal: (-usage.get(internal, 0), name_rank[internal])
+
+        # Nur bis zum Ende der Seite sortieren statt aller Treffer
+        page = heapq.nsmallest(offset + limit, hits, key=key)[offset:]
+        return {
+            'total': len(hits),
+            'items': [(internal, entries[internal], usage.get(internal, 0)) for internal in page]
+        }
+
+
+def count_usage(counters: Iterable[Dict[str, int]], normalize=None) -> Dict[str, int]:
+    """Summiert Zähler mehrerer Statistik-Maps pro (optional normalisiertem) internen Namen"""
+    usage: Dict[str, int] = {}
+    for counts in counters:
+        for internal, count in counts.items():
+            if normalize is not None:
+                internal = normalize(internal)
+            usage[internal] = usage.get(internal, 0) + count
+    return usage
+
+
+# Zuletzt gebauter Index pro Katalog ('weapons', 'vehicles') mit dem Schlüssel, zu dem er gehört
+_indexes: Dict[str, Tuple[Hashable, CatalogIndex]] = {}
+
+
+def get_index(kind: str, key: Hashable, build_entries: Callable[[], Dict[str, str]]) -> CatalogIndex:
+    """
+    Gibt den Index eines Katalogs zurück
+
+    Args:
+        kind: Katalog ('weapons', 'vehicles')
+        key: Stand der Quellen (Revisionen von Custom-Namen und INI, verwendete Namen) -
+            solange er gleich bleibt, wird der Katalog weder zusammengestellt noch neu indiziert
+        build_entries: Stellt internal_name -> display_name zusammen (nur bei neuem Schlüssel)
+    """
+    cached = _indexes.get(kind)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    index = CatalogIndex(build_entries())
+    _indexes[kind] = (key, index)
+    return index
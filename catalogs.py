@@ -0,0 +1,47 @@
+"""
+Verse Combat Log - Catalogs
+Gemeinsame Instanzen der Kataloge (Waffen, Fahrzeuge, NPC-Patterns) für Parser, Manager und Routen
+
+Eine Instanz pro Katalog statt eigener Kopien pro Route/Parser - Kopien liefen auseinander
+(z.B. überschrieb eine Kopie beim Speichern automatisch gefundene Parents einer anderen) und
+jede Anfrage las die Datei neu. Neu geladen wird nur, wenn sich die Datei seit dem letzten
+Laden/Schreiben geändert hat (mtime, siehe refresh() der Datenbanken).
+"""
+
+import threading
+from typing import Callable, Dict
+
+_catalogs: Dict[str, object] = {}
+_lock = threading.Lock()
+
+
+def _get_catalog(name: str, factory: Callable):
+    """Gibt die gemeinsame Instanz zurück (erzeugt sie beim ersten Zugriff)"""
+    catalog = _catalogs.get(name)
+    if catalog is None:
+        with _lock:
+            catalog = _catalogs.get(name)
+            if catalog is None:
+                catalog = _catalogs[name] = factory()
+                return catalog
+
+    catalog.refresh()
+    return catalog
+
+
+def get_weapon_db():
+    """Gemeinsame WeaponDatabase"""
+    from weapon_database import WeaponDatabase
+    return _get_catalog('weapons', WeaponDatabase)
+
+
+def get_vehicle_db():
+    """Gemeinsame VehicleDatabase"""
+    from vehicle_database import VehicleDatabase
+    return _get_catalog('vehicles', VehicleDatabase)
+
+
+def get_npc_db():
+    """Gemeinsame NPCDatabase"""
+    from npc_database import NPCDatabase
+    return _get_catalog('npcs', NPCDatabase)
@@ -5,8 +5,12 @@ Verwaltet Einstellungen für alle Spiel-Versionen
 
 import json
 import os
+import threading
 from typing import Dict, List, Optional
 from utils import get_data_file_path
+from tracing import traced
+from metrics import STORE_SAVE_SECONDS, timed
+from persistence import persistence, synchronized, dump_json, write_text_file
 
 
 class ConfigManager:
@@ -22,10 +26,15 @@ class ConfigManager:
     
     def __init__(self, config_file: str = "config.json"):
         self.config_file = get_data_file_path(config_file)
+        # Schützt config gegen gleichzeitiges Schreiben durch den Flush-Thread
+        self._lock = threading.RLock()
         self.config = self._load_config()
     
     def _load_config(self) -> Dict:
         """Lädt Konfiguration aus Datei"""
+        # Ausstehende Änderungen einer anderen Instanz zuerst schreiben
+        persistence.flush(self.config_file)
+
         if os.path.exists(self.config_file):
             try:
                 with open(self.config_file, 'r', encoding='utf-8') as f:
@@ -37,6 +46,7 @@ class ConfigManager:
         return {
             'current_version': 'LIVE',
             'language': 'de',  # Default: Deutsch
+            'storage_backend': 'json',  # 'json' oder 'sqlite' (wirkt nach Neustart)
             'versions': {
                 version: {
                     'log_path': self.DEFAULT_PATHS[version],
@@ -50,10 +60,18 @@ class ConfigManager:
         }
     
     def _save_config(self):
-        """Speichert Konfiguration"""
+        """Markiert Konfiguration zum Speichern (geschrieben wird gebündelt, siehe persistence.py)"""
+        persistence.mark_dirty('config', self.config_file, self._write_config)
+
+    @traced('config.save')
+    @timed(STORE_SAVE_SECONDS, store='config')
+    def _write_config(self):
+        """Schreibt Konfiguration auf die Platte"""
+        with self._lock:
+            content = dump_json(self.config)
+
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=2, ensure_ascii=False)
+            write_text_file(self.config_file, content)
         except Exception as e:
             print(f"Fehler beim Speichern der Config: {e}")
     
@@ -65,6 +83,7 @@ class ConfigManager:
         """Gibt die aktuell ausgewählte Version zurück"""
         return self.config.get('current_version', 'LIVE')
     
+    @synchronized
     def set_current_version(self, version: str):
         """Setzt die aktuelle Version"""
         if version in self.VERSIONS:
@@ -75,6 +94,7 @@ class ConfigManager:
         """Gibt Log-Pfad für Version zurück"""
         return self.config['versions'].get(version, {}).get('log_path', '')
     
+    @synchronized
     def set_log_path(self, version: str, path: str):
         """Setzt Log-Pfad für Version"""
         if version in self.config['versions']:
@@ -100,6 +120,7 @@ class ConfigManager:
         """Gibt Game-Version zurück"""
         return self.config['versions'].get(version, {}).get('game_version', '')
 
+    @synchronized
     def set_player_info(self, version: str, name: str, player_id: str):
         """Setzt Spieler-Informationen"""
         if version in self.config['versions']:
@@ -107,6 +128,7 @@ class ConfigManager:
             self.config['versions'][version]['player_id'] = player_id
             self._save_config()
     
+    @synchronized
     def set_game_version(self, version: str, game_version: str):
         """Setzt Game-Version"""
         if version in self.config['versions']:
@@ -127,16 +149,22 @@ class ConfigManager:
         """Gibt Avatar-URL für Version zurück"""
         return self.config['versions'].get(version, {}).get('avatar_url', '')
 
+    @synchronized
     def set_avatar_url(self, version: str, avatar_url: str):
         """Setzt Avatar-URL für Version"""
         if version in self.config['versions']:
             self.config['versions'][version]['avatar_url'] = avatar_url
             self._save_config()
 
+    def get_storage_backend(self) -> str:
+        """Gibt das Speicher-Backend zurück ('json' oder 'sqlite')"""
+        return self.config.get('storage_backend', 'json')
+
     def get_language(self) -> str:
         """Gibt aktuelle Sprache zurück"""
         return self.config.get('language', 'de')
 
+    @synchronized
     def set_language(self, language: str):
         """Setzt Sprache"""
         if language in ['de', 'en']:
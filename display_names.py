@@ -0,0 +1,109 @@
+"""
+Verse Combat Log - Display Name Cache
+Gemeinsamer, begrenzter Cache interner Name -> Anzeigename (bzw. Parent-Fahrzeug)
+
+WeaponDatabase und VehicleDatabase sind gemeinsame Instanzen (siehe catalogs.py). Invalidiert
+wird gezielt pro Name (Custom-Namen, Parent-Zuordnungen) bzw. komplett, wenn refresh() eine
+außerhalb geänderte Datenbankdatei neu lädt oder die internalNames.ini neu geladen wird.
+"""
+
+import threading
+from typing import Dict, Optional, Set, Tuple
+
+# Maximale Einträge pro Cache (ältester Eintrag wird verdrängt)
+MAX_ENTRIES = 4096
+
+
+class DisplayNameCache:
+    """
+    Begrenzter Cache Schlüssel -> Wert mit Invalidierung nach Quellname
+
+    Lesen ist lock-frei (ein dict-Zugriff) - Treffer müssen billiger bleiben als die
+    Namensauflösung selbst. Treffer/Fehlschläge werden als einfache Zähler geführt und erst
+    beim Export nach /metrics gelesen.
+    """
+
+    def __init__(self, kind: str, max_entries: int = MAX_ENTRIES):
+        self.kind = kind
+        self.max_entries = max_entries
+        # Schlüssel (wie übergeben, z.B. mit Entity-ID) -> Wert, in Einfügereihenfolge
+        self._values: Dict[str, str] = {}
+        # Quellname (normalisiert) -> Schlüssel und Schlüssel -> Quellname (gezielte Invalidierung)
+        self._keys_by_source: Dict[str, Set[str]] = {}
+        self._source_by_key: Dict[str, str] = {}
+        self._lock = threading.Lock()  # Nur für Schreiber
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        """Gibt den gecachten Wert zurück (None = nicht im Cache)"""
+        value = self._values.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put(self, key: str, value: str, source: Optional[str] = None):
+        """
+        Speichert einen Wert
+
+        Args:
+            key: Nachgeschlagener Name
+            value: Anzeigename bzw. Parent
+            source: Name, über den invalidiert wird (Standard: key)
+        """
+        source = source if source is not None else key
+        with self._lock:
+            self._discard(key)
+            # Voll -> ältesten Eintrag verdrängen
+            while len(self._values) >= self.max_entries:
+                self._discard(next(iter(self._values)))
+            self._values[key] = value
+            self._source_by_key[key] = source
+            self._keys_by_source.setdefault(source, set()).add(key)
+
+    def invalidate(self, source: str):
+        """Verwirft alle Einträge eines Quellnamens"""
+        with self._lock:
+            for key in list(self._keys_by_source.get(source, ())):
+                self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._values = {}
+            self._keys_by_source = {}
+            self._source_by_key = {}
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def _discard(self, key: str):
+        self._values.pop(key, None)
+        source = self._source_by_key.pop(key, None)
+        keys = self._keys_by_source.get(source)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_source[source]
+
+
+WEAPON_NAMES = DisplayNameCache('weapon')
+VEHICLE_NAMES = DisplayNameCache('vehicle')
+VEHICLE_PARENTS = DisplayNameCache('vehicle_parent')
+CACHES = (WEAPON_NAMES, VEHICLE_NAMES, VEHICLE_PARENTS)
+
+
+def clear_all():
+    """Verwirft alle Caches (z.B. nach dem Neuladen der internalNames.ini)"""
+    for cache in CACHES:
+        cache.clear()
+
+
+def cache_counts() -> Dict[Tuple[str, str], int]:
+    """Treffer/Fehlschläge pro Cache für /metrics"""
+    counts = {}
+    for cache in CACHES:
+        counts[(cache.kind, 'hit')] = cache.hits
+        counts[(cache.kind, 'miss')] = cache.misses
+    return counts
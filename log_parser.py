@@ -6,10 +6,15 @@ Trackt: Kills, Deaths, Vehicles, Vehicle Control
 import re
 import os
 import json
+import time
 from pathlib import Path
 from datetime import datetime
 from collections import deque
 from typing import Optional, Dict, List
+from tracing import span, traced
+from metrics import (LOG_LINES_READ, LOG_BYTES_READ, LOG_DISPATCH_SECONDS, EVENTS,
+                     STORE_SAVE_REQUESTS, STORE_SAVE_SECONDS, timed)
+from persistence import persistence, dump_json, write_text_file
 
 
 class LogParser:
@@ -93,15 +98,13 @@ class LogParser:
         # Respawn Cooldown Tracking (verhindert doppelte Respawn-Events)
         self.last_respawn_times = {}  # player_name -> datetime
 
-        # Datenbanken
-        from weapon_database import WeaponDatabase
-        from vehicle_database import VehicleDatabase
-        from npc_database import NPCDatabase
+        # Datenbanken (Kataloge teilen sich alle Parser, Manager und Routen)
+        from catalogs import get_weapon_db, get_vehicle_db, get_npc_db
         from player_database import PlayerDatabase
 
-        self.weapon_db = WeaponDatabase()
-        self.vehicle_db = VehicleDatabase()
-        self.npc_db = NPCDatabase()
+        self.weapon_db = get_weapon_db()
+        self.vehicle_db = get_vehicle_db()
+        self.npc_db = get_npc_db()
         self.player_db = PlayerDatabase(f"players_db_{version.lower()}.json")
 
         # Bereinige player_db: Entferne eigenen Spieler falls vorhanden
@@ -110,6 +113,7 @@ class LogParser:
         # Lade letzte Position
         self._load_position()
     
+    @traced('log.initial_scan')
     def initial_scan(self):
         """Initiales vollständiges Scannen der Log-Datei"""
         if not self.log_path.exists():
@@ -139,12 +143,20 @@ class LogParser:
                           message_key='events.session_full_scan',
                           params={'version': self.version})
                     line_count = 0
+                    # Neue Log-Datei - Lebensdauer nicht über das Ende der vorherigen hinweg messen
+                    self.stats.end_life()
 
-                    for line in f:
-                        self._parse_line(line)
-                        line_count += 1
+                    dispatch_start = time.perf_counter()
+                    # Leser sehen den neuen Stand erst nach dem kompletten Scan
+                    with self.stats.batch(), self.player_db.batch(), self.vehicle_db.batch():
+                        for line in f:
+                            self._parse_line(line)
+                            line_count += 1
+                    LOG_DISPATCH_SECONDS.observe(time.perf_counter() - dispatch_start, version=self.version)
 
                     self.last_position = f.tell()
+                    LOG_LINES_READ.inc(line_count, version=self.version)
+                    LOG_BYTES_READ.inc(self.last_position, version=self.version)
                     self.add_event('info', message=f'[{self.version}] Initiales Scannen: {line_count} Zeilen',
                           message_key='events.initial_scan',
                           params={'version': self.version, 'line_count': line_count})
@@ -211,6 +223,7 @@ class LogParser:
                 'current_vehicle': self.current_vehicle
             })
     
+    @traced('log.parse_new_lines')
     def parse_new_lines(self):
         """Parst neue Zeilen"""
         if not self.log_path.exists():
@@ -225,12 +238,29 @@ class LogParser:
                 return
             
             with open(self.log_path, 'r', encoding='utf-8', errors='ignore') as f:
-                f.seek(self.last_position)
-                new_lines = f.readlines()
-                self.last_position = f.tell()
+                with span('log.read', version=self.version):
+                    f.seek(self.last_position)
+                    new_lines = f.readlines()
+                    previous_position = self.last_position
+                    self.last_position = f.tell()
 
-                for line in new_lines:
-                    self._parse_line(line)
+                if new_lines:
+                    # Extern geänderte Kataloge vor dem Batch neu laden (ein stat() pro Datei)
+                    for catalog in (self.weapon_db, self.vehicle_db, self.npc_db):
+                        catalog.refresh()
+
+                dispatch_start = time.perf_counter()
+                with span('log.dispatch', version=self.version, lines=len(new_lines)):
+                    # Ein veröffentlichter Stand pro Batch statt pro Event
+                    with self.stats.batch(), self.player_db.batch(), self.vehicle_db.batch():
+                        for line in new_lines:
+                            self._parse_line(line)
+
+                # Erst nach der Verarbeitung zählen (log_replay misst damit die Latenz)
+                if new_lines:
+                    LOG_DISPATCH_SECONDS.observe(time.perf_counter() - dispatch_start, version=self.version)
+                    LOG_LINES_READ.inc(len(new_lines), version=self.version)
+                    LOG_BYTES_READ.inc(self.last_position - previous_position, version=self.version)
 
                 # Speichere Position nach dem Parsen
                 if new_lines:
@@ -271,7 +301,12 @@ class LogParser:
         match = self.PATTERNS['kill'].search(line)
         if not match:
             return
-        
+
+        with span('log.kill_event', version=self.version):
+            self._handle_kill_match(match, timestamp)
+
+    def _handle_kill_match(self, match, timestamp: Optional[datetime]):
+        """Verarbeitet einen gefundenen Kill/Death Event"""
         victim_name = match.group(1)
         victim_id = match.group(2)
         killer_name = match.group(3)
@@ -307,7 +342,7 @@ class LogParser:
         
         # Suicide
         if victim_id == killer_id == player_id:
-            self.stats.add_death(weapon_internal, None)
+            self.stats.add_death(weapon_internal, None, timestamp)
             weapon_display = self.weapon_db.get_display_name(weapon_internal)
             self.add_event('death',
                           message=f'💀 Suicide mit {weapon_display}',
@@ -325,7 +360,7 @@ class LogParser:
                 vehicle_display = self.vehicle_db.get_display_name(vehicle_internal)
                 vehicle_parent = self.vehicle_db.get_parent_vehicle(vehicle_internal)
                 # Verwende parent_vehicle für Statistik (Aggregation)
-                self.stats.add_vehicle_kill(vehicle_parent)
+                self.stats.add_vehicle_kill(vehicle_parent, timestamp)
                 self.add_event('vehicle',
                               message=f'🚀 {vehicle_display} zerstört',
                               message_key='events.vehicle_destroyed',
@@ -334,7 +369,7 @@ class LogParser:
                 return
 
             is_pvp = not self.npc_db.is_npc(victim_name)
-            self.stats.add_kill(is_pvp, weapon_internal, victim_name if is_pvp else None)
+            self.stats.add_kill(is_pvp, weapon_internal, victim_name if is_pvp else None, timestamp)
 
             # Player Database Update (nur bei PvP)
             if is_pvp:
@@ -374,7 +409,7 @@ class LogParser:
                 is_killer_player = not self.npc_db.is_npc(killer_name)
                 killer = killer_name if is_killer_player else None
 
-            self.stats.add_death(weapon_internal, killer)
+            self.stats.add_death(weapon_internal, killer, timestamp)
 
             # Player Database Update (nur bei Spieler-Killer)
             if is_killer_player:
@@ -437,7 +472,7 @@ class LogParser:
             if caused_by_id == player_id and not is_own_vehicle:
                 # Eigener Kill an fremdem Fahrzeug
                 # Verwende parent_vehicle für Statistik (Aggregation)
-                self.stats.add_vehicle_kill(vehicle_parent)
+                self.stats.add_vehicle_kill(vehicle_parent, timestamp)
                 self.add_event('vehicle',
                               message=f'🚀 {vehicle_display} zerstört',
                               message_key='events.vehicle_destroyed',
@@ -751,25 +786,29 @@ class LogParser:
             event['params'] = params
 
         self.events.append(event)
+        EVENTS.inc(version=self.version, type=event_type)
 
-        self.socketio.emit('new_event', {
-            'version': self.version,
-            'event': event
-        })
+        with span('socketio.emit', event='new_event'):
+            self.socketio.emit('new_event', {
+                'version': self.version,
+                'event': event
+            })
     
     def get_recent_events(self, count: int = 50) -> List[Dict]:
         """Gibt letzte Events zurück"""
         return list(self.events)[-count:]
     
     def _send_stats_update(self):
-        """Sendet Stats-Update"""
-        self.socketio.emit('stats_updated', {
-            'version': self.version,
-            'stats': self.stats.get_all_stats()
-        })
+        """Sendet Stats-Update (stats_delta, nach größeren Änderungen komplettes stats_updated)"""
+        updates = self.stats.pop_updates()
+        for event_name, payload in updates:
+            with span('socketio.emit', event=event_name):
+                self.socketio.emit(event_name, payload)
 
     def _load_position(self):
         """Lädt letzte Position"""
+        persistence.flush(self.position_file)
+
         if not os.path.exists(self.position_file):
             return
 
@@ -797,15 +836,28 @@ class LogParser:
             print(f"[{self.version}] Fehler beim Laden der Position: {e}")
 
     def _save_position(self):
-        """Speichert aktuelle Position (ohne log_path - wird in config gespeichert)"""
+        """
+        Schreibt die Position sofort (nach jedem Batch, nicht gebündelt)
+
+        Stats und Spieler-DB stehen zu diesem Zeitpunkt bereits im WAL - eine nachlaufende
+        Position würde nach einem Absturz dieselben Zeilen erneut einlesen und doppelt zählen.
+        Die WALs werden vorher synchronisiert, damit die Position sie nie überholt.
+        """
+        STORE_SAVE_REQUESTS.inc(store='position')
+        persistence.sync_wals()
+        self._write_position()
+
+    @traced('position.save')
+    @timed(STORE_SAVE_SECONDS, store='position')
+    def _write_position(self):
+        """Schreibt aktuelle Position (ohne log_path - wird in config gespeichert)"""
         try:
             data = {
                 'last_position': self.last_position,
                 'last_updated': datetime.now().isoformat()
             }
 
-            with open(self.position_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            write_text_file(self.position_file, dump_json(data))
 
         except Exception as e:
             print(f"[{self.version}] Fehler beim Speichern der Position: {e}")
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Verse Combat Log - Log Replay
+Spielt ein aufgezeichnetes Game.log in Echtzeit (oder N-fach schneller) in eine Zieldatei ab
+
+Damit lässt sich die Live-Pipeline (monitor_log -> parse_new_lines -> Speicherung -> Socket.IO)
+mit echten Kämpfen unter Last testen:
+
+    1. log_path der gewünschten Version in VCL auf die Zieldatei setzen
+    2. python log_replay.py Game_recorded.log replay/Game.log --speed 10 --truncate
+    3. Ergebnis: Events/s und Latenz bis der Parser die Zeilen verarbeitet hat
+
+Hinweis: Kills/Tode werden nur gezählt, wenn die Spieler-ID in der Config bekannt ist
+(VCL einmal mit dem Original-Log starten oder die Zieldatei per --truncate neu beginnen,
+damit der Parser den Header beim initialen Scan liest).
+"""
+
+import argparse
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+TIMESTAMP_PATTERN = re.compile(r'<(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d+Z)>')
+METRIC_LINE_PATTERN = re.compile(r'^(\w+)(?:\{([^}]*)\})?\s+([0-9.eE+\-]+|\+Inf)$')
+
+
+def parse_timestamp(line: str) -> Optional[float]:
+    """Extrahiert den Log-Timestamp als Unix-Zeit (wie LogParser._extract_timestamp)"""
+    match = TIMESTAMP_PATTERN.match(line)
+    if not match:
+        return None
+    try:
+        return datetime.fromisoformat(match.group(1).replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def load_event_patterns():
+    """Lädt die Parser-Patterns, um relevante Zeilen (Events) zu zählen"""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from log_parser import LogParser
+    names = ('kill', 'vehicle_destroy', 'vehicle_enter', 'vehicle_exit', 'respawn', 'corpse', 'actor_stall')
+    return [LogParser.PATTERNS[name] for name in names]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Einfaches Perzentil (nearest rank)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class MetricsPoller:
+    """
+    Liest vcl_log_lines_read_total/vcl_events_total vom laufenden VCL (/metrics)
+    und berechnet daraus die Verarbeitungs-Latenz der geschriebenen Zeilen
+    """
+
+    def __init__(self, url: str, version: str, interval: float = 0.25):
+        self.url = url
+        self.version = version
+        self.interval = interval
+        self.available = False
+        self.latencies: List[float] = []
+        self.app_events = 0.0
+
+        self._written: List[Tuple[int, float]] = []  # (kumulierte Zeilen, Schreibzeit)
+        self._next_batch = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._base_lines = 0.0
+        self._base_events = 0.0
+
+    def _fetch(self) -> Optional[Tuple[float, float]]:
+        """Gibt (lines_read, events) für die Version zurück"""
+        import requests
+        try:
+            response = requests.get(self.url, timeout=2)
+            if response.status_code != 200:
+                return None
+        except Exception:
+            return None
+
+        lines_read = 0.0
+        events = 0.0
+        version_label = f'version="{self.version}"'
+        for line in response.text.splitlines():
+            match = METRIC_LINE_PATTERN.match(line)
+            if not match or version_label not in (match.group(2) or ''):
+                continue
+            if match.group(1) == 'vcl_log_lines_read_total':
+                lines_read = float(match.group(3))
+            elif match.group(1) == 'vcl_events_total':
+                events += float(match.group(3))
+        return lines_read, events
+
+    def start(self) -> bool:
+        """Startet das Polling (False wenn VCL nicht erreichbar)"""
+        initial = self._fetch()
+        if initial is None:
+            return False
+        self._base_lines, self._base_events = initial
+        self.available = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return True
+
+    def record_write(self, total_lines: int, write_time: float):
+        """Merkt sich wann wie viele Zeilen insgesamt geschrieben waren"""
+        with self._lock:
+            self._written.append((total_lines, write_time))
+
+    def _poll_once(self):
+        result = self._fetch()
+        if result is None:
+            return
+        now = time.perf_counter()
+        processed = result[0] - self._base_lines
+        self.app_events = result[1] - self._base_events
+
+        with self._lock:
+            while self._next_batch < len(self._written) and self._written[self._next_batch][0] <= processed:
+                self.latencies.append(now - self._written[self._next_batch][1])
+                self._next_batch += 1
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._written) - self._next_batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._poll_once()
+            self._stop.wait(self.interval)
+
+    def stop(self, drain_timeout: float = 60.0):
+        """Wartet bis alle Zeilen verarbeitet wurden (max. drain_timeout) und stoppt"""
+        deadline = time.perf_counter() + drain_timeout
+        while self.pending() and time.perf_counter() < deadline:
+            time.sleep(self.interval)
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        self._poll_once()
+
+
+def replay(source: str, target: str, speed: Optional[float], truncate: bool = False,
+           max_gap: Optional[float] = None, poller: Optional[MetricsPoller] = None,
+           report_interval: float = 5.0) -> dict:
+    """
+    Spielt source in target ab
+
+    Args:
+        source: Aufgezeichnetes Game.log
+        target: Zieldatei (log_path in VCL)
+        speed: Faktor relativ zur Log-Zeit (1 = Echtzeit), None = so schnell wie möglich
+        truncate: Zieldatei vorher leeren
+        max_gap: Maximale Pause in Log-Sekunden (lange Leerlaufphasen abkürzen)
+        poller: Optionaler MetricsPoller für Latenz-Messung
+        report_interval: Sekunden zwischen Fortschrittsmeldungen
+
+    Returns:
+        Dict mit Kennzahlen
+    """
+    patterns = load_event_patterns()
+
+    os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+    mode = 'w' if truncate else 'a'
+
+    lines_written = 0
+    events_written = 0
+    bytes_written = 0
+    first_ts = None
+    last_ts = None
+    log_offset = 0.0  # Durch max_gap eingesparte Log-Zeit
+    wall_start = time.perf_counter()
+    next_report = wall_start + report_interval
+    batch: List[str] = []
+
+    def flush(out):
+        nonlocal lines_written, bytes_written, batch
+        if not batch:
+            return
+        chunk = ''.join(batch)
+        out.write(chunk)
+        out.flush()
+        lines_written += len(batch)
+        bytes_written += len(chunk.encode('utf-8'))
+        batch = []
+        if poller:
+            poller.record_write(lines_written, time.perf_counter())
+
+    with open(source, 'r', encoding='utf-8', errors='ignore') as src, \
+            open(target, mode, encoding='utf-8', newline='') as out:
+        for line in src:
+            ts = parse_timestamp(line)
+
+            if ts is not None and first_ts is None:
+                first_ts = ts
+
+            if ts is not None and speed is not None:
+                if max_gap is not None and last_ts is not None and ts - last_ts > max_gap:
+                    log_offset += (ts - last_ts) - max_gap
+
+                due = wall_start + (ts - first_ts - log_offset) / speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    # Alles bis jetzt Fällige schreiben, dann warten
+                    flush(out)
+                    time.sleep(delay)
+
+            if ts is not None:
+                last_ts = ts
+
+            batch.append(line)
+            if any(pattern.search(line) for pattern in patterns):
+                events_written += 1
+
+            # Bei max Speed in Blöcken schreiben
+            if len(batch) >= 1000:
+                flush(out)
+
+            now = time.perf_counter()
+            if now >= next_report:
+                elapsed = now - wall_start
+                print(f"  {elapsed:7.1f}s  {lines_written:>9} Zeilen  {events_written:>7} Events  "
+                      f"({events_written / elapsed:.1f} Events/s)")
+                next_report = now + report_interval
+
+        flush(out)
+
+    wall_duration = time.perf_counter() - wall_start
+    log_duration = (last_ts - first_ts) if first_ts is not None and last_ts is not None else 0.0
+
+    return {
+        'lines': lines_written,
+        'events': events_written,
+        'bytes': bytes_written,
+        'wall_seconds': wall_duration,
+        'log_seconds': log_duration,
+        'effective_speed': (log_duration / wall_duration) if wall_duration > 0 else 0.0,
+        'events_per_second': (events_written / wall_duration) if wall_duration > 0 else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Spielt ein Game.log in Echtzeit oder beschleunigt ab')
+    parser.add_argument('source', help='Aufgezeichnetes Game.log')
+    parser.add_argument('target', help='Zieldatei (in VCL als Log-Pfad eintragen)')
+    parser.add_argument('--speed', default='1',
+                        help="Abspielgeschwindigkeit relativ zur Log-Zeit (1, 10, 100, ... oder 'max')")
+    parser.add_argument('--truncate', action='store_true', help='Zieldatei vor dem Abspielen leeren')
+    parser.add_argument('--max-gap', type=float, default=None,
+                        help='Leerlaufphasen im Log auf max. N Sekunden kürzen')
+    parser.add_argument('--metrics-url', default='http://127.0.0.1:5000/metrics',
+                        help='VCL /metrics Endpoint für die Latenz-Messung')
+    parser.add_argument('--version', default='LIVE', help='VCL Version, die die Zieldatei überwacht')
+    parser.add_argument('--no-metrics', action='store_true', help='Keine Latenz-Messung')
+    parser.add_argument('--drain-timeout', type=float, default=60.0,
+                        help='Max. Sekunden, die am Ende auf die Verarbeitung gewartet wird')
+    args = parser.parse_args()
+
+    speed = None if args.speed.lower() == 'max' else float(args.speed)
+    if speed is not None and speed <= 0:
+        parser.error('--speed muss > 0 sein')
+
+    poller = None
+    if not args.no_metrics:
+        poller = MetricsPoller(args.metrics_url, args.version)
+        if poller.start():
+            print(f"📈 Latenz-Messung über {args.metrics_url} ({args.version})")
+        else:
+            print(f"⚠️  {args.metrics_url} nicht erreichbar - nur Schreib-Durchsatz wird gemessen")
+            poller = None
+
+    print(f"▶️  Replay {args.source} -> {args.target} (Speed: {'max' if speed is None else f'{speed:g}x'})")
+    result = replay(args.source, args.target, speed, truncate=args.truncate,
+                    max_gap=args.max_gap, poller=poller)
+
+    if poller:
+        print("⏳ Warte auf Verarbeitung der letzten Zeilen...")
+        poller.stop(args.drain_timeout)
+
+    print("\n=== Ergebnis ===")
+    print(f"  Zeilen:        {result['lines']} ({result['bytes'] / 1024 / 1024:.1f} MB)")
+    print(f"  Events:        {result['events']}")
+    print(f"  Dauer:         {result['wall_seconds']:.1f}s (Log-Zeit {result['log_seconds']:.1f}s, "
+          f"effektiv {result['effective_speed']:.1f}x)")
+    print(f"  Durchsatz:     {result['events_per_second']:.1f} Events/s geschrieben")
+
+    if poller:
+        latencies = poller.latencies
+        if latencies:
+            print(f"  Verarbeitet:   {poller.app_events:.0f} Timeline-Events im VCL")
+            print(f"  Latenz p50:    {percentile(latencies, 50) * 1000:.0f} ms")
+            print(f"  Latenz p95:    {percentile(latencies, 95) * 1000:.0f} ms")
+            print(f"  Latenz max:    {max(latencies) * 1000:.0f} ms")
+        if poller.pending():
+            print(f"  ⚠️  {poller.pending()} Schreibblöcke wurden nicht rechtzeitig verarbeitet")
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\nAbgebrochen")
@@ -0,0 +1,209 @@
+"""
+Verse Combat Log - Memory Monitor
+Opt-in tracemalloc Snapshots + Größenbericht der wachsenden Strukturen
+"""
+
+import sys
+import threading
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+def deep_sizeof(obj, max_objects: int = 1_000_000) -> int:
+    """
+    Schätzt den Speicherverbrauch eines Objekts inkl. enthaltener Objekte
+
+    Args:
+        obj: Zu messendes Objekt (dict/list/set/tuple/deque werden rekursiv verfolgt)
+        max_objects: Abbruchgrenze für sehr große Strukturen
+
+    Returns:
+        Größe in Bytes (Näherung, geteilte Objekte werden einmal gezählt)
+    """
+    seen = set()
+    stack = [obj]
+    total = 0
+
+    while stack and len(seen) < max_objects:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)) or type(current).__name__ == 'deque':
+            stack.extend(current)
+
+    return total
+
+
+class MemoryMonitor:
+    """Verwaltet tracemalloc-Snapshots und vergleicht sie"""
+
+    TOP_N = 25
+    FRAMES = 5
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._baseline_time: Optional[str] = None
+        self._previous_time: Optional[str] = None
+
+    @property
+    def enabled(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self):
+        """Startet tracemalloc (kostet spürbar CPU/RAM - nur zur Diagnose)"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.FRAMES)
+            print("🧠 tracemalloc aktiviert")
+        with self._lock:
+            self._baseline = None
+            self._previous = None
+
+    def stop(self):
+        """Stoppt tracemalloc und verwirft Snapshots"""
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            print("🧠 tracemalloc deaktiviert")
+        with self._lock:
+            self._baseline = None
+            self._previous = None
+
+    def _take_filtered_snapshot(self) -> tracemalloc.Snapshot:
+        """Nimmt Snapshot ohne tracemalloc-/Import-Eigenverbrauch"""
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+            tracemalloc.Filter(False, '<unknown>'),
+        ))
+
+    @staticmethod
+    def _format_diff(stats: List[tracemalloc.StatisticDiff], limit: int) -> List[Dict]:
+        """Formatiert Statistik-Diffs für JSON"""
+        result = []
+        for stat in stats[:limit]:
+            frame = stat.traceback[0]
+            result.append({
+                'location': f"{frame.filename}:{frame.lineno}",
+                'size_kb': round(stat.size / 1024, 1),
+                'size_diff_kb': round(stat.size_diff / 1024, 1),
+                'count': stat.count,
+                'count_diff': stat.count_diff
+            })
+        return result
+
+    def take_snapshot(self, limit: int = TOP_N) -> Dict:
+        """
+        Nimmt einen Snapshot und vergleicht ihn mit dem vorherigen und dem ersten
+
+        Args:
+            limit: Anzahl der Top-Allokationsstellen
+
+        Returns:
+            Dict mit Wachstum seit letztem Snapshot und seit Baseline
+        """
+        if not tracemalloc.is_tracing():
+            return {'enabled': False, 'error': 'tracemalloc not enabled'}
+
+        snapshot = self._take_filtered_snapshot()
+        now = datetime.now().isoformat()
+        current, peak = tracemalloc.get_traced_memory()
+
+        with self._lock:
+            previous, previous_time = self._previous, self._previous_time
+            baseline, baseline_time = self._baseline, self._baseline_time
+
+            if baseline is None:
+                self._baseline, self._baseline_time = snapshot, now
+            self._previous, self._previous_time = snapshot, now
+
+        result = {
+            'enabled': True,
+            'timestamp': now,
+            'traced_current_kb': round(current / 1024, 1),
+            'traced_peak_kb': round(peak / 1024, 1),
+            'top_allocations': [
+                {
+                    'location': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    'size_kb': round(stat.size / 1024, 1),
+                    'count': stat.count
+                }
+                for stat in snapshot.statistics('lineno')[:limit]
+            ]
+        }
+
+        if previous is not None:
+            result['since_previous'] = {
+                'from': previous_time,
+                'top_growth': self._format_diff(snapshot.compare_to(previous, 'lineno'), limit)
+            }
+        if baseline is not None and baseline is not previous:
+            result['since_baseline'] = {
+                'from': baseline_time,
+                'top_growth': self._format_diff(snapshot.compare_to(baseline, 'lineno'), limit)
+            }
+
+        return result
+
+    def get_structure_sizes(self, log_parsers: Dict) -> Dict:
+        """
+        Misst die langlebigen Strukturen pro Version
+
+        Die Parser-Threads ändern die Strukturen während der Messung - Stats und Spieler-DB
+        werden unter ihrem Lock gemessen, die Strukturen des Parsers als flache Kopie
+        (dict()/list() sind unter dem GIL atomar).
+
+        Args:
+            log_parsers: version -> LogParser
+
+        Returns:
+            Dict mit Einträgen und geschätzter Größe (KB) pro Struktur
+        """
+        def entry(obj, count: int) -> Dict:
+            return {'entries': count, 'size_kb': round(deep_sizeof(obj) / 1024, 1)}
+
+        sizes = {}
+        for version, parser in log_parsers.items():
+            events = list(parser.events)
+            last_respawn_times = dict(parser.last_respawn_times)
+            owned_vehicles = dict(parser.owned_vehicles)
+            sizes[version] = {
+                'events': entry(events, len(events)),
+                'last_respawn_times': entry(last_respawn_times, len(last_respawn_times)),
+                'owned_vehicles': entry(owned_vehicles, len(owned_vehicles))
+            }
+
+            stats = parser.stats
+            with stats._lock:
+                for section in ('session', 'total'):
+                    victims = getattr(stats, section)['pvp_victims']
+                    sizes[version][f'pvp_victims_{section}'] = entry(
+                        victims, sum(sum(w.values()) for w in victims.values()))
+
+            player_db = parser.player_db
+            with player_db._lock:
+                sizes[version]['players'] = entry(player_db.players, len(player_db.players))
+        return sizes
+
+    def get_status(self) -> Dict:
+        """Gibt tracemalloc-Status zurück"""
+        status = {'enabled': tracemalloc.is_tracing()}
+        if status['enabled']:
+            current, peak = tracemalloc.get_traced_memory()
+            status['traced_current_kb'] = round(current / 1024, 1)
+            status['traced_peak_kb'] = round(peak / 1024, 1)
+            status['baseline'] = self._baseline_time
+            status['previous'] = self._previous_time
+        return status
+
+
+# Prozessweite Instanz
+memory_monitor = MemoryMonitor()
@@ -0,0 +1,231 @@
+"""
+Verse Combat Log - Metrics
+Prozessweite Zähler/Histogramme im Prometheus Text-Format (/metrics)
+"""
+
+import bisect
+import functools
+import json
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+def _escape_label(value) -> str:
+    """Escaped Label-Werte nach Prometheus-Spezifikation"""
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labelnames: Tuple[str, ...], key: Tuple, extra: Optional[Tuple[str, str]] = None) -> str:
+    """Baut '{a="x",b="y"}' aus Labelnamen und Werten"""
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(labelnames, key)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Counter:
+    """Monoton steigender Zähler mit optionalen Labels"""
+
+    type_name = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        """Erhöht den Zähler"""
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        """Gibt aktuellen Wert zurück"""
+        key = tuple(labels[name] for name in self.labelnames)
+        return self._values.get(key, 0)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in items]
+
+
+class Histogram:
+    """Histogramm mit festen Buckets (kumulativ beim Export)"""
+
+    type_name = 'histogram'
+
+    DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # key -> [bucket_counts..., sum, count]
+        self._values: Dict[Tuple, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        """Registriert einen Messwert"""
+        key = tuple(labels[name] for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                data[index] += 1
+            data[-2] += value
+            data[-1] += 1
+
+    def get_count(self, **labels) -> int:
+        key = tuple(labels[name] for name in self.labelnames)
+        data = self._values.get(key)
+        return data[-1] if data else 0
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(data)) for key, data in self._values.items())
+
+        lines = []
+        for key, data in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, data):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', _format_value(float(bound))))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', '+Inf'))} {data[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(float(data[-2]))}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {data[-1]}")
+        return lines
+
+
+class CounterFunction:
+    """Zähler, dessen Werte erst beim Export abgefragt werden (kein Overhead im Hot Path)"""
+
+    type_name = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...], func):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._func = func  # () -> {Label-Werte: Wert}
+
+    def collect(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in sorted(self._func().items())]
+
+
+class Registry:
+    """Sammlung aller Metriken"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Rendert alle Metriken im Prometheus Text-Format 0.0.4"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.collect())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+# Log-Parser
+LOG_LINES_READ = registry.register(Counter(
+    'vcl_log_lines_read_total', 'Gelesene Log-Zeilen', ('version',)))
+LOG_BYTES_READ = registry.register(Counter(
+    'vcl_log_bytes_read_total', 'Gelesene Log-Bytes', ('version',)))
+LOG_DISPATCH_SECONDS = registry.register(Histogram(
+    'vcl_log_dispatch_seconds', 'Dauer der Regex-Auswertung pro gelesenem Block', ('version',)))
+EVENTS = registry.register(Counter(
+    'vcl_events_total', 'Timeline-Events nach Typ', ('version', 'type')))
+
+# Speicherung
+STORE_SAVE_SECONDS = registry.register(Histogram(
+    'vcl_store_save_seconds', 'Dauer eines Schreibvorgangs pro Datenspeicher', ('store',)))
+STORE_SAVE_REQUESTS = registry.register(Counter(
+    'vcl_store_save_requests_total', 'Änderungen (save()-Aufrufe) pro Datenspeicher', ('store',)))
+
+# Socket.IO
+SOCKETIO_EMITS = registry.register(Counter(
+    'vcl_socketio_emits_total', 'Gesendete Socket.IO Events', ('event',)))
+SOCKETIO_PAYLOAD_BYTES = registry.register(Counter(
+    'vcl_socketio_payload_bytes_total', 'Serialisierte Socket.IO Payload-Bytes', ('event',)))
+
+# Anzeigenamen (Waffen/Fahrzeuge)
+def _display_name_cache_counts() -> Dict[Tuple, float]:
+    from display_names import cache_counts
+    return cache_counts()
+
+
+DISPLAY_NAME_CACHE = registry.register(CounterFunction(
+    'vcl_display_name_cache_total', 'Zugriffe auf den Anzeigenamen-Cache', ('kind', 'result'),
+    _display_name_cache_counts))
+
+# RSI Profile
+RSI_FETCHES = registry.register(Counter(
+    'vcl_rsi_fetches_total', 'Abrufe von RSI Spielerprofilen', ('kind', 'result')))
+RSI_FETCH_SECONDS = registry.register(Histogram(
+    'vcl_rsi_fetch_seconds', 'Latenz der RSI Profilabrufe', ('kind',)))
+
+
+def timed(histogram: Histogram, **labels):
+    """
+    Decorator: Misst die Laufzeit jedes Aufrufs im Histogramm
+
+    Args:
+        histogram: Ziel-Histogramm
+        **labels: Feste Label-Werte (z.B. store='stats')
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, **labels)
+        return wrapper
+    return decorator
+
+
+class SocketIOJSON:
+    """
+    JSON-Modul für Flask-SocketIO, das Emits und Payload-Bytes mitzählt
+
+    Socket.IO serialisiert jedes Event genau einmal als [event_name, payload] -
+    die Zählung kostet daher keine zusätzliche Serialisierung.
+    """
+
+    @staticmethod
+    def dumps(obj, *args, **kwargs):
+        encoded = json.dumps(obj, *args, **kwargs)
+        if isinstance(obj, list) and obj and isinstance(obj[0], str):
+            event = obj[0]
+            SOCKETIO_EMITS.inc(event=event)
+            SOCKETIO_PAYLOAD_BYTES.inc(len(encoded), event=event)
+        return encoded
+
+    @staticmethod
+    def loads(*args, **kwargs):
+        return json.loads(*args, **kwargs)
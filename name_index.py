@@ -0,0 +1,74 @@
+"""
+Verse Combat Log - Name Index
+Trigramm-Index über Spielernamen für schnelle Teilstring-Suche (NPC-Neubewertung)
+
+Ein neues NPC-Pattern trifft nur Namen, die alle Trigramme des Patterns enthalten - statt
+jeden gespeicherten Namen zu prüfen, werden nur diese Kandidaten mit dem Pattern verglichen.
+"""
+
+from typing import Dict, Iterable, Set
+
+# Länge der Index-Schlüssel (kürzere Patterns werden über alle Namen gesucht)
+GRAM = 3
+
+
+def _grams(text: str) -> Set[str]:
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+class NameIndex:
+    """Menge von Namen mit Trigramm-Index (nicht thread-safe - Aufrufer hält den Lock des Stores)"""
+
+    def __init__(self, names: Iterable[str] = ()):
+        self._names: Set[str] = set()
+        self._grams: Dict[str, Set[str]] = {}  # Trigramm -> Namen
+        for name in names:
+            self.add(name)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._names
+
+    def add(self, name: str):
+        if not name or name in self._names:
+            return
+        self._names.add(name)
+        for gram in _grams(name):
+            self._grams.setdefault(gram, set()).add(name)
+
+    def discard(self, name: str):
+        if name not in self._names:
+            return
+        self._names.discard(name)
+        for gram in _grams(name):
+            names = self._grams.get(gram)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self._grams[gram]
+
+    def all(self) -> Set[str]:
+        """Alle indizierten Namen (Kopie)"""
+        return set(self._names)
+
+    def search(self, pattern: str) -> Set[str]:
+        """
+        Gibt alle Namen zurück, die pattern enthalten
+
+        Args:
+            pattern: Teilstring (z.B. NPC-Pattern)
+        """
+        if len(pattern) < GRAM:
+            return {name for name in self._names if pattern in name}
+
+        # Kleinste Trigramm-Menge zuerst - Schnittmenge schrumpft am schnellsten
+        candidates = None
+        for names in sorted((self._grams.get(gram, set()) for gram in _grams(pattern)), key=len):
+            candidates = set(names) if candidates is None else candidates & names
+            if not candidates:
+                return set()
+
+        # Trigramme können in falscher Reihenfolge vorkommen - exakt nachprüfen
+        return {name for name in candidates if pattern in name}
@@ -5,7 +5,41 @@ Implementiert als Singleton für Performance
 """
 
 import os
-from typing import Dict, Optional
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Numerische Entity-IDs am Namensende (z.B. _7093438445660)
+NUMERIC_SUFFIX = re.compile(r'_\d{10,}$')
+
+
+class TokenTrie:
+    """
+    Trie über '_'-getrennte Namens-Tokens
+
+    Ein Durchlauf über die Tokens eines Namens findet den längsten gespeicherten Präfix
+    (z.B. 'ANVL_Hornet_F7C' für 'ANVL_Hornet_F7C_PU_AI_CRIM').
+    """
+
+    def __init__(self):
+        self.root: Dict = {}  # Token -> Kindknoten, None -> gespeicherter Wert
+
+    def insert(self, tokens: List[str], value):
+        node = self.root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node[None] = value
+
+    def longest_match(self, tokens: Iterable[str]) -> Tuple[int, object]:
+        """Gibt (Anzahl Tokens, Wert) des längsten gespeicherten Präfixes zurück ((0, None) = keiner)"""
+        best = (0, None)
+        node = self.root
+        for depth, token in enumerate(tokens, 1):
+            node = node.get(token)
+            if node is None:
+                break
+            if None in node:
+                best = (depth, node[None])
+        return best
 
 
 class NamesParser:
@@ -13,6 +47,8 @@ class NamesParser:
 
     _instance = None
     _initialized = False
+    # Erhöht bei jedem Neuladen der INI (Caches, die daraus abgeleitet sind, bauen neu)
+    revision = 0
 
     def __new__(cls, ini_file: str = "internalNames.ini"):
         """Singleton: Gibt immer dieselbe Instanz zurück"""
@@ -48,10 +84,20 @@ class NamesParser:
             print(f"ℹ️  Verwende App-INI: {app_ini}")
 
         self.names: Dict[str, str] = {}  # Aus INI
+        self.vehicle_trie = TokenTrie()  # Fahrzeug-Keys nach Tokens (Basisnamen-Suche)
         self.load()
 
         NamesParser._initialized = True
     
+    def reload(self):
+        """Lädt die INI-Datei neu (nach einem Update) und verwirft gecachte Anzeigenamen"""
+        from display_names import clear_all
+
+        NamesParser._initialized = False
+        self.__init__()
+        NamesParser.revision += 1
+        clear_all()
+
     def load(self):
         """Lädt die INI-Datei"""
         if not os.path.exists(self.ini_file):
@@ -65,7 +111,11 @@ class NamesParser:
                     if '=' in line and not line.startswith('#'):
                         key, value = line.split('=', 1)
                         self.names[key.strip()] = value.strip()
-            
+
+            for key, value in self.names.items():
+                if key.startswith('vehicle_Name') and value:
+                    self.vehicle_trie.insert(key[len('vehicle_Name'):].split('_'), value)
+
             print(f"✅ {len(self.names)} Namen aus {self.ini_file} geladen")
         
         except Exception as e:
@@ -107,10 +157,21 @@ class NamesParser:
         key = f"vehicle_Name{internal_name}"
         return self.names.get(key)
     
+    def match_vehicle_base(self, tokens: List[str]) -> Tuple[int, Optional[str]]:
+        """
+        Sucht den längsten Fahrzeug-Key, der Token-Präfix eines Namens ist (ein Durchlauf)
+
+        Args:
+            tokens: Name an '_' getrennt (z.B. ['DRAK', 'Cutlass', 'Black', 'PU', 'AI'])
+
+        Returns:
+            (Anzahl Tokens, Display-Name), z.B. (3, 'Drake Cutlass Black') - (0, None) ohne Treffer
+        """
+        return self.vehicle_trie.longest_match(tokens)
+
     def _remove_numeric_suffix(self, name: str) -> str:
         """Entfernt numerische Suffixe wie _7093438445660"""
-        import re
-        return re.sub(r'_\d{10,}$', '', name)
+        return NUMERIC_SUFFIX.sub('', name)
     
     def get_all_weapon_names(self) -> Dict[str, str]:
         """Gibt alle Waffen-Namen aus der INI zurück"""
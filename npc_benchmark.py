@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Verse Combat Log - NPC Benchmark
+Misst die NPC-Erkennung (is_npc) bei vielen Namen und vielen Patterns
+
+Vergleicht die einfache Suche (jedes Pattern einzeln) mit dem kompilierten Ausdruck,
+jeweils ohne und mit Urteils-Cache (die Cache-Zeilen laufen über höchstens VERDICT_CACHE_SIZE
+Namen - bei mehr verdrängen die Durchläufe jeden Eintrag, bevor er erneut getroffen wird):
+
+    python npc_benchmark.py --names 10000 --patterns 500
+
+Arbeitet mit einer eigenen NPC-Datenbank (npc_db_benchmark.json) - echte Patterns bleiben unberührt.
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from persistence import persistence
+from npc_database import NPCDatabase, compile_patterns, VERDICT_CACHE_SIZE
+
+BENCHMARK_DB = 'npc_db_benchmark.json'
+NAME_CHARS = string.ascii_letters + string.digits + '_-'
+
+
+def random_text(rng: random.Random, min_length: int, max_length: int) -> str:
+    return ''.join(rng.choice(NAME_CHARS) for _ in range(rng.randint(min_length, max_length)))
+
+
+def timed_run(check, names) -> tuple:
+    """Prüft alle Namen, gibt (µs pro Name, Anzahl NPCs) zurück"""
+    start = time.perf_counter()
+    npcs = sum(1 for name in names if check(name))
+    return (time.perf_counter() - start) / len(names) * 1_000_000, npcs
+
+
+def cleanup(npc_db: NPCDatabase):
+    """Entfernt die Benchmark-Datei"""
+    persistence.flush(npc_db.db_file)
+    for path in (npc_db.db_file, f"{npc_db.db_file}.tmp"):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark für die NPC-Erkennung')
+    parser.add_argument('--names', type=int, default=10000, help='Anzahl verschiedener Namen')
+    parser.add_argument('--patterns', type=int, default=500, help='Anzahl Patterns')
+    parser.add_argument('--npc-share', type=float, default=0.3, help='Anteil der Namen mit Pattern')
+    parser.add_argument('--repeats', type=int, default=5, help='Durchläufe über alle Namen (Cache-Treffer ab dem 2.)')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    patterns = [random_text(rng, 4, 14) for _ in range(args.patterns)]
+    names = []
+    for _ in range(args.names):
+        name = random_text(rng, 8, 40)
+        if rng.random() < args.npc_share:
+            position = rng.randint(0, len(name))
+            name = name[:position] + rng.choice(patterns) + name[position:]
+        names.append(name)
+
+    npc_db = NPCDatabase(BENCHMARK_DB)
+    try:
+        start = time.perf_counter()
+        npc_db.patterns = patterns
+        npc_db._rebuild_matcher()
+        build_ms = (time.perf_counter() - start) * 1000
+
+        naive_us, naive_npcs = timed_run(lambda name: any(pattern in name for pattern in patterns), names)
+        matcher = compile_patterns(patterns)
+        compiled_us, compiled_npcs = timed_run(lambda name: matcher.search(name) is not None, names)
+
+        # is_npc mit Cache: erster Durchlauf füllt, weitere treffen - nur so viele Namen wie der
+        # Cache fasst, sonst verdrängt jeder Durchlauf die Einträge des vorherigen
+        cache_names = names[:VERDICT_CACHE_SIZE]
+        cached = [timed_run(npc_db.is_npc, cache_names) for _ in range(args.repeats)]
+        cold_us, cached_npcs = cached[0]
+        warm_us = min(us for us, _ in cached[1:]) if len(cached) > 1 else cold_us
+
+        expected_cached = sum(1 for name in cache_names if matcher.search(name) is not None)
+        if not naive_npcs == compiled_npcs or cached_npcs != expected_cached:
+            print(f"⚠️  Ergebnisse weichen ab: {naive_npcs} / {compiled_npcs} / {cached_npcs} (von {expected_cached})")
+
+        print(f"\n=== {args.names} Namen, {args.patterns} Patterns, {naive_npcs} NPCs ===")
+        print(f"  Ausdruck kompilieren:    {build_ms:.1f} ms\n")
+        print(f"  {'Einzeln (alt)':28}{naive_us:>10.2f} µs/Name")
+        print(f"  {'Kompiliert':28}{compiled_us:>10.2f} µs/Name")
+        print(f"  {'is_npc (Cache leer)':28}{cold_us:>10.2f} µs/Name")
+        print(f"  {'is_npc (Cache gefüllt)':28}{warm_us:>10.2f} µs/Name  ({len(cache_names)} Namen)")
+    finally:
+        cleanup(npc_db)
+
+
+if __name__ == '__main__':
+    main()
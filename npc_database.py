@@ -2,10 +2,51 @@
 Verse Combat Log - NPC Database
 """
 
+import functools
 import json
 import os
-from typing import List
+import re
+import threading
+from typing import Callable, Dict, List, Optional
 from utils import get_data_file_path
+from tracing import traced
+from metrics import STORE_SAVE_SECONDS, timed
+from persistence import persistence, synchronized, dump_json, write_text_file, file_mtime
+from sqlite_store import get_database
+
+
+# Maximale Anzahl gecachter Namen -> NPC-Urteile (Namen wiederholen sich in Kämpfen ständig)
+VERDICT_CACHE_SIZE = 4096
+
+
+def compile_patterns(patterns: List[str]) -> Optional[re.Pattern]:
+    """
+    Kompiliert alle Patterns zu einem einzigen regulären Ausdruck
+
+    Die Patterns werden als Präfixbaum verschachtelt (z.B. PU_Human(?:_Enemy|-NineTails)) -
+    pro Zeichen des Namens wird nur ein Zweig verfolgt, unabhängig von der Anzahl der Patterns.
+
+    Returns:
+        Kompilierter Ausdruck (search() findet jedes enthaltene Pattern) oder None ohne Patterns
+    """
+    if not patterns:
+        return None
+
+    trie: Dict[str, Dict] = {}
+    for pattern in patterns:
+        node = trie
+        for char in pattern:
+            node = node.setdefault(char, {})
+        node[''] = {}  # Ende eines Patterns
+
+    def build(node: Dict) -> str:
+        # Ein kürzeres Pattern reicht für den Treffer - längere Fortsetzungen sind egal
+        if '' in node:
+            return ''
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items())]
+        return branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+
+    return re.compile(build(trie))
 
 
 class NPCDatabase:
@@ -14,11 +55,28 @@ class NPCDatabase:
     def __init__(self, db_file: str = "npc_db.json"):
         self.db_file = get_data_file_path(db_file)
         self.patterns: List[str] = []
+        # Name -> bool, wird bei jeder Pattern-Änderung neu gebaut (siehe _rebuild_matcher)
+        self._verdict: Callable[[str], bool] = lambda name: False
+        # Optionales SQLite-Backend (None = JSON-Datei)
+        self._db = get_database()
+        # Kataloge werden von Parsern, Managern und Routen gemeinsam genutzt (siehe catalogs.py)
+        self._lock = threading.RLock()
+        self._mtime = None  # Änderungszeit der Datei beim letzten Laden/Schreiben
         self.load()
     
+    @synchronized
     def load(self):
         """Lädt Datenbank"""
-        if os.path.exists(self.db_file):
+        # Ausstehende Änderungen einer anderen Instanz zuerst schreiben
+        persistence.flush(self.db_file)
+        self._mtime = file_mtime(self.db_file)
+
+        if self._db is not None:
+            try:
+                self.patterns = list(self._db.load_catalog('npc_patterns'))
+            except Exception as e:
+                print(f"Fehler beim Laden der NPC-DB: {e}")
+        elif os.path.exists(self.db_file):
             try:
                 with open(self.db_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
@@ -60,33 +118,68 @@ class NPCDatabase:
                 "NPC_Archetypes_"
             ]
             self.save()
+
+        self._rebuild_matcher()
+
+    def _rebuild_matcher(self):
+        """Kompiliert die Patterns neu und verwirft alle gecachten Urteile"""
+        matcher = compile_patterns(self.patterns)
+
+        @functools.lru_cache(maxsize=VERDICT_CACHE_SIZE)
+        def verdict(name: str) -> bool:
+            return matcher is not None and matcher.search(name) is not None
+
+        # Eine Referenzzuweisung - laufende Prüfungen nutzen noch den alten Stand
+        self._verdict = verdict
     
+    def refresh(self):
+        """Lädt neu, falls die Datei außerhalb dieser Instanz geändert wurde (nur JSON-Backend)"""
+        if self._db is not None or file_mtime(self.db_file) == self._mtime:
+            return
+        with self._lock:
+            if file_mtime(self.db_file) == self._mtime:
+                return
+            self.load()
+
     def save(self):
-        """Speichert Datenbank"""
+        """Markiert Datenbank zum Speichern (geschrieben wird gebündelt, siehe persistence.py)"""
+        persistence.mark_dirty('npcs', self.db_file, self._write)
+
+    @traced('npcs.save')
+    @timed(STORE_SAVE_SECONDS, store='npcs')
+    def _write(self):
+        """Schreibt Datenbank auf die Platte"""
         data = {
-            'patterns': self.patterns
+            'patterns': list(self.patterns)
         }
         
         try:
-            with open(self.db_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            if self._db is not None:
+                self._db.replace_catalogs({'npc_patterns': {pattern: '' for pattern in data['patterns']}})
+                return
+            write_text_file(self.db_file, dump_json(data))
+            self._mtime = file_mtime(self.db_file)
         except Exception as e:
             print(f"Fehler beim Speichern der NPC-DB: {e}")
     
     def is_npc(self, name: str) -> bool:
-        """Prüft ob Name ein NPC ist"""
-        return any(pattern in name for pattern in self.patterns)
+        """Prüft ob Name ein NPC ist (enthält eines der Patterns)"""
+        return self._verdict(name)
     
+    @synchronized
     def add_pattern(self, pattern: str):
         """Fügt Pattern hinzu"""
         if pattern and pattern not in self.patterns:
             self.patterns.append(pattern)
+            self._rebuild_matcher()
             self.save()
     
+    @synchronized
     def remove_pattern(self, pattern: str):
         """Entfernt Pattern"""
         if pattern in self.patterns:
             self.patterns.remove(pattern)
+            self._rebuild_matcher()
             self.save()
     
     def get_patterns(self) -> List[str]:
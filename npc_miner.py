@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Verse Combat Log - NPC Miner
+Schlägt neue NPC-Patterns vor, indem Opfer- und Killer-Namen aus Game.logs ausgewertet werden
+
+Jeder Name wird an '_' und '-' in Tokens zerlegt. Alle zusammenhängenden Token-Folgen
+(n-Gramme, inkl. angrenzender Trenner - z.B. '_NPC_', 'PU_Human-', 'vlk_adult_') werden in
+einem Space-Saving-Sketch gezählt: feste Anzahl Zähler, konstanter Speicher auch bei
+Gigabytes an Logs. Namen, die bereits ein NPC-Pattern enthalten, werden übersprungen.
+
+    python npc_miner.py Game.log logbackups/ --top 20
+
+Ausgabe pro Kandidat: geschätzte Anzahl (± Fehler), Anteil an allen ungeklärten Namen und
+Anteil mit Entity-ID am Ende (NPCs tragen eine, Spieler-Handles nicht).
+"""
+
+import argparse
+import heapq
+import os
+import random
+import re
+import sys
+import time
+from typing import Dict, Iterator, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from log_parser import LogParser
+
+# Entity-ID am Namensende (z.B. PU_Human_Enemy_GroundCombat_NPC_Faction_2000212786463)
+ENTITY_ID = re.compile(r'[_-]\d{6,}$')
+SEPARATORS = re.compile(r'([_-])')
+
+# Kandidaten kürzer als das sind zu unspezifisch (z.B. '_A_')
+MIN_PATTERN_LENGTH = 4
+# Beispielnamen pro Zähler (Stichprobe - prüft, ob ein Kandidat von einem gewählten abgedeckt ist)
+EXAMPLES = 5
+
+
+class SpaceSaving:
+    """
+    Top-k Zähler mit fester Kapazität (Metwally et al., "Space-Saving")
+
+    Ist der Sketch voll, ersetzt ein neuer Schlüssel den kleinsten Zähler und erbt dessen
+    Stand als Fehlerschranke - häufige Schlüssel werden nie verdrängt.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        # Schlüssel -> [Anzahl, Fehler, mit Entity-ID, Beispielnamen]
+        self.counters: Dict[str, list] = {}
+        self._rng = random.Random(42)
+        # Min-Heap (Anzahl, Schlüssel) - veraltete Einträge werden beim Verdrängen übersprungen
+        self._heap: List[Tuple[int, str]] = []
+
+    def add(self, key: str, with_id: bool, example: str):
+        counter = self.counters.get(key)
+        if counter is None:
+            if len(self.counters) < self.capacity:
+                counter = self.counters[key] = [0, 0, 0, []]
+            else:
+                count = self._evict()
+                counter = self.counters[key] = [count, count, 0, []]
+
+        counter[0] += 1
+        if with_id:
+            counter[2] += 1
+
+        # Reservoir-Stichprobe der Beispielnamen
+        examples = counter[3]
+        if len(examples) < EXAMPLES:
+            examples.append(example)
+        else:
+            slot = self._rng.randrange(counter[0])
+            if slot < EXAMPLES:
+                examples[slot] = example
+        heapq.heappush(self._heap, (counter[0], key))
+
+        # Heap wächst pro Zählung - regelmäßig auf einen Eintrag pro Zähler zurücksetzen
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(counter[0], key) for key, counter in self.counters.items()]
+            heapq.heapify(self._heap)
+
+    def _evict(self) -> int:
+        """Entfernt den kleinsten Zähler, gibt seinen Stand zurück"""
+        while True:
+            count, key = heapq.heappop(self._heap)
+            counter = self.counters.get(key)
+            if counter is not None and counter[0] == count:
+                del self.counters[key]
+                return count
+
+
+def candidate_patterns(name: str, max_tokens: int) -> set:
+    """
+    Gibt alle Token-n-Gramme eines Namens zurück (mit angrenzenden Trennern)
+
+    'PU_Human-NineTails_Pilot' -> 'PU_', 'PU_Human-', '_Human-', '-NineTails_', ...
+    """
+    parts = SEPARATORS.split(name)
+    tokens = parts[0::2]
+    separators = parts[1::2]
+    candidates = set()
+
+    for start in range(len(tokens)):
+        for end in range(start, min(start + max_tokens, len(tokens))):
+            if any(not tokens[i] or tokens[i].isdigit() for i in range(start, end + 1)):
+                break
+            pattern = tokens[start]
+            for i in range(start, end):
+                pattern += separators[i] + tokens[i + 1]
+            # Trenner davor/danach binden das Pattern an Token-Grenzen
+            if start > 0:
+                pattern = separators[start - 1] + pattern
+            if end < len(separators):
+                pattern += separators[end]
+            if len(pattern) >= MIN_PATTERN_LENGTH and pattern != name:
+                candidates.add(pattern)
+
+    return candidates
+
+
+def iter_log_files(paths: List[str]) -> Iterator[str]:
+    """Dateien direkt, Ordner (z.B. logbackups) mit allen enthaltenen .log-Dateien"""
+    for path in paths:
+        if os.path.isdir(path):
+            for entry in sorted(os.listdir(path)):
+                if entry.lower().endswith('.log'):
+                    yield os.path.join(path, entry)
+        else:
+            yield path
+
+
+def iter_names(log_file: str) -> Iterator[str]:
+    """Liest Opfer-, Killer- und Verursacher-Namen zeilenweise (konstanter Speicher)"""
+    kill = LogParser.PATTERNS['kill']
+    vehicle_destroy = LogParser.PATTERNS['vehicle_destroy']
+
+    with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            # Billiger Vorfilter - die Regex läuft nur auf Event-Zeilen
+            if 'CActor::Kill' in line:
+                match = kill.search(line)
+                if match:
+                    yield match.group(1)
+                    yield match.group(3)
+            elif 'OnAdvanceDestroyLevel' in line:
+                match = vehicle_destroy.search(line)
+                if match:
+                    yield match.group(5)
+
+
+def select_patterns(sketch: SpaceSaving, limit: int, min_count: int) -> List[Tuple[str, list]]:
+    """
+    Wählt die häufigsten Kandidaten ohne Redundanz
+
+    Übersprungen wird ein Kandidat, der in einem gewählten enthalten ist, ohne häufiger zu sein
+    (allgemeiner, aber nicht nützlicher), oder dessen Beispielnamen alle schon von gewählten
+    Patterns getroffen werden (überlappende n-Gramme desselben Namensschemas).
+    """
+    # Bei gleicher Anzahl das längere (spezifischere) Pattern zuerst
+    ranked = sorted(sketch.counters.items(), key=lambda item: (-item[1][0], -len(item[0])))
+    selected = []
+    for pattern, counter in ranked:
+        if counter[0] < min_count or len(selected) >= limit:
+            break
+        if any(pattern in chosen and counter[0] <= chosen_counter[0] for chosen, chosen_counter in selected):
+            continue
+        if selected and all(any(chosen in example for chosen, _ in selected) for example in counter[3]):
+            continue
+        selected.append((pattern, counter))
+    return selected
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Schlägt NPC-Patterns aus Game.logs vor')
+    parser.add_argument('logs', nargs='+', help='Game.log-Dateien oder Ordner (z.B. logbackups)')
+    parser.add_argument('--top', type=int, default=20, help='Anzahl vorgeschlagener Patterns')
+    parser.add_argument('--capacity', type=int, default=5000, help='Zähler im Sketch (Speicherbedarf)')
+    parser.add_argument('--max-tokens', type=int, default=3, help='Maximale Tokens pro Pattern')
+    parser.add_argument('--min-count', type=int, default=5, help='Mindestanzahl für einen Vorschlag')
+    parser.add_argument('--include-known', action='store_true',
+                        help='Auch Namen auswerten, die bereits ein NPC-Pattern enthalten')
+    args = parser.parse_args()
+
+    npc_db = None
+    if not args.include_known:
+        from catalogs import get_npc_db
+        npc_db = get_npc_db()
+
+    sketch = SpaceSaving(args.capacity)
+    names_seen = 0
+    names_known = 0
+    start = time.perf_counter()
+    bytes_read = 0
+
+    for log_file in iter_log_files(args.logs):
+        if not os.path.exists(log_file):
+            print(f"⚠️  Datei nicht gefunden: {log_file}")
+            continue
+        bytes_read += os.path.getsize(log_file)
+
+        for name in iter_names(log_file):
+            if npc_db is not None and npc_db.is_npc(name):
+                names_known += 1
+                continue
+            names_seen += 1
+
+            with_id = ENTITY_ID.search(name) is not None
+            base_name = ENTITY_ID.sub('', name)
+            for pattern in candidate_patterns(base_name, args.max_tokens):
+                sketch.add(pattern, with_id, name)
+
+    duration = time.perf_counter() - start
+    print(f"\n=== {bytes_read / 1024 / 1024:.1f} MB in {duration:.1f}s - "
+          f"{names_seen} ungeklärte Namen, {names_known} bereits als NPC erkannt ===\n")
+
+    selected = select_patterns(sketch, args.top, args.min_count)
+    if not selected:
+        print("Keine Kandidaten gefunden.")
+        return
+
+    print(f"  {'Pattern':32}{'Anzahl':>10}{'±':>7}{'Anteil':>9}{'mit ID':>9}  Beispiel")
+    for pattern, (count, error, with_id, examples) in selected:
+        coverage = count / names_seen * 100 if names_seen else 0.0
+        id_share = with_id / count * 100 if count else 0.0
+        print(f"  {pattern:32}{count:>10}{error:>7}{coverage:>8.1f}%{id_share:>8.0f}%  {examples[0]}")
+
+    print("\nPatterns mit hohem ID-Anteil sind mit großer Wahrscheinlichkeit NPCs - "
+          "hinzufügen unter Einstellungen → NPCs.")
+
+
+if __name__ == '__main__':
+    main()
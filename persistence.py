@@ -0,0 +1,294 @@
+"""
+Verse Combat Log - Persistence
+Gemeinsamer Write-Behind-Layer für alle JSON-Dateien
+
+Datenspeicher markieren sich bei Änderungen nur als "dirty". Ein Hintergrund-Thread
+schreibt jede markierte Datei höchstens einmal pro Intervall - und alles beim Beenden.
+
+Dateien werden atomar ersetzt (Temp-Datei + os.replace). Stats und Spieler-DB schreiben
+zusätzlich jede Änderung in ein Write-Ahead-Log (eine Zeile pro Änderung), das beim
+Start auf den letzten Snapshot angewendet wird - große Snapshots bleiben so selten.
+"""
+
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from metrics import STORE_SAVE_REQUESTS
+
+
+def synchronized(method):
+    """Decorator: Führt eine Methode unter self._lock aus (RLock des Datenspeichers)"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def file_mtime(path: str) -> Optional[int]:
+    """Änderungszeit einer Datei in ns (None = Datei fehlt)"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def dump_json(data) -> str:
+    """Serialisiert im bisherigen Dateiformat (eingerückt, UTF-8)"""
+    return json.dumps(data, indent=2, ensure_ascii=False)
+
+
+def write_text_file(path: str, content: str, retries: int = 3):
+    """
+    Schreibt eine Datei atomar neu (Temp-Datei + os.replace)
+
+    Bei einem Absturz bleibt entweder die alte oder die neue Datei vollständig erhalten.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+
+    # Windows: Virenscanner/Indexer halten die Zieldatei manchmal kurz offen
+    for attempt in range(retries):
+        try:
+            os.replace(tmp_path, path)
+            return
+        except PermissionError:
+            if attempt == retries - 1:
+                raise
+            time.sleep(0.05)
+
+
+class WriteAheadLog:
+    """
+    Append-only Log der Änderungen seit dem letzten Snapshot (JSON Lines)
+
+    Jeder Eintrag hat eine fortlaufende Nummer (seq). Der Snapshot speichert die letzte
+    enthaltene Nummer - beim Laden werden nur neuere Einträge angewendet.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.last_seq = 0
+        self._lock = threading.Lock()
+        self._file = None
+        self._unsynced = False
+
+    def read(self, after_seq: int = 0) -> List[Dict]:
+        """Liest alle Einträge mit seq > after_seq"""
+        records = []
+        if not os.path.exists(self.path):
+            return records
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Unvollständige letzte Zeile nach Absturz
+                    print(f"Unvollständiger WAL-Eintrag in {self.path} ignoriert")
+                    continue
+                if record.get('seq', 0) > after_seq:
+                    records.append(record)
+        return records
+
+    def append(self, op: str, *args) -> int:
+        """
+        Hängt eine Änderung an
+
+        Die Zeile landet sofort beim Betriebssystem (übersteht App-Absturz). fsync
+        übernimmt der Flush-Thread gebündelt (Stromausfall: max. ein Intervall).
+
+        Args:
+            op: Name der Operation (Datenspeicher wendet sie per _apply_<op> an)
+            *args: JSON-serialisierbare Argumente
+
+        Returns:
+            seq des Eintrags
+        """
+        with self._lock:
+            self.last_seq += 1
+            record = {'seq': self.last_seq, 'op': op, 'args': list(args)}
+            try:
+                if self._file is None:
+                    self._file = open(self.path, 'a', encoding='utf-8')
+                self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+                self._file.flush()
+                self._unsynced = True
+            except Exception as e:
+                print(f"Fehler beim Schreiben des WAL {self.path}: {e}")
+            return self.last_seq
+
+    def sync(self):
+        """fsync aller angehängten Einträge"""
+        with self._lock:
+            if self._file is not None and self._unsynced:
+                try:
+                    os.fsync(self._file.fileno())
+                except Exception as e:
+                    print(f"Fehler beim Synchronisieren des WAL {self.path}: {e}")
+                self._unsynced = False
+
+    def compact(self, seq: int):
+        """Entfernt alle Einträge bis seq (sind im geschriebenen Snapshot enthalten)"""
+        with self._lock:
+            remaining = self.read(seq) if self.last_seq > seq else []
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                self._unsynced = False
+
+            try:
+                if remaining:
+                    write_text_file(self.path, ''.join(
+                        json.dumps(record, ensure_ascii=False) + '\n' for record in remaining))
+                elif os.path.exists(self.path):
+                    os.remove(self.path)
+            except Exception as e:
+                print(f"Fehler beim Kürzen des WAL {self.path}: {e}")
+
+
+def replay_wal(store, wal: WriteAheadLog, after_seq: int) -> int:
+    """
+    Wendet alle WAL-Einträge nach dem Snapshot auf einen Datenspeicher an
+
+    Args:
+        store: Datenspeicher mit _apply_<op> Methoden
+        wal: Write-Ahead-Log des Datenspeichers
+        after_seq: Letzte im Snapshot enthaltene seq
+
+    Returns:
+        Anzahl angewendeter Einträge
+    """
+    applied = 0
+    last_seq = after_seq
+    for record in wal.read(after_seq):
+        last_seq = max(last_seq, record['seq'])
+        try:
+            getattr(store, f"_apply_{record['op']}")(*record['args'])
+            applied += 1
+        except Exception as e:
+            print(f"WAL-Eintrag {record.get('seq')} ({record.get('op')}) übersprungen: {e}")
+
+    wal.last_seq = max(wal.last_seq, last_seq)
+    return applied
+
+
+class PersistenceManager:
+    """Sammelt dirty-Markierungen und schreibt sie gebündelt im Hintergrund"""
+
+    FLUSH_INTERVAL = 2.0  # Sekunden
+
+    def __init__(self, interval: float = FLUSH_INTERVAL):
+        self.interval = interval
+        # Dateipfad -> (Schreibfunktion des Datenspeichers, fällig ab) - letzte Markierung gewinnt
+        self._dirty: Dict[str, Tuple[Callable[[], None], float]] = {}
+        # Dateipfad -> WAL (geteilt, falls mehrere Instanzen dieselbe Datei nutzen)
+        self._wals: Dict[str, WriteAheadLog] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def mark_dirty(self, store: str, path: str, write_func: Callable[[], None], delay: float = None):
+        """
+        Markiert eine Datei zum Schreiben
+
+        Args:
+            store: Name des Datenspeichers (Metrik-Label)
+            path: Dateipfad (Schlüssel - mehrere Markierungen werden zusammengefasst)
+            write_func: Schreibt den aktuellen Zustand des Datenspeichers
+            delay: Max. Verzögerung in Sekunden (Standard: Flush-Intervall)
+        """
+        STORE_SAVE_REQUESTS.inc(store=store)
+        due = time.monotonic() + (self.interval if delay is None else delay)
+        with self._lock:
+            if path in self._dirty:
+                due = min(due, self._dirty[path][1])
+            self._dirty[path] = (write_func, due)
+            if self._thread is None:
+                self._start()
+
+    def _start(self):
+        """Startet den Flush-Thread (beim ersten mark_dirty)"""
+        self._thread = threading.Thread(target=self._run, name='persistence-flusher', daemon=True)
+        self._thread.start()
+        atexit.register(self.shutdown)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.sync_wals()
+            self._flush_due()
+
+    def sync_wals(self):
+        """fsync aller Write-Ahead-Logs (gebündelt statt pro Änderung)"""
+        with self._lock:
+            wals = list(self._wals.values())
+        for wal in wals:
+            wal.sync()
+
+    def _flush_due(self):
+        """Schreibt alle Dateien, deren Verzögerung abgelaufen ist"""
+        now = time.monotonic()
+        with self._lock:
+            due = [path for path, (_, due_time) in self._dirty.items() if due_time <= now]
+            pending = [(path, self._dirty.pop(path)[0]) for path in due]
+
+        for path, write_func in pending:
+            self._write(path, write_func)
+
+    def flush(self, path: str):
+        """Schreibt eine einzelne Datei sofort, falls sie dirty ist"""
+        with self._lock:
+            entry = self._dirty.pop(path, None)
+        if entry is not None:
+            self._write(path, entry[0])
+
+    def flush_all(self):
+        """Schreibt alle dirty Dateien"""
+        with self._lock:
+            pending = self._dirty
+            self._dirty = {}
+
+        for path, (write_func, _) in pending.items():
+            self._write(path, write_func)
+
+    def get_wal(self, path: str) -> WriteAheadLog:
+        """Gibt das (geteilte) Write-Ahead-Log für eine Datei zurück"""
+        with self._lock:
+            if path not in self._wals:
+                self._wals[path] = WriteAheadLog(path)
+            return self._wals[path]
+
+    @staticmethod
+    def _write(path: str, write_func: Callable[[], None]):
+        try:
+            write_func()
+        except Exception as e:
+            print(f"Fehler beim Schreiben von {path}: {e}")
+
+    def is_dirty(self, path: str) -> bool:
+        with self._lock:
+            return path in self._dirty
+
+    def shutdown(self):
+        """Stoppt den Flush-Thread und schreibt alles Ausstehende"""
+        self._stopped.set()
+        self._wakeup.set()
+        self.sync_wals()
+        self.flush_all()
+
+
+# Prozessweite Instanz
+persistence = PersistenceManager()
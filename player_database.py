@@ -5,46 +5,143 @@ Speichert detaillierte Informationen über alle Spieler-Interaktionen
 
 import json
 import os
+import threading
+from contextlib import contextmanager
 from typing import Dict, List, Optional
 from datetime import datetime
 from utils import get_data_file_path
+from tracing import traced
+from metrics import STORE_SAVE_SECONDS, timed
+from persistence import persistence, synchronized, dump_json, write_text_file, replay_wal
+from sqlite_store import get_database
+from name_index import NameIndex
+
+
+def _copy_player(player: dict) -> dict:
+    """Kopiert einen Spieler-Eintrag für einen Snapshot (alle verschachtelten Zähler)"""
+    return {
+        **player,
+        'kills_by_me': {**player['kills_by_me'], 'weapons': dict(player['kills_by_me']['weapons'])},
+        'deaths_by_them': {**player['deaths_by_them'], 'weapons': dict(player['deaths_by_them']['weapons'])},
+        'my_vehicles_destroyed_by_them': dict(player['my_vehicles_destroyed_by_them'])
+    }
 
 
 class PlayerDatabase:
     """Verwaltet detaillierte Spieler-Statistiken"""
 
+    # Änderungen sind über das WAL sofort crash-sicher - Snapshots nur alle 30s
+    SNAPSHOT_INTERVAL = 30.0
+
     def __init__(self, db_file: str = "players_db.json"):
         self.db_file = get_data_file_path(db_file)
-        # player_name -> PlayerData
+        # Schlüssel der Spieler-DB im SQLite-Backend (z.B. players_db_live)
+        self.store = os.path.splitext(os.path.basename(db_file))[0]
+        # player_name -> PlayerData (nur Schreiber, unter self._lock)
         self.players: Dict[str, dict] = {}
+        # Trigramm-Index über alle Spielernamen (NPC-Neubewertung)
+        self.names = NameIndex()
+        # Veröffentlichter, unveränderlicher Stand für Leser (Copy-on-Write, ohne Lock)
+        self._published: Dict[str, dict] = {}
+        self._dirty_players = set()  # Seit dem letzten Veröffentlichen geänderte Spieler
+        self._republish_all = True
+        self._batch_depth = 0
+        # Schützt players gegen gleichzeitiges Schreiben durch den Flush-Thread
+        self._lock = threading.RLock()
+        # Optionales SQLite-Backend (None = JSON-Snapshot + WAL)
+        self._db = get_database()
         self.load()
 
     def load(self):
-        """Lädt Datenbank"""
+        """Lädt Datenbank (Snapshot + Änderungen aus dem WAL bzw. aus SQLite)"""
+        if self._db is not None:
+            try:
+                self.players = self._db.load_players(self.store)
+            except Exception as e:
+                print(f"Fehler beim Laden der Spieler-DB: {e}")
+            self.names = NameIndex(self.players)
+            self._republish_all = True
+            self._publish()
+            return
+
+        # Ausstehende Änderungen einer anderen Instanz zuerst schreiben
+        persistence.flush(self.db_file)
+
+        self._wal = persistence.get_wal(f"{self.db_file}.wal")
+        snapshot_seq = 0
+
         if os.path.exists(self.db_file):
             try:
                 with open(self.db_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
                     self.players = data.get('players', {})
+                    snapshot_seq = data.get('wal_seq', 0)
             except Exception as e:
                 print(f"Fehler beim Laden der Spieler-DB: {e}")
 
+        applied = replay_wal(self, self._wal, snapshot_seq)
+        if applied:
+            print(f"Spieler-DB: {applied} Änderungen aus dem WAL wiederhergestellt")
+            self.save()
+
+        self.names = NameIndex(self.players)
+        self._republish_all = True
+        self._publish()
+
     def save(self):
-        """Speichert Datenbank"""
-        data = {
-            'last_updated': datetime.now().isoformat(),
-            'players': self.players
-        }
+        """Markiert Datenbank zum Speichern (geschrieben wird gebündelt, siehe persistence.py)"""
+        if self._db is not None:
+            return  # SQLite: Zeilen sind bereits geschrieben
+        persistence.mark_dirty('players', self.db_file, self._write, delay=self.SNAPSHOT_INTERVAL)
+
+    def _save_now(self):
+        """Schreibt sofort einen Snapshot (für seltene Änderungen, die nicht im WAL stehen)"""
+        if self._db is not None:
+            with self._lock:
+                self._db.replace_players(self.store, self.players)
+            return
+        self.save()
+        persistence.flush(self.db_file)
+
+    @traced('players.save')
+    @timed(STORE_SAVE_SECONDS, store='players')
+    def _write(self):
+        """Schreibt Datenbank auf die Platte"""
+        with self._lock:
+            wal_seq = self._wal.last_seq
+            data = {
+                'last_updated': datetime.now().isoformat(),
+                'wal_seq': wal_seq,  # Letzter enthaltener WAL-Eintrag
+                'players': self.players
+            }
+            content = dump_json(data)
 
         try:
-            with open(self.db_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            write_text_file(self.db_file, content)
         except Exception as e:
             print(f"Fehler beim Speichern der Spieler-DB: {e}")
+            return
+
+        self._wal.compact(wal_seq)
+
+    def _log_change(self, category: str, item: str, op: str, player_name: str, *args):
+        """
+        Schreibt eine Zähler-Änderung fort, bevor sie angewendet wird
+
+        Args:
+            category, item: Betroffener Zähler des Spielers (SQLite erhöht nur diese Zeile)
+            op, player_name, args: WAL-Eintrag (JSON-Backend) - letztes Argument ist der Zeitstempel
+        """
+        if self._db is not None:
+            self._db.increment_player(self.store, player_name, category, item, args[-1])
+        else:
+            self._wal.append(op, player_name, *args)
 
-    def _ensure_player_exists(self, player_name: str):
+    def _ensure_player_exists(self, player_name: str, timestamp: str = None):
         """Stellt sicher dass ein Spieler existiert"""
         if player_name not in self.players:
+            self.names.add(player_name)
+            timestamp = timestamp or datetime.now().isoformat()
             self.players[player_name] = {
                 'kills_by_me': {
                     'total': 0,
@@ -55,11 +152,13 @@ class PlayerDatabase:
                     'weapons': {}  # weapon_internal -> count
                 },
                 'my_vehicles_destroyed_by_them': {},  # vehicle_internal -> count
-                'first_encounter': datetime.now().isoformat(),
-                'last_encounter': datetime.now().isoformat(),
+                'first_encounter': timestamp,
+                'last_encounter': timestamp,
                 'avatar_url': None  # Cache für RSI Avatar
             }
 
+    @traced('players.add_kill_by_me')
+    @synchronized
     def add_kill_by_me(self, player_name: str, weapon_internal: str):
         """
         Registriert dass ich einen Spieler getötet habe
@@ -68,16 +167,25 @@ class PlayerDatabase:
             player_name: Name des getöteten Spielers
             weapon_internal: Interne Waffenbezeichnung
         """
-        self._ensure_player_exists(player_name)
+        timestamp = datetime.now().isoformat()
+        self._log_change('kills_by_me', weapon_internal, 'add_kill_by_me', player_name, weapon_internal, timestamp)
+        self._apply_add_kill_by_me(player_name, weapon_internal, timestamp)
+        self.save()
+        self._publish_changes()
+
+    def _apply_add_kill_by_me(self, player_name: str, weapon_internal: str, timestamp: str):
+        """Wendet einen Kill an (auch beim WAL-Replay)"""
+        self._dirty_players.add(player_name)
+        self._ensure_player_exists(player_name, timestamp)
 
         player = self.players[player_name]
         player['kills_by_me']['total'] += 1
         player['kills_by_me']['weapons'][weapon_internal] = \
             player['kills_by_me']['weapons'].get(weapon_internal, 0) + 1
-        player['last_encounter'] = datetime.now().isoformat()
-
-        self.save()
+        player['last_encounter'] = timestamp
 
+    @traced('players.add_death_by_them')
+    @synchronized
     def add_death_by_them(self, player_name: str, weapon_internal: str):
         """
         Registriert dass ein Spieler mich getötet hat
@@ -86,16 +194,25 @@ class PlayerDatabase:
             player_name: Name des Killers
             weapon_internal: Interne Waffenbezeichnung
         """
-        self._ensure_player_exists(player_name)
+        timestamp = datetime.now().isoformat()
+        self._log_change('deaths_by_them', weapon_internal, 'add_death_by_them', player_name, weapon_internal, timestamp)
+        self._apply_add_death_by_them(player_name, weapon_internal, timestamp)
+        self.save()
+        self._publish_changes()
+
+    def _apply_add_death_by_them(self, player_name: str, weapon_internal: str, timestamp: str):
+        """Wendet einen Tod an (auch beim WAL-Replay)"""
+        self._dirty_players.add(player_name)
+        self._ensure_player_exists(player_name, timestamp)
 
         player = self.players[player_name]
         player['deaths_by_them']['total'] += 1
         player['deaths_by_them']['weapons'][weapon_internal] = \
             player['deaths_by_them']['weapons'].get(weapon_internal, 0) + 1
-        player['last_encounter'] = datetime.now().isoformat()
-
-        self.save()
+        player['last_encounter'] = timestamp
 
+    @traced('players.add_my_vehicle_destroyed_by_them')
+    @synchronized
     def add_my_vehicle_destroyed_by_them(self, player_name: str, vehicle_internal: str):
         """
         Registriert dass ein Spieler mein Fahrzeug zerstört hat
@@ -104,14 +221,64 @@ class PlayerDatabase:
             player_name: Name des Zerstörers
             vehicle_internal: Interner Fahrzeugname (normalisiert)
         """
-        self._ensure_player_exists(player_name)
+        timestamp = datetime.now().isoformat()
+        self._log_change('my_vehicles_destroyed_by_them', vehicle_internal,
+                         'add_my_vehicle_destroyed_by_them', player_name, vehicle_internal, timestamp)
+        self._apply_add_my_vehicle_destroyed_by_them(player_name, vehicle_internal, timestamp)
+        self.save()
+        self._publish_changes()
+
+    def _apply_add_my_vehicle_destroyed_by_them(self, player_name: str, vehicle_internal: str, timestamp: str):
+        """Wendet einen Fahrzeug-Verlust an (auch beim WAL-Replay)"""
+        self._dirty_players.add(player_name)
+        self._ensure_player_exists(player_name, timestamp)
 
         player = self.players[player_name]
         player['my_vehicles_destroyed_by_them'][vehicle_internal] = \
             player['my_vehicles_destroyed_by_them'].get(vehicle_internal, 0) + 1
-        player['last_encounter'] = datetime.now().isoformat()
+        player['last_encounter'] = timestamp
 
-        self.save()
+    @contextmanager
+    def batch(self):
+        """Veröffentlicht Änderungen erst am Ende des Blocks (ein Stand pro Log-Batch)"""
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                self._publish_changes()
+
+    def _publish_changes(self):
+        """Veröffentlicht nach einer Änderung - innerhalb von batch() erst am Ende"""
+        if not self._batch_depth:
+            self._publish()
+
+    def _publish(self):
+        """
+        Erstellt einen neuen unveränderlichen Stand (Copy-on-Write, unter self._lock)
+
+        Nur geänderte Spieler werden kopiert, alle anderen teilt der neue Stand mit dem vorherigen.
+        """
+        if self._republish_all:
+            published = {name: _copy_player(player) for name, player in self.players.items()}
+        elif self._dirty_players:
+            published = dict(self._published)
+            for name in self._dirty_players:
+                if name in self.players:
+                    published[name] = _copy_player(self.players[name])
+                else:
+                    published.pop(name, None)
+        else:
+            return
+
+        # Eine Referenzzuweisung - Leser sehen den alten oder den neuen Stand
+        self._published = published
+        self._dirty_players = set()
+        self._republish_all = False
+
+    # ===== Leser: arbeiten auf dem veröffentlichten Stand (ohne Lock) =====
 
     def get_player_stats(self, player_name: str) -> Optional[dict]:
         """
@@ -123,11 +290,11 @@ class PlayerDatabase:
         Returns:
             Dict mit allen Stats oder None wenn Spieler unbekannt
         """
-        return self.players.get(player_name)
+        return self._published.get(player_name)
 
     def get_all_players(self) -> Dict[str, dict]:
-        """Gibt alle Spieler zurück"""
-        return self.players
+        """Gibt alle Spieler zurück (unveränderlicher Stand - nicht verändern!)"""
+        return self._published
 
     def get_player_summary(self, player_name: str) -> Optional[dict]:
         """
@@ -139,11 +306,10 @@ class PlayerDatabase:
         Returns:
             Dict mit zusammengefassten Stats
         """
-        if player_name not in self.players:
+        player = self._published.get(player_name)
+        if player is None:
             return None
 
-        player = self.players[player_name]
-
         kills_by_me = player['kills_by_me']['total']
         deaths_by_them = player['deaths_by_them']['total']
 
@@ -171,7 +337,13 @@ class PlayerDatabase:
         Returns:
             Liste von Spieler-Summaries, sortiert nach deaths_by_them
         """
-        summaries = [self.get_player_summary(name) for name in self.players.keys()]
+        if self._db is not None:
+            # Index auf deaths_by_them statt Sortierung aller Spieler
+            players = self._published
+            return [self.get_player_summary(name)
+                    for name in self._db.top_players(self.store, 'deaths_by_them', limit) if name in players]
+
+        summaries = [self.get_player_summary(name) for name in self._published.keys()]
         summaries.sort(key=lambda x: x['deaths_by_them'], reverse=True)
         return summaries[:limit]
 
@@ -185,7 +357,13 @@ class PlayerDatabase:
         Returns:
             Liste von Spieler-Summaries, sortiert nach kills_by_me
         """
-        summaries = [self.get_player_summary(name) for name in self.players.keys()]
+        if self._db is not None:
+            # Index auf kills_by_me statt Sortierung aller Spieler
+            players = self._published
+            return [self.get_player_summary(name)
+                    for name in self._db.top_players(self.store, 'kills_by_me', limit) if name in players]
+
+        summaries = [self.get_player_summary(name) for name in self._published.keys()]
         summaries.sort(key=lambda x: x['kills_by_me'], reverse=True)
         return summaries[:limit]
 
@@ -201,7 +379,7 @@ class PlayerDatabase:
         """
         rivalries = []
 
-        for name in self.players.keys():
+        for name in self._published.keys():
             summary = self.get_player_summary(name)
             total_encounters = summary['kills_by_me'] + summary['deaths_by_them']
 
@@ -212,43 +390,66 @@ class PlayerDatabase:
         rivalries.sort(key=lambda x: x['total_encounters'], reverse=True)
         return rivalries
 
+    @synchronized
     def remove_player(self, player_name: str):
         """Entfernt einen Spieler aus der Datenbank"""
         if player_name in self.players:
-            del self.players[player_name]
+            if self._db is not None:
+                self._db.remove_players(self.store, [player_name])
+            else:
+                self._wal.append('remove_player', player_name)
+            self._apply_remove_player(player_name)
             self.save()
+            self._publish_changes()
+
+    def _apply_remove_player(self, player_name: str):
+        """Entfernt einen Spieler (auch beim WAL-Replay)"""
+        self._dirty_players.add(player_name)
+        self.players.pop(player_name, None)
+        self.names.discard(player_name)
 
-    def remove_npcs(self, npc_db):
+    @synchronized
+    def remove_npcs(self, npc_db, pattern: Optional[str] = None):
         """
-        Entfernt alle NPCs aus der Spielerdatenbank
+        Entfernt NPCs aus der Spielerdatenbank
+
+        Geprüft werden nur Spieler, deren Name das geänderte Pattern enthält (über den Namens-Index).
 
         Args:
             npc_db: NPCDatabase Instanz mit aktuellen Patterns
+            pattern: Hinzugefügtes oder entferntes Pattern (None = alle Spieler prüfen)
 
         Returns:
             int: Anzahl der entfernten NPCs
         """
-        npcs_found = []
-
-        for player_name in list(self.players.keys()):
-            if npc_db.is_npc(player_name):
-                npcs_found.append(player_name)
-
-        # Entferne alle gefundenen NPCs
+        candidates = self.names.search(pattern) if pattern is not None else self.names.all()
+        npcs_found = sorted(name for name in candidates if name in self.players and npc_db.is_npc(name))
+        if not npcs_found:
+            return 0
+
+        if self._db is not None:
+            self._db.remove_players(self.store, npcs_found)
+        else:
+            for npc_name in npcs_found:
+                self._wal.append('remove_player', npc_name)
         for npc_name in npcs_found:
-            del self.players[npc_name]
-
-        if npcs_found:
-            self.save()
-            print(f"Spielerdatenbank bereinigt: {len(npcs_found)} NPCs entfernt")
+            self._apply_remove_player(npc_name)
+        self.save()
+        self._publish_changes()
+        print(f"Spielerdatenbank bereinigt: {len(npcs_found)} NPCs entfernt")
 
         return len(npcs_found)
 
+    @synchronized
     def reset_all(self):
         """Löscht alle Spieler-Daten"""
         self.players = {}
-        self.save()
+        self.names = NameIndex()
+        self._save_now()
+        self._republish_all = True
+        self._publish_changes()
 
+    @synchronized
     def set_avatar_url(self, player_name: str, avatar_url: str):
         """
         Setzt die Avatar-URL für einen Spieler
@@ -257,9 +458,20 @@ class PlayerDatabase:
             player_name: Name des Spielers
             avatar_url: URL zum RSI Avatar
         """
-        self._ensure_player_exists(player_name)
-        self.players[player_name]['avatar_url'] = avatar_url
+        timestamp = datetime.now().isoformat()
+        if self._db is not None:
+            self._db.set_avatar_url(self.store, player_name, avatar_url, timestamp)
+        else:
+            self._wal.append('set_avatar_url', player_name, avatar_url, timestamp)
+        self._apply_set_avatar_url(player_name, avatar_url, timestamp)
         self.save()
+        self._publish_changes()
+
+    def _apply_set_avatar_url(self, player_name: str, avatar_url: str, timestamp: str):
+        """Setzt die Avatar-URL (auch beim WAL-Replay)"""
+        self._dirty_players.add(player_name)
+        self._ensure_player_exists(player_name, timestamp)
+        self.players[player_name]['avatar_url'] = avatar_url
 
     def get_avatar_url(self, player_name: str) -> Optional[str]:
         """
@@ -271,8 +483,9 @@ class PlayerDatabase:
         Returns:
             Avatar URL oder None
         """
-        if player_name in self.players:
-            return self.players[player_name].get('avatar_url')
+        player = self._published.get(player_name)
+        if player is not None:
+            return player.get('avatar_url')
         return None
 
     def has_avatar(self, player_name: str) -> bool:
@@ -285,4 +498,5 @@ class PlayerDatabase:
         Returns:
             True wenn Avatar vorhanden, sonst False
         """
-        return player_name in self.players and self.players[player_name].get('avatar_url') is not None
+        player = self._published.get(player_name)
+        return player is not None and player.get('avatar_url') is not None
@@ -3,9 +3,11 @@ Profile Fetcher für RSI Spielerprofile
 Holt Avatar-URLs von der RSI Website
 """
 
+import time
 import requests
 from bs4 import BeautifulSoup
 from typing import Optional
+from metrics import RSI_FETCHES, RSI_FETCH_SECONDS
 
 
 def fetch_avatar_url(player_handle: str) -> Optional[str]:
@@ -30,7 +32,15 @@ def fetch_avatar_url(player_handle: str) -> Optional[str]:
             'Upgrade-Insecure-Requests': '1'
         }
 
-        response = requests.get(url, headers=headers, timeout=5)
+        start = time.perf_counter()
+        try:
+            response = requests.get(url, headers=headers, timeout=5)
+        except Exception:
+            RSI_FETCHES.inc(kind='avatar', result='error')
+            raise
+        finally:
+            RSI_FETCH_SECONDS.observe(time.perf_counter() - start, kind='avatar')
+        RSI_FETCHES.inc(kind='avatar', result=str(response.status_code))
 
         if response.status_code != 200:
             return None
@@ -0,0 +1,176 @@
+"""
+Verse Combat Log - CPU Profiler
+cProfile-Modus für initiales Scannen, Monitoring-Loop und Flask-Routen
+Schreibt .pstats Dateien + Hotspot-Zusammenfassung ins Datenverzeichnis
+"""
+
+import cProfile
+import functools
+import io
+import os
+import pstats
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List
+from utils import get_user_data_dir
+
+
+class Profiler:
+    """Sammelt cProfile-Daten pro Bereich (z.B. 'monitor_live', 'route.get_stats')"""
+
+    TOP_N = 40
+
+    def __init__(self):
+        self.enabled = False
+        self.output_dir = os.path.join(get_user_data_dir(), 'profiles')
+        self._profiles: Dict[str, cProfile.Profile] = {}
+        self._busy: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.last_files: List[str] = []
+
+    def start(self):
+        """Aktiviert Profiling"""
+        self.enabled = True
+        print(f"⏱️  Profiling aktiviert - Ausgabe: {self.output_dir}")
+
+    def stop(self) -> List[str]:
+        """Deaktiviert Profiling und schreibt alle gesammelten Profile"""
+        self.enabled = False
+        files = self.dump_all()
+        print("⏱️  Profiling deaktiviert")
+        return files
+
+    def _get_profile(self, name: str):
+        """Gibt (Profile, Lock) für einen Bereich zurück"""
+        with self._lock:
+            if name not in self._profiles:
+                self._profiles[name] = cProfile.Profile()
+                self._busy[name] = threading.Lock()
+            return self._profiles[name], self._busy[name]
+
+    @contextmanager
+    def profile(self, name: str, dump_after: bool = False):
+        """
+        Profiliert einen Abschnitt (Daten werden pro Name aufsummiert)
+
+        Args:
+            name: Name des Bereichs (wird Teil des Dateinamens)
+            dump_after: Direkt nach dem Abschnitt schreiben (z.B. initiales Scannen)
+        """
+        # Verschachtelte Profile im selben Thread vermeiden (äußeres Profil erfasst alles)
+        if not self.enabled or getattr(self._local, 'active', False):
+            yield
+            return
+
+        prof, busy = self._get_profile(name)
+        # Gleicher Bereich parallel aktiv (z.B. zwei Requests) -> ohne Profiling ausführen
+        if not busy.acquire(blocking=False):
+            yield
+            return
+
+        try:
+            prof.enable()
+        except ValueError:
+            # Ab Python 3.12 ist cProfile prozessweit - profiliert bereits ein anderer Thread
+            # ("Another profiling tool is already active"), ohne Profiling ausführen
+            busy.release()
+            yield
+            return
+
+        self._local.active = True
+        try:
+            yield
+        finally:
+            prof.disable()
+            self._local.active = False
+            busy.release()
+
+        if dump_after:
+            self.dump(name)
+
+    def profiled(self, name: str):
+        """Decorator-Variante von profile()"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.profile(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def dump(self, name: str) -> List[str]:
+        """
+        Schreibt ein gesammeltes Profil als .pstats + .txt Zusammenfassung
+
+        Args:
+            name: Name des Bereichs
+
+        Returns:
+            Liste der geschriebenen Dateien
+        """
+        with self._lock:
+            prof = self._profiles.pop(name, None)
+            self._busy.pop(name, None)
+
+        if prof is None:
+            return []
+
+        try:
+            stats = pstats.Stats(prof)
+        except TypeError:
+            # Profil ohne Daten (Bereich nie durchlaufen)
+            return []
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        base = os.path.join(self.output_dir, f"{name}_{timestamp}")
+
+        try:
+            stats.dump_stats(f"{base}.pstats")
+
+            summary = io.StringIO()
+            summary.write(f"Verse Combat Log - Profil '{name}' ({timestamp})\n\n")
+            summary.write(f"=== Top {self.TOP_N} nach kumulativer Zeit ===\n")
+            pstats.Stats(prof, stream=summary).sort_stats('cumulative').print_stats(self.TOP_N)
+            summary.write(f"\n=== Top {self.TOP_N} nach Eigenzeit ===\n")
+            pstats.Stats(prof, stream=summary).sort_stats('tottime').print_stats(self.TOP_N)
+
+            with open(f"{base}.txt", 'w', encoding='utf-8') as f:
+                f.write(summary.getvalue())
+        except Exception as e:
+            print(f"Fehler beim Schreiben des Profils {name}: {e}")
+            return []
+
+        files = [f"{base}.pstats", f"{base}.txt"]
+        self.last_files = files + self.last_files[:18]
+        print(f"⏱️  Profil geschrieben: {base}.pstats")
+        return files
+
+    def dump_all(self) -> List[str]:
+        """Schreibt alle gesammelten Profile"""
+        with self._lock:
+            names = list(self._profiles.keys())
+
+        files = []
+        for name in names:
+            files.extend(self.dump(name))
+        return files
+
+    def get_status(self) -> Dict:
+        """Gibt Profiling-Status zurück"""
+        with self._lock:
+            active = sorted(self._profiles.keys())
+        return {
+            'enabled': self.enabled,
+            'output_dir': self.output_dir,
+            'collecting': active,
+            'last_files': self.last_files
+        }
+
+
+# Prozessweite Instanz
+profiler = Profiler()
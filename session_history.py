@@ -0,0 +1,148 @@
+"""
+Verse Combat Log - Session History
+Archiv abgeschlossener Sessions pro Version (append-only, indiziert)
+
+Jede Session ist eine JSON-Zeile in session_history_<version>.jsonl. Die Index-Datei
+(.idx) enthält pro Session den Byte-Offset ihrer Zeile als festes 8-Byte-Feld - eine
+Seite wird per seek gelesen, ohne Archiv oder Index komplett zu laden.
+"""
+
+import json
+import os
+import struct
+import threading
+from typing import Dict, List
+from utils import get_data_file_path
+
+# Offset einer Session im Archiv (unsigned 64 Bit, little endian)
+OFFSET = struct.Struct('<Q')
+
+
+class SessionHistory:
+    """Verwaltet das Session-Archiv für eine SC Version"""
+
+    def __init__(self, version: str):
+        self.version = version
+        self.history_file = get_data_file_path(f"session_history_{version.lower()}.jsonl")
+        self.index_file = f"{self.history_file[:-len('.jsonl')]}.idx"
+        self._lock = threading.Lock()
+        self._recover()
+
+    def _recover(self):
+        """Gleicht Index und Archiv nach einem Absturz ab (unvollständige Einträge)"""
+        try:
+            with self._lock:
+                if not os.path.exists(self.history_file):
+                    # Verwaister Index ohne Archiv
+                    if os.path.exists(self.index_file):
+                        os.remove(self.index_file)
+                    return
+
+                # Angefangenes Index-Feld abschneiden
+                index_size = os.path.getsize(self.index_file) if os.path.exists(self.index_file) else 0
+                if index_size % OFFSET.size:
+                    with open(self.index_file, 'r+b') as f:
+                        f.truncate(index_size - index_size % OFFSET.size)
+
+                # Ende der letzten indizierten Session = Beginn der nicht indizierten
+                count = self._count()
+                with open(self.history_file, 'rb') as f:
+                    if count:
+                        f.seek(self._read_offset(count - 1))
+                        f.readline()
+                    unindexed_start = f.tell()
+                    lines = f.read().split(b'\n')
+
+                # Vollständige Zeilen nachindizieren, angefangene letzte Zeile verwerfen
+                offsets = []
+                position = unindexed_start
+                for line in lines[:-1]:
+                    offsets.append(position)
+                    position += len(line) + 1
+
+                if lines[-1]:
+                    with open(self.history_file, 'r+b') as f:
+                        f.truncate(position)
+                if offsets:
+                    with open(self.index_file, 'ab') as f:
+                        f.write(b''.join(OFFSET.pack(offset) for offset in offsets))
+                    print(f"[{self.version}] {len(offsets)} Sessions im Archiv-Index nachgetragen")
+        except Exception as e:
+            print(f"Fehler beim Prüfen des Session-Archivs: {e}")
+
+    def append(self, entry: Dict):
+        """
+        Hängt eine abgeschlossene Session an
+
+        Archiv-Zeile wird vor dem Index-Eintrag auf die Platte gebracht - ein Absturz
+        dazwischen wird beim nächsten Start von _recover() nachgetragen.
+
+        Args:
+            entry: Session-Zusammenfassung (JSON-serialisierbar)
+        """
+        line = (json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8')
+        try:
+            with self._lock:
+                with open(self.history_file, 'ab') as f:
+                    offset = f.tell()
+                    f.write(line)
+                    f.flush()
+                    os.fsync(f.fileno())
+                with open(self.index_file, 'ab') as f:
+                    f.write(OFFSET.pack(offset))
+                    f.flush()
+                    os.fsync(f.fileno())
+        except Exception as e:
+            print(f"Fehler beim Archivieren der Session: {e}")
+
+    def count(self) -> int:
+        """Anzahl archivierter Sessions"""
+        with self._lock:
+            return self._count()
+
+    def _count(self) -> int:
+        if not os.path.exists(self.index_file):
+            return 0
+        return os.path.getsize(self.index_file) // OFFSET.size
+
+    def _read_offset(self, position: int) -> int:
+        """Liest den Archiv-Offset der Session an Position (0 = älteste)"""
+        with open(self.index_file, 'rb') as f:
+            f.seek(position * OFFSET.size)
+            return OFFSET.unpack(f.read(OFFSET.size))[0]
+
+    def get_page(self, page: int = 1, per_page: int = 20) -> Dict:
+        """
+        Gibt eine Seite des Archivs zurück (neueste Session zuerst)
+
+        Args:
+            page: Seite (ab 1)
+            per_page: Sessions pro Seite
+
+        Returns:
+            Dict mit total, page, per_page und sessions
+        """
+        with self._lock:
+            total = self._count()
+            # Positionen der Seite (neueste zuerst) -> zusammenhängender Index-Bereich
+            last = total - (page - 1) * per_page
+            first = max(0, last - per_page)
+            sessions: List[Dict] = []
+
+            if last > 0:
+                try:
+                    with open(self.index_file, 'rb') as f:
+                        f.seek(first * OFFSET.size)
+                        raw = f.read((last - first) * OFFSET.size)
+                    offsets = [value for (value,) in OFFSET.iter_unpack(raw)]
+
+                    with open(self.history_file, 'rb') as f:
+                        for position, offset in reversed(list(enumerate(offsets, first))):
+                            f.seek(offset)
+                            session = json.loads(f.readline().decode('utf-8'))
+                            session['index'] = position
+                            sessions.append(session)
+                except Exception as e:
+                    print(f"Fehler beim Lesen des Session-Archivs: {e}")
+
+        return {'total': total, 'page': page, 'per_page': per_page, 'sessions': sessions}
@@ -0,0 +1,493 @@
+"""
+Verse Combat Log - SQLite Storage
+Optionales Speicher-Backend für Statistiken, Spieler-DB, Waffen-/Fahrzeug-Namen und NPC-Patterns
+
+Aktivierung über config.json: "storage_backend": "sqlite"
+Beim ersten Start werden die vorhandenen JSON-Dateien einmalig importiert (sie bleiben als
+Backup erhalten). Änderungen werden zeilenweise geschrieben statt ganze Dateien neu.
+"""
+
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+from utils import get_data_file_path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+-- Statistiken: ein Zähler pro Zeile (name/detail leer bei Skalaren wie pve_kills)
+CREATE TABLE IF NOT EXISTS stats_counters (
+    version TEXT NOT NULL,
+    section TEXT NOT NULL,
+    category TEXT NOT NULL,
+    name TEXT NOT NULL DEFAULT '',
+    detail TEXT NOT NULL DEFAULT '',
+    count INTEGER NOT NULL,
+    PRIMARY KEY (version, section, category, name, detail)
+);
+CREATE INDEX IF NOT EXISTS idx_stats_name ON stats_counters (category, name);
+CREATE INDEX IF NOT EXISTS idx_stats_detail ON stats_counters (category, detail);
+
+CREATE TABLE IF NOT EXISTS stats_sessions (
+    version TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL DEFAULT '',
+    session_start TEXT
+);
+
+-- Spieler-DBs (store = Dateiname ohne .json, z.B. players_db_live): Summen in players,
+-- Aufschlüsselung nach Waffe/Fahrzeug in player_counters
+CREATE TABLE IF NOT EXISTS players (
+    store TEXT NOT NULL,
+    name TEXT NOT NULL,
+    kills_by_me INTEGER NOT NULL DEFAULT 0,
+    deaths_by_them INTEGER NOT NULL DEFAULT 0,
+    first_encounter TEXT,
+    last_encounter TEXT,
+    avatar_url TEXT,
+    PRIMARY KEY (store, name)
+);
+CREATE INDEX IF NOT EXISTS idx_players_store_kills ON players (store, kills_by_me);
+CREATE INDEX IF NOT EXISTS idx_players_store_deaths ON players (store, deaths_by_them);
+CREATE INDEX IF NOT EXISTS idx_players_store_last_encounter ON players (store, last_encounter);
+
+CREATE TABLE IF NOT EXISTS player_counters (
+    store TEXT NOT NULL,
+    player TEXT NOT NULL,
+    category TEXT NOT NULL,
+    item TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (store, player, category, item)
+);
+CREATE INDEX IF NOT EXISTS idx_player_counters_item ON player_counters (store, category, item);
+
+-- Kataloge (Custom-Namen, Blacklist, Parent-Fahrzeuge, NPC-Patterns) - Reihenfolge = rowid
+CREATE TABLE IF NOT EXISTS catalog (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (kind, key)
+);
+"""
+
+# Aufbau eines Statistik-Abschnitts: Kategorie -> Verschachtelungstiefe
+STATS_CATEGORIES = {
+    'pve_kills': 0,
+    'pvp_kills': 0,
+    'deaths': 0,
+    'weapon_kills': 1,
+    'death_weapons': 1,
+    'death_by_players': 1,
+    'vehicle_kills': 1,
+    'pvp_victims': 2,
+    'vehicle_losses_by_player': 2
+}
+
+# Kategorien der Spieler-DB mit Summenspalte in players
+PLAYER_TOTALS = ('kills_by_me', 'deaths_by_them')
+
+
+class SQLiteDatabase:
+    """Eine SQLite-Datei (WAL-Modus) für alle Datenspeicher"""
+
+    def __init__(self, db_file: str = "vcl.db"):
+        self.db_file = get_data_file_path(db_file)
+        # Eine Verbindung für alle Threads - serialisiert über _lock
+        self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self._lock = threading.RLock()
+
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            # WAL + NORMAL: kein fsync pro Commit, Datenbank bleibt bei Absturz konsistent
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(SCHEMA)
+
+    @contextmanager
+    def transaction(self):
+        """Führt alle Statements als eine Transaktion aus"""
+        with self._lock:
+            try:
+                yield self._conn
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self.transaction() as conn:
+            conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+    # ===== Statistiken =====
+
+    def load_stats(self, version: str) -> Optional[Dict]:
+        """
+        Lädt Session und Total einer Version
+
+        Returns:
+            Dict mit session, total, session_id, session_start oder None wenn unbekannt
+        """
+        with self._lock:
+            session_row = self._conn.execute(
+                'SELECT session_id, session_start FROM stats_sessions WHERE version = ?',
+                (version,)).fetchone()
+            rows = self._conn.execute(
+                'SELECT section, category, name, detail, count FROM stats_counters WHERE version = ?',
+                (version,)).fetchall()
+
+        if session_row is None and not rows:
+            return None
+
+        sections = {'session': {}, 'total': {}}
+        for section, category, name, detail, count in rows:
+            stats = sections[section]
+            depth = STATS_CATEGORIES.get(category)
+            if depth == 0:
+                stats[category] = count
+            elif depth == 1:
+                stats.setdefault(category, {})[name] = count
+            elif depth == 2:
+                stats.setdefault(category, {}).setdefault(name, {})[detail] = count
+
+        return {
+            'session': sections['session'],
+            'total': sections['total'],
+            'session_id': session_row[0] if session_row else '',
+            'session_start': session_row[1] if session_row else None
+        }
+
+    def increment_stats(self, version: str, counters: Iterable[Tuple[str, ...]]):
+        """
+        Erhöht Zähler in Session und Total um 1
+
+        Args:
+            version: SC Version
+            counters: (category, [name, [detail]]) z.B. ('pvp_victims', victim, weapon)
+        """
+        rows = []
+        for counter in counters:
+            category, name, detail = (tuple(counter) + ('', ''))[:3]
+            for section in ('session', 'total'):
+                rows.append((version, section, category, name or '', detail or ''))
+
+        with self.transaction() as conn:
+            conn.executemany(
+                'INSERT INTO stats_counters (version, section, category, name, detail, count) '
+                'VALUES (?, ?, ?, ?, ?, 1) '
+                'ON CONFLICT (version, section, category, name, detail) DO UPDATE SET count = count + 1',
+                rows)
+
+    def set_session(self, version: str, session_id: str, session_start: str):
+        with self.transaction() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO stats_sessions (version, session_id, session_start) VALUES (?, ?, ?)',
+                (version, session_id, session_start))
+
+    def reclassify_stats(self, version: str, names: List[str], scalars: Dict[str, Dict[str, int]],
+                         categories: Iterable[str]):
+        """
+        Entfernt neu erkannte NPCs aus den Spieler-Maps einer Version (NPC-Neubewertung)
+
+        Args:
+            version: SC Version
+            names: Als NPC erkannte Namen
+            scalars: section -> {pve_kills, pvp_kills} nach der Neubewertung
+            categories: Maps mit Spielernamen als Schlüssel
+        """
+        categories = list(categories)
+        placeholders = ', '.join('?' for _ in categories)
+        with self.transaction() as conn:
+            conn.executemany(
+                f'DELETE FROM stats_counters WHERE version = ? AND category IN ({placeholders}) AND name = ?',
+                [(version, *categories, name) for name in names])
+            conn.executemany(
+                'INSERT OR REPLACE INTO stats_counters (version, section, category, name, detail, count) '
+                "VALUES (?, ?, ?, '', '', ?)",
+                [(version, section, category, value)
+                 for section, values in scalars.items() for category, value in values.items()])
+
+    def replace_stats(self, version: str, session: Dict, total: Dict, session_start: str):
+        """Schreibt alle Zähler einer Version neu (Reset, NPC-Neubewertung, Import)"""
+        rows = []
+        for section, stats in (('session', session), ('total', total)):
+            for category, depth in STATS_CATEGORIES.items():
+                value = stats.get(category, 0 if depth == 0 else {})
+                if depth == 0:
+                    rows.append((version, section, category, '', '', value))
+                elif depth == 1:
+                    rows.extend((version, section, category, name, '', count)
+                                for name, count in value.items())
+                else:
+                    rows.extend((version, section, category, name, detail, count)
+                                for name, details in value.items()
+                                for detail, count in details.items())
+
+        with self.transaction() as conn:
+            conn.execute('DELETE FROM stats_counters WHERE version = ?', (version,))
+            conn.executemany(
+                'INSERT INTO stats_counters (version, section, category, name, detail, count) '
+                'VALUES (?, ?, ?, ?, ?, ?)', rows)
+            conn.execute(
+                'INSERT OR REPLACE INTO stats_sessions (version, session_id, session_start) VALUES (?, ?, ?)',
+                (version, session.get('session_id', ''), session_start))
+
+    def load_streaks(self, version: str) -> Optional[Dict]:
+        """Lädt Streak-/Lebensdauer-Werte einer Version ({'session': ..., 'total': ...})"""
+        value = self.get_meta(f"streaks:{version}")
+        return json.loads(value) if value else None
+
+    def save_streaks(self, version: str, session: Dict, total: Dict):
+        """Speichert Streak-/Lebensdauer-Werte (eine Zeile pro Version)"""
+        self.set_meta(f"streaks:{version}", json.dumps({'session': session, 'total': total}))
+
+    # ===== Spieler =====
+
+    def load_players(self, store: str) -> Dict[str, dict]:
+        """Lädt alle Spieler einer Spieler-DB (store = z.B. players_db_live) im Format der Spieler-DB"""
+        with self._lock:
+            player_rows = self._conn.execute(
+                'SELECT name, kills_by_me, deaths_by_them, first_encounter, last_encounter, avatar_url '
+                'FROM players WHERE store = ?', (store,)).fetchall()
+            counter_rows = self._conn.execute(
+                'SELECT player, category, item, count FROM player_counters WHERE store = ?',
+                (store,)).fetchall()
+
+        players = {}
+        for name, kills, deaths, first_encounter, last_encounter, avatar_url in player_rows:
+            players[name] = {
+                'kills_by_me': {'total': kills, 'weapons': {}},
+                'deaths_by_them': {'total': deaths, 'weapons': {}},
+                'my_vehicles_destroyed_by_them': {},
+                'first_encounter': first_encounter,
+                'last_encounter': last_encounter,
+                'avatar_url': avatar_url
+            }
+
+        for player, category, item, count in counter_rows:
+            if player not in players:
+                continue
+            if category in PLAYER_TOTALS:
+                players[player][category]['weapons'][item] = count
+            else:
+                players[player][category][item] = count
+
+        return players
+
+    def increment_player(self, store: str, player_name: str, category: str, item: str, timestamp: str):
+        """
+        Erhöht einen Zähler eines Spielers um 1 (legt den Spieler bei Bedarf an)
+
+        Args:
+            store: Spieler-DB (z.B. players_db_live)
+            player_name: Name des Spielers
+            category: kills_by_me, deaths_by_them oder my_vehicles_destroyed_by_them
+            item: Waffe bzw. Fahrzeug
+            timestamp: Zeitpunkt der Begegnung (ISO)
+        """
+        with self.transaction() as conn:
+            self._ensure_player(conn, store, player_name, timestamp)
+            conn.execute(
+                'INSERT INTO player_counters (store, player, category, item, count) VALUES (?, ?, ?, ?, 1) '
+                'ON CONFLICT (store, player, category, item) DO UPDATE SET count = count + 1',
+                (store, player_name, category, item))
+            if category in PLAYER_TOTALS:
+                # Spaltenname stammt aus PLAYER_TOTALS, nicht aus Eingaben
+                conn.execute(
+                    f'UPDATE players SET {category} = {category} + 1, last_encounter = ? '
+                    'WHERE store = ? AND name = ?',
+                    (timestamp, store, player_name))
+            else:
+                conn.execute('UPDATE players SET last_encounter = ? WHERE store = ? AND name = ?',
+                             (timestamp, store, player_name))
+
+    def set_avatar_url(self, store: str, player_name: str, avatar_url: str, timestamp: str):
+        with self.transaction() as conn:
+            self._ensure_player(conn, store, player_name, timestamp)
+            conn.execute('UPDATE players SET avatar_url = ? WHERE store = ? AND name = ?',
+                         (avatar_url, store, player_name))
+
+    def remove_players(self, store: str, player_names: Iterable[str]):
+        rows = [(store, name) for name in player_names]
+        with self.transaction() as conn:
+            conn.executemany('DELETE FROM player_counters WHERE store = ? AND player = ?', rows)
+            conn.executemany('DELETE FROM players WHERE store = ? AND name = ?', rows)
+
+    def replace_players(self, store: str, players: Dict[str, dict]):
+        """Schreibt eine komplette Spieler-DB neu (Reset, Import)"""
+        player_rows = []
+        counter_rows = []
+        for name, player in players.items():
+            player_rows.append((
+                store,
+                name,
+                player['kills_by_me']['total'],
+                player['deaths_by_them']['total'],
+                player.get('first_encounter'),
+                player.get('last_encounter'),
+                player.get('avatar_url')
+            ))
+            for category in PLAYER_TOTALS:
+                counter_rows.extend((store, name, category, item, count)
+                                    for item, count in player[category]['weapons'].items())
+            counter_rows.extend((store, name, 'my_vehicles_destroyed_by_them', item, count)
+                                for item, count in player['my_vehicles_destroyed_by_them'].items())
+
+        with self.transaction() as conn:
+            conn.execute('DELETE FROM player_counters WHERE store = ?', (store,))
+            conn.execute('DELETE FROM players WHERE store = ?', (store,))
+            conn.executemany(
+                'INSERT INTO players (store, name, kills_by_me, deaths_by_them, first_encounter, '
+                'last_encounter, avatar_url) VALUES (?, ?, ?, ?, ?, ?, ?)', player_rows)
+            conn.executemany(
+                'INSERT INTO player_counters (store, player, category, item, count) VALUES (?, ?, ?, ?, ?)',
+                counter_rows)
+
+    def top_players(self, store: str, column: str, limit: int) -> List[str]:
+        """
+        Gibt die Spieler mit den höchsten Werten einer Summenspalte zurück (Index-Scan)
+
+        Args:
+            store: Spieler-DB (z.B. players_db_live)
+            column: kills_by_me oder deaths_by_them
+            limit: Maximale Anzahl
+        """
+        if column not in PLAYER_TOTALS:
+            raise ValueError(f"Unbekannte Spalte: {column}")
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT name FROM players WHERE store = ? ORDER BY {column} DESC LIMIT ?',
+                (store, limit)).fetchall()
+        return [row[0] for row in rows]
+
+    @staticmethod
+    def _ensure_player(conn, store: str, player_name: str, timestamp: str):
+        conn.execute(
+            'INSERT OR IGNORE INTO players (store, name, first_encounter, last_encounter) VALUES (?, ?, ?, ?)',
+            (store, player_name, timestamp, timestamp))
+
+    # ===== Kataloge =====
+
+    def load_catalog(self, kind: str) -> Dict[str, str]:
+        """Lädt einen Katalog (key -> value, in Einfügereihenfolge)"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT key, value FROM catalog WHERE kind = ? ORDER BY rowid', (kind,)).fetchall()
+        return dict(rows)
+
+    def replace_catalogs(self, catalogs: Dict[str, Dict[str, str]]):
+        """
+        Schreibt Kataloge neu (alle in einer Transaktion - Kataloge sind klein)
+
+        Args:
+            catalogs: kind -> {key -> value}
+        """
+        with self.transaction() as conn:
+            for kind, entries in catalogs.items():
+                conn.execute('DELETE FROM catalog WHERE kind = ?', (kind,))
+                conn.executemany('INSERT INTO catalog (kind, key, value) VALUES (?, ?, ?)',
+                                 [(kind, key, value) for key, value in entries.items()])
+
+
+# Prozessweite Instanz (None = JSON-Dateien)
+_database: Optional[SQLiteDatabase] = None
+
+
+def get_database() -> Optional[SQLiteDatabase]:
+    """Gibt die SQLite-Datenbank zurück, falls das Backend aktiviert ist"""
+    return _database
+
+
+def enable_sqlite(versions: List[str]):
+    """
+    Aktiviert das SQLite-Backend (vor dem Erzeugen der Datenspeicher aufrufen)
+
+    Args:
+        versions: Alle SC Versionen (für den JSON-Import der Statistiken)
+    """
+    global _database
+    try:
+        database = SQLiteDatabase()
+        if not database.get_meta('json_imported') and not import_json_files(database, versions):
+            print("⚠️  SQLite-Backend nicht aktiviert - verwende JSON-Dateien")
+            return
+    except Exception as e:
+        print(f"Fehler beim Öffnen der SQLite-Datenbank: {e}")
+        return
+
+    _database = database
+    print(f"💾 SQLite-Backend aktiv: {database.db_file}")
+
+
+def import_json_files(database: SQLiteDatabase, versions: List[str]) -> bool:
+    """
+    Importiert einmalig alle JSON-Datenspeicher in die SQLite-Datenbank
+
+    Die Datenspeicher werden noch im JSON-Modus geladen (inkl. WAL-Replay), damit auch
+    noch nicht geschriebene Änderungen übernommen werden.
+
+    Returns:
+        True wenn der Import vollständig war
+    """
+    from datetime import datetime
+    from stats_manager import StatsManager
+    from weapon_database import WeaponDatabase
+    from vehicle_database import VehicleDatabase
+    from npc_database import NPCDatabase
+
+    print("💾 Importiere JSON-Dateien in SQLite...")
+    try:
+        for version in versions:
+            stats = StatsManager(version)
+            database.replace_stats(version, stats.session, stats.total, stats.session_start.isoformat())
+            database.save_streaks(version, stats.session['streaks'], stats.total['streaks'])
+
+        if not import_player_files(database, versions):
+            return False
+
+        # Eigene Instanzen (nicht catalogs.py) - das Backend ist noch nicht aktiv, gelesen wird JSON
+        weapon_db = WeaponDatabase()
+        vehicle_db = VehicleDatabase()
+        npc_db = NPCDatabase()
+        database.replace_catalogs({
+            'weapon_names': weapon_db.custom_names,
+            'weapon_blacklist': {name: '' for name in weapon_db.blacklist},
+            'vehicle_names': vehicle_db.custom_names,
+            'vehicle_parents': vehicle_db.parent_vehicles,
+            'npc_patterns': {pattern: '' for pattern in npc_db.patterns}
+        })
+
+        database.set_meta('json_imported', datetime.now().isoformat())
+        print("✅ JSON-Import abgeschlossen (JSON-Dateien bleiben als Backup erhalten)")
+        return True
+    except Exception as e:
+        # Import wird beim nächsten Start wiederholt
+        print(f"Fehler beim JSON-Import: {e}")
+        return False
+
+
+def import_player_files(database: SQLiteDatabase, versions: List[str]) -> bool:
+    """
+    Importiert die Spieler-DBs aller Versionen (players_db_<version>.json) in die SQLite-Datenbank
+
+    Returns:
+        True wenn der Import vollständig war
+    """
+    from player_database import PlayerDatabase
+
+    try:
+        for version in versions:
+            player_db = PlayerDatabase(f"players_db_{version.lower()}.json")
+            database.replace_players(player_db.store, player_db.players)
+        return True
+    except Exception as e:
+        # Import wird beim nächsten Start wiederholt
+        print(f"Fehler beim Import der Spieler-DBs: {e}")
+        return False
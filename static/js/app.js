@@ -12,6 +12,18 @@ let loadingTimeout = null;
 let weaponNames = {};
 let vehicleNames = {};
 
+// Verwaltung: serverseitige Suche, eine Seite pro Anfrage
+const CATALOG_PAGE_SIZE = 100;
+let weaponOffset = 0;
+let vehicleOffset = 0;
+let catalogSearchTimeout = null;
+const catalogRequests = {};  // Laufende Anfrage pro Katalog (URL -> AbortController)
+
+// Live-Stats (vollständiger Stand + stats_delta Sequenznummer)
+let liveStats = null;
+let liveStatsVersion = null;
+let liveStatsSeq = 0;
+
 // Initialize
 document.addEventListener('DOMContentLoaded', async () => {
     await loadLanguage();  // Sprache zuerst laden
@@ -74,10 +86,30 @@ function initSocket() {
     
     socket.on('stats_updated', (data) => {
         if (data.version === currentVersion) {
+            liveStats = data.stats;
+            liveStatsVersion = data.version;
+            liveStatsSeq = data.seq || 0;
             updateStats(data.stats);
         }
     });
     
+    socket.on('stats_delta', (data) => {
+        if (data.version !== currentVersion) return;
+        
+        // Kein Stand oder Lücke -> vollständige Stats anfordern
+        if (!liveStats || liveStatsVersion !== data.version || data.seq > liveStatsSeq + 1) {
+            liveStats = null;
+            socket.emit('request_stats', { version: data.version });
+            return;
+        }
+        // Bereits im Snapshot enthalten
+        if (data.seq <= liveStatsSeq) return;
+        
+        applyStatsDelta(liveStats, data);
+        liveStatsSeq = data.seq;
+        updateStats(liveStats);
+    });
+    
     socket.on('new_event', (data) => {
         if (data.version === currentVersion) {
             addEvent(data.event);
@@ -286,6 +318,8 @@ async function loadStats(version) {
     try {
         const response = await fetch(`/api/stats/${version}`);
         const data = await response.json();
+        // /api/stats liefert Anzeigenamen - nächstes stats_delta fordert den Live-Stand an
+        liveStats = null;
         updateStats(data);
     } catch (error) {
         console.error('Fehler beim Laden der Statistiken:', error);
@@ -293,6 +327,26 @@ async function loadStats(version) {
 }
 
 // Update Stats Display
+// Wendet ein stats_delta an: Zähler ersetzen, Map-Zuwächse (inc) in session und total addieren
+function applyStatsDelta(stats, delta) {
+    const addCounts = (target, increments) => {
+        Object.entries(increments).forEach(([key, value]) => {
+            if (typeof value === 'object') {
+                target[key] = target[key] || {};
+                addCounts(target[key], value);
+            } else {
+                target[key] = (target[key] || 0) + value;
+            }
+        });
+    };
+    
+    ['session', 'total'].forEach(section => {
+        Object.assign(stats[section], delta[section]);
+        addCounts(stats[section], delta.inc);
+    });
+    stats.session_id = delta.session.session_id;
+}
+
 function updateStats(stats) {
     if (!stats) return;
     
@@ -365,18 +419,20 @@ function updateStatsSection(type, data) {
                 const div = document.createElement('div');
                 div.className = 'victim-item';
                 
-                // Map weapons to display names
+                // Map weapons to display names (weapons: internal -> count)
                 const weaponCounts = {};
-                weapons.forEach(w => {
+                let killCount = 0;
+                Object.entries(weapons).forEach(([w, count]) => {
                     const display = getWeaponDisplayName(w);
-                    weaponCounts[display] = (weaponCounts[display] || 0) + 1;
+                    weaponCounts[display] = (weaponCounts[display] || 0) + count;
+                    killCount += count;
                 });
                 
                 const weaponStr = Object.entries(weaponCounts)
                     .map(([w, c]) => `${w} (${c}x)`)
                     .join(', ');
                 
-                div.innerHTML = `<strong>${victim}</strong> (${weapons.length}x)<br>
+                div.innerHTML = `<strong>${victim}</strong> (${killCount}x)<br>
                                 <small style="color: var(--text-secondary)">${weaponStr}</small>`;
                 victimsContainer.appendChild(div);
             });
@@ -714,10 +770,53 @@ async function saveSettings() {
 }
 
 // Weapons
-async function loadWeapons() {
+// Lädt eine Seite der Suchtreffer (q = Suchfeld, sortiert nach Nutzung)
+// Gibt null zurück, wenn inzwischen eine neuere Anfrage läuft (langsame ältere Antworten verwerfen)
+async function fetchCatalogPage(url, searchInputId, offset) {
+    const params = new URLSearchParams({
+        q: document.getElementById(searchInputId).value,
+        sort: 'usage',
+        limit: CATALOG_PAGE_SIZE,
+        offset
+    });
+
+    if (catalogRequests[url]) catalogRequests[url].abort();
+    const controller = new AbortController();
+    catalogRequests[url] = controller;
+
     try {
-        const response = await fetch('/api/weapons');
+        const response = await fetch(`${url}?${params}`, { signal: controller.signal });
         const data = await response.json();
+        return catalogRequests[url] === controller ? data : null;
+    } catch (error) {
+        if (error.name === 'AbortError') return null;
+        throw error;
+    }
+}
+
+// Blättern unter der Tabelle (nur wenn es mehr als eine Seite gibt)
+function renderCatalogPager(container, data, onPage) {
+    if (data.total <= data.limit) return;
+
+    const pager = document.createElement('div');
+    pager.className = 'catalog-pager';
+    const last = Math.min(data.offset + data.limit, data.total);
+    pager.innerHTML = `
+        <button class="btn" ${data.offset === 0 ? 'disabled' : ''} data-offset="${Math.max(0, data.offset - data.limit)}">◀</button>
+        <span>${data.offset + 1}–${last} / ${data.total}</span>
+        <button class="btn" ${last >= data.total ? 'disabled' : ''} data-offset="${data.offset + data.limit}">▶</button>
+    `;
+    pager.querySelectorAll('button').forEach(btn => {
+        btn.addEventListener('click', () => onPage(parseInt(btn.dataset.offset, 10)));
+    });
+    container.appendChild(pager);
+}
+
+async function loadWeapons(offset = weaponOffset) {
+    try {
+        const data = await fetchCatalogPage('/api/weapons', 'weaponSearch', offset);
+        if (!data) return;
+        weaponOffset = data.offset;
 
         const container = document.getElementById('weaponsList');
         container.innerHTML = `
@@ -735,16 +834,10 @@ async function loadWeapons() {
         `;
         
         const tbody = container.querySelector('tbody');
-        
-        // Sortiere Waffen
-        const sortedWeapons = Object.entries(data.weapons).sort((a, b) => 
-            a[1].localeCompare(b[1])
-        );
-        
-        sortedWeapons.forEach(([internal, display]) => {
+
+        // Server liefert eine Seite, bereits nach Nutzung sortiert
+        data.items.forEach(({ internal, display, blacklisted: isBlacklisted, custom: isCustom }) => {
             const tr = document.createElement('tr');
-            const isBlacklisted = data.blacklist.includes(internal);
-            const isCustom = data.custom_names && data.custom_names[internal];
 
             tr.innerHTML = `
                 <td style="font-family: monospace; font-size: 0.85rem">${escapeHtml(internal)}</td>
@@ -758,6 +851,8 @@ async function loadWeapons() {
             tbody.appendChild(tr);
         });
 
+        renderCatalogPager(container, data, loadWeapons);
+
         // Event listeners
         container.querySelectorAll('.weapon-name-input').forEach(input => {
             input.addEventListener('change', function() {
@@ -862,10 +957,11 @@ async function addWeaponCustomName(internal, display) {
 }
 
 // Vehicles
-async function loadVehicles() {
+async function loadVehicles(offset = vehicleOffset) {
     try {
-        const response = await fetch('/api/vehicles');
-        const data = await response.json();
+        const data = await fetchCatalogPage('/api/vehicles', 'vehicleSearch', offset);
+        if (!data) return;
+        vehicleOffset = data.offset;
 
         const container = document.getElementById('vehiclesList');
         container.innerHTML = `
@@ -883,15 +979,10 @@ async function loadVehicles() {
         `;
         
         const tbody = container.querySelector('tbody');
-        
-        const sortedVehicles = Object.entries(data.vehicles).sort((a, b) => 
-            a[1].localeCompare(b[1])
-        );
-        
-        sortedVehicles.forEach(([internal, display]) => {
+
+        // Server liefert eine Seite, bereits nach Nutzung sortiert
+        data.items.forEach(({ internal, display, parent: parentVehicle, custom: isCustom }) => {
             const tr = document.createElement('tr');
-            const isCustom = data.custom_names && data.custom_names[internal];
-            const parentVehicle = data.parent_vehicles && data.parent_vehicles[internal] ? data.parent_vehicles[internal] : internal;
             const isAggregated = parentVehicle !== internal;
 
             tr.innerHTML = `
@@ -914,6 +1005,8 @@ async function loadVehicles() {
             tbody.appendChild(tr);
         });
 
+        renderCatalogPager(container, data, loadVehicles);
+
         container.querySelectorAll('.vehicle-name-input').forEach(input => {
             input.addEventListener('change', function() {
                 updateVehicleName(this.dataset.internal, this.value);
@@ -1657,50 +1750,16 @@ async function resetSession() {
     }
 }
 
-// Filter Weapons
+// Filter Weapons (Suche läuft serverseitig, kurz nach der letzten Eingabe)
 function filterWeapons() {
-    const searchTerm = document.getElementById('weaponSearch').value.toLowerCase();
-    const table = document.querySelector('#weaponsList table');
-
-    if (!table) return;
-
-    const rows = table.querySelectorAll('tbody tr');
-
-    rows.forEach(row => {
-        const internalName = row.querySelector('td:nth-child(1)').textContent.toLowerCase();
-        const displayInput = row.querySelector('.weapon-name-input');
-        const displayName = displayInput ? displayInput.value.toLowerCase() : '';
-
-        // Zeige Zeile wenn Suchbegriff in internem Namen ODER Anzeigenamen vorkommt
-        if (internalName.includes(searchTerm) || displayName.includes(searchTerm)) {
-            row.style.display = '';
-        } else {
-            row.style.display = 'none';
-        }
-    });
+    clearTimeout(catalogSearchTimeout);
+    catalogSearchTimeout = setTimeout(() => loadWeapons(0), 200);
 }
 
 // Filter Vehicles
 function filterVehicles() {
-    const searchTerm = document.getElementById('vehicleSearch').value.toLowerCase();
-    const table = document.querySelector('#vehiclesList table');
-
-    if (!table) return;
-
-    const rows = table.querySelectorAll('tbody tr');
-
-    rows.forEach(row => {
-        const internalName = row.querySelector('td:nth-child(1)').textContent.toLowerCase();
-        const displayInput = row.querySelector('.vehicle-name-input');
-        const displayName = displayInput ? displayInput.value.toLowerCase() : '';
-
-        // Zeige Zeile wenn Suchbegriff in internem Namen ODER Anzeigenamen vorkommt
-        if (internalName.includes(searchTerm) || displayName.includes(searchTerm)) {
-            row.style.display = '';
-        } else {
-            row.style.display = 'none';
-        }
-    });
+    clearTimeout(catalogSearchTimeout);
+    catalogSearchTimeout = setTimeout(() => loadVehicles(0), 200);
 }
 
 // ========================================
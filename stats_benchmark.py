@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Verse Combat Log - Stats Benchmark
+Misst Dateigröße, stats_updated Payload und Speicher-Latenz der Statistiken bei vielen PvP-Kills
+
+Vergleicht das Zähler-Format von pvp_victims (Spieler -> {Waffe -> Count}) mit dem
+alten Listen-Format (Spieler -> [Waffe, Waffe, ...]):
+
+    python stats_benchmark.py --kills 10000 --victims 300 --weapons 8
+
+Arbeitet mit einer eigenen Version (BENCHMARK) - echte Statistiken bleiben unberührt.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from persistence import persistence
+from stats_manager import StatsManager
+
+BENCHMARK_VERSION = 'BENCHMARK'
+
+
+def expand_victims(victims: dict) -> dict:
+    """Wandelt Zähler zurück ins alte Listen-Format (eine Waffe pro Kill)"""
+    return {
+        victim: [weapon for weapon, count in weapons.items() for _ in range(count)]
+        for victim, weapons in victims.items()
+    }
+
+
+def measure(stats: StatsManager, repeats: int) -> dict:
+    """Misst Snapshot-Größe, Payload-Größe und Schreib-Latenz"""
+    write_times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        stats._write()
+        write_times.append(time.perf_counter() - start)
+
+    payload = json.dumps({'version': stats.version, 'stats': stats.get_all_stats()})
+
+    return {
+        'file_kb': os.path.getsize(stats.stats_file) / 1024,
+        'payload_kb': len(payload.encode('utf-8')) / 1024,
+        'save_ms': statistics.median(write_times) * 1000
+    }
+
+
+def cleanup(stats: StatsManager):
+    """Entfernt die Benchmark-Dateien (Statistiken und Rollups)"""
+    for data_file in (stats.stats_file, stats.rollups.rollup_file):
+        persistence.flush(data_file)
+        for path in (data_file, f"{data_file}.wal", f"{data_file}.tmp"):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark für pvp_victims Speicherformat')
+    parser.add_argument('--kills', type=int, default=10000, help='Anzahl PvP-Kills (Session und Total)')
+    parser.add_argument('--victims', type=int, default=300, help='Anzahl verschiedener Opfer')
+    parser.add_argument('--weapons', type=int, default=8, help='Anzahl verschiedener Waffen')
+    parser.add_argument('--repeats', type=int, default=5, help='Wiederholungen pro Messung (Median)')
+    args = parser.parse_args()
+
+    stats = StatsManager(BENCHMARK_VERSION)
+    cleanup(stats)
+    stats = StatsManager(BENCHMARK_VERSION)
+
+    try:
+        rng = random.Random(42)
+        victims = [f"Player_{i}" for i in range(args.victims)]
+        weapons = [f"behr_rifle_ballistic_{i:02d}" for i in range(args.weapons)]
+
+        start = time.perf_counter()
+        for _ in range(args.kills):
+            stats.add_kill(True, rng.choice(weapons), rng.choice(victims))
+        add_duration = time.perf_counter() - start
+
+        counters = measure(stats, args.repeats)
+
+        # Altes Format simulieren
+        counter_session = stats.session['pvp_victims']
+        counter_total = stats.total['pvp_victims']
+        stats.session['pvp_victims'] = expand_victims(counter_session)
+        stats.total['pvp_victims'] = expand_victims(counter_total)
+        legacy = measure(stats, args.repeats)
+        stats.session['pvp_victims'] = counter_session
+        stats.total['pvp_victims'] = counter_total
+
+        print(f"\n=== {args.kills} PvP-Kills, {args.victims} Opfer, {args.weapons} Waffen ===")
+        print(f"  add_kill:              {add_duration / args.kills * 1_000_000:.1f} µs/Kill\n")
+        print(f"  {'':24}{'Liste (alt)':>14}{'Zähler':>14}")
+        print(f"  {'Datei (KB)':24}{legacy['file_kb']:>14.1f}{counters['file_kb']:>14.1f}")
+        print(f"  {'stats_updated (KB)':24}{legacy['payload_kb']:>14.1f}{counters['payload_kb']:>14.1f}")
+        print(f"  {'Snapshot schreiben (ms)':24}{legacy['save_ms']:>14.2f}{counters['save_ms']:>14.2f}")
+    finally:
+        cleanup(stats)
+
+
+if __name__ == '__main__':
+    main()
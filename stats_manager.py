@@ -6,15 +6,57 @@ WICHTIG: Speichert INTERNE Namen, Display-Namen werden im Frontend gemappt
 
 import json
 import os
+import threading
 from collections import defaultdict
-from datetime import datetime
-from typing import Dict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
 from utils import get_data_file_path
+from tracing import traced
+from metrics import STORE_SAVE_SECONDS, timed
+from persistence import persistence, synchronized, dump_json, write_text_file, replay_wal
+from stats_rollups import StatsRollups
+from session_history import SessionHistory
+from name_index import NameIndex
+from sqlite_store import get_database
+
+
+def _event_time(timestamp: Optional[datetime]) -> str:
+    """Normalisiert einen Log-Zeitstempel auf ISO/UTC (ohne Zeitstempel = jetzt)"""
+    if timestamp is None:
+        timestamp = datetime.now(timezone.utc)
+    elif timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.isoformat()
+
+
+def _copy_counts(counts: Dict) -> Dict:
+    """Kopiert eine Zähler-Map ({key: n} bzw. {key: {subkey: n}}) für einen Snapshot"""
+    return {key: dict(value) if isinstance(value, dict) else value for key, value in counts.items()}
+
+
+def _merge_counts(target: Dict, increments: Dict):
+    """Addiert verschachtelte Zähler ({key: n} bzw. {key: {subkey: n}}) in target"""
+    for key, value in increments.items():
+        if isinstance(value, dict):
+            _merge_counts(target.setdefault(key, {}), value)
+        else:
+            target[key] = target.get(key, 0) + value
 
 
 class StatsManager:
     """Verwaltet Statistiken für eine SC Version"""
 
+    # Änderungen sind über das WAL sofort crash-sicher - Snapshots nur alle 30s
+    SNAPSHOT_INTERVAL = 30.0
+    # Einträge pro Top-Liste im Session-Archiv
+    ARCHIVE_TOP = 5
+    # Maps mit Spielernamen als Schlüssel (werden bei neuen NPC-Patterns bereinigt)
+    PLAYER_CATEGORIES = ('pvp_victims', 'death_by_players', 'vehicle_losses_by_player')
+    # Maps eines Abschnitts in get_all_stats (werden beim Veröffentlichen nur kopiert, wenn geändert)
+    MAP_CATEGORIES = ('weapon_kills', 'pvp_victims', 'death_weapons', 'death_by_players',
+                      'vehicle_kills', 'vehicle_losses_by_player')
+
     def __init__(self, version: str):
         self.version = version
         self.stats_file = get_data_file_path(f"stats_{version.lower()}.json")
@@ -23,8 +65,42 @@ class StatsManager:
         self.total = self._create_empty_stats()
         self.session_start = datetime.now()
 
-        # Lazy-loaded VehicleDatabase für Aggregation (nur einmal instanziieren)
+        # Gemeinsame VehicleDatabase für Aggregation (lazy, siehe catalogs.py)
         self._vehicle_db = None
+        self._parent_revision = None
+
+        # Abgeleitete Werte pro Abschnitt (PvP-Tode, Fahrzeug-Aggregation) - inkrementell
+        # gepflegt, None = beim nächsten Zugriff neu berechnen
+        self._derived = {'session': None, 'total': None}
+        # Mutationszähler + veröffentlichter, unveränderlicher Stand für get_all_stats
+        # (Copy-on-Write: Leser lesen nur die Referenz _published - ohne Lock)
+        self._revision = 0
+        self._published = None
+        self._published_revision = -1
+        self._dirty_maps: Dict[str, set] = {}  # MAP_CATEGORIES -> seit dem letzten Veröffentlichen geänderte Schlüssel
+        self._republish_all = False
+        self._batch_depth = 0
+
+        # Delta-Updates für das Frontend (stats_delta): Zähler-Änderungen seit dem letzten
+        # Senden, versiegelte Deltas und Sequenznummer. _resync = komplettes stats_updated nötig
+        self._seq = 0
+        self._pending_delta: Dict = {}
+        self._delta_pending = False
+        self._outbox: List[Dict] = []
+        self._resync = True
+
+        # Schützt session/total gegen gleichzeitiges Schreiben durch den Flush-Thread
+        self._lock = threading.RLock()
+
+        # Optionales SQLite-Backend (None = JSON-Snapshot + WAL)
+        self._db = get_database()
+
+        # Stunden-/Tages-Zeitreihen (eigene Datei + WAL)
+        self.rollups = StatsRollups(version)
+        # Archiv abgeschlossener Sessions (append-only)
+        self.history = SessionHistory(version)
+        # Alle Spielernamen in pvp_victims, death_by_players, vehicle_losses_by_player (NPC-Neubewertung)
+        self.names = NameIndex()
 
         self.load()
     
@@ -36,14 +112,30 @@ class StatsManager:
             'pvp_kills': 0,
             'deaths': 0,
             'weapon_kills': {},  # Internal Name -> Count
-            'pvp_victims': {},  # Player Name -> [Internal Weapon Names]
+            'pvp_victims': {},  # Player Name -> {Internal Weapon Name -> Count}
             'death_weapons': {},  # Internal Name -> Count
             'death_by_players': {},  # Player Name -> Count
             'vehicle_kills': {},  # Internal Vehicle Name -> Count
-            'vehicle_losses_by_player': {}  # Player Name -> {Internal Vehicle Name -> Count}
+            'vehicle_losses_by_player': {},  # Player Name -> {Internal Vehicle Name -> Count}
+            'streaks': self._create_empty_streaks()
+        }
+
+    @staticmethod
+    def _create_empty_streaks() -> Dict:
+        """Erstellt leere Streak-/Lebensdauer-Werte (inkrementell aus Log-Zeitstempeln gepflegt)"""
+        return {
+            'current_streak': 0,  # Kills seit dem letzten Tod
+            'best_streak': 0,
+            'lives': 0,  # Abgeschlossene Leben (Tod bis Tod)
+            'alive_seconds': 0.0,  # Summe der Lebensdauer aller abgeschlossenen Leben
+            'longest_life': 0.0,  # Sekunden
+            'life_start': None  # ISO-Zeitstempel des aktuellen Lebens
         }
     
-    def add_kill(self, is_pvp: bool, weapon_internal: str, victim_name: str = None):
+    @traced('stats.add_kill')
+    @synchronized
+    def add_kill(self, is_pvp: bool, weapon_internal: str, victim_name: str = None,
+                 timestamp: Optional[datetime] = None):
         """
         Fügt einen Kill hinzu
         
@@ -51,18 +143,43 @@ class StatsManager:
             is_pvp: Ob PvP Kill
             weapon_internal: INTERNER Waffenname aus Log
             victim_name: Name des Opfers (bei PvP)
+            timestamp: Log-Zeitstempel (für Rollups und Streaks)
         """
+        event_time = _event_time(timestamp)
+        counters = [('pvp_kills' if is_pvp else 'pve_kills',), ('weapon_kills', weapon_internal)]
+        if is_pvp and victim_name:
+            counters.append(('pvp_victims', victim_name, weapon_internal))
+        self._log_change(counters, 'add_kill', is_pvp, weapon_internal, victim_name, event_time)
+        self._apply_add_kill(is_pvp, weapon_internal, victim_name, event_time)
+        self._persist_streaks()
+        self.save()
+        self._publish_changes()
+
+        increments = {
+            'pvp_kills' if is_pvp else 'pve_kills': 1,
+            'weapon_kills': {weapon_internal: 1}
+        }
+        if is_pvp and victim_name:
+            increments['pvp_victims'] = {victim_name: 1}
+        self.rollups.record(timestamp, increments)
+
+    def _apply_add_kill(self, is_pvp: bool, weapon_internal: str, victim_name: str = None,
+                        timestamp: str = None):
+        """Wendet einen Kill an (auch beim WAL-Replay)"""
         if is_pvp:
             self.session['pvp_kills'] += 1
             self.total['pvp_kills'] += 1
             if victim_name:
+                self.names.add(victim_name)
                 if victim_name not in self.session['pvp_victims']:
-                    self.session['pvp_victims'][victim_name] = []
+                    self.session['pvp_victims'][victim_name] = {}
                 if victim_name not in self.total['pvp_victims']:
-                    self.total['pvp_victims'][victim_name] = []
-                
-                self.session['pvp_victims'][victim_name].append(weapon_internal)
-                self.total['pvp_victims'][victim_name].append(weapon_internal)
+                    self.total['pvp_victims'][victim_name] = {}
+
+                session_weapons = self.session['pvp_victims'][victim_name]
+                session_weapons[weapon_internal] = session_weapons.get(weapon_internal, 0) + 1
+                total_weapons = self.total['pvp_victims'][victim_name]
+                total_weapons[weapon_internal] = total_weapons.get(weapon_internal, 0) + 1
         else:
             self.session['pve_kills'] += 1
             self.total['pve_kills'] += 1
@@ -72,17 +189,44 @@ class StatsManager:
             self.session['weapon_kills'].get(weapon_internal, 0) + 1
         self.total['weapon_kills'][weapon_internal] = \
             self.total['weapon_kills'].get(weapon_internal, 0) + 1
-        
-        self.save()
+
+        self._update_streaks(timestamp, died=False)
+
+        increments = {'weapon_kills': {weapon_internal: 1}}
+        if is_pvp and victim_name:
+            increments['pvp_victims'] = {victim_name: {weapon_internal: 1}}
+        self._record_delta(increments)
     
-    def add_death(self, weapon_internal: str, killer_name: str = None):
+    @traced('stats.add_death')
+    @synchronized
+    def add_death(self, weapon_internal: str, killer_name: str = None,
+                  timestamp: Optional[datetime] = None):
         """
         Fügt einen Tod hinzu
         
         Args:
             weapon_internal: INTERNER Waffenname
             killer_name: Name des Killers (bei PvP)
+            timestamp: Log-Zeitstempel (für Rollups und Lebensdauer)
         """
+        event_time = _event_time(timestamp)
+        counters = [('deaths',), ('death_weapons', weapon_internal)]
+        if killer_name:
+            counters.append(('death_by_players', killer_name))
+        self._log_change(counters, 'add_death', weapon_internal, killer_name, event_time)
+        self._apply_add_death(weapon_internal, killer_name, event_time)
+        self._persist_streaks()
+        self.save()
+        self._publish_changes()
+
+        increments = {'deaths': 1}
+        if killer_name:
+            increments['pvp_deaths'] = 1
+            increments['pvp_killers'] = {killer_name: 1}
+        self.rollups.record(timestamp, increments)
+
+    def _apply_add_death(self, weapon_internal: str, killer_name: str = None, timestamp: str = None):
+        """Wendet einen Tod an (auch beim WAL-Replay)"""
         self.session['deaths'] += 1
         self.total['deaths'] += 1
         
@@ -92,27 +236,56 @@ class StatsManager:
             self.total['death_weapons'].get(weapon_internal, 0) + 1
         
         if killer_name:
+            self.names.add(killer_name)
             self.session['death_by_players'][killer_name] = \
                 self.session['death_by_players'].get(killer_name, 0) + 1
             self.total['death_by_players'][killer_name] = \
                 self.total['death_by_players'].get(killer_name, 0) + 1
-        
-        self.save()
+
+            for derived in self._derived.values():
+                if derived is not None:
+                    derived['pvp_deaths'] += 1
+
+        self._update_streaks(timestamp, died=True)
+
+        increments = {'death_weapons': {weapon_internal: 1}}
+        if killer_name:
+            increments['death_by_players'] = {killer_name: 1}
+        self._record_delta(increments)
     
-    def add_vehicle_kill(self, vehicle_internal: str):
+    @traced('stats.add_vehicle_kill')
+    @synchronized
+    def add_vehicle_kill(self, vehicle_internal: str, timestamp: Optional[datetime] = None):
         """
         Fügt Fahrzeug-Kill hinzu
 
         Args:
             vehicle_internal: INTERNER Fahrzeugname (normalisiert, ohne ID)
+            timestamp: Log-Zeitstempel (für Rollups)
         """
+        self._log_change([('vehicle_kills', vehicle_internal)], 'add_vehicle_kill', vehicle_internal)
+        self._apply_add_vehicle_kill(vehicle_internal)
+        self.save()
+        self._publish_changes()
+
+        self.rollups.record(timestamp, {'vehicle_kills': {vehicle_internal: 1}})
+
+    def _apply_add_vehicle_kill(self, vehicle_internal: str):
+        """Wendet einen Fahrzeug-Kill an (auch beim WAL-Replay)"""
         self.session['vehicle_kills'][vehicle_internal] = \
             self.session['vehicle_kills'].get(vehicle_internal, 0) + 1
         self.total['vehicle_kills'][vehicle_internal] = \
             self.total['vehicle_kills'].get(vehicle_internal, 0) + 1
 
-        self.save()
+        parent = self._get_vehicle_db().get_parent_vehicle(vehicle_internal)
+        for derived in self._derived.values():
+            if derived is not None:
+                derived['vehicle_kills'][parent] = derived['vehicle_kills'].get(parent, 0) + 1
+
+        self._record_delta({'vehicle_kills': {parent: 1}})
 
+    @traced('stats.add_vehicle_loss')
+    @synchronized
     def add_vehicle_loss(self, vehicle_internal: str, destroyer_name: str):
         """
         Fügt Verlust eines eigenen Fahrzeugs hinzu
@@ -121,6 +294,15 @@ class StatsManager:
             vehicle_internal: INTERNER Fahrzeugname (normalisiert, ohne ID)
             destroyer_name: Name des Spielers der das Fahrzeug zerstört hat
         """
+        self._log_change([('vehicle_losses_by_player', destroyer_name, vehicle_internal)],
+                         'add_vehicle_loss', vehicle_internal, destroyer_name)
+        self._apply_add_vehicle_loss(vehicle_internal, destroyer_name)
+        self.save()
+        self._publish_changes()
+
+    def _apply_add_vehicle_loss(self, vehicle_internal: str, destroyer_name: str):
+        """Wendet einen Fahrzeug-Verlust an (auch beim WAL-Replay)"""
+        self.names.add(destroyer_name)
         # Session
         if destroyer_name not in self.session['vehicle_losses_by_player']:
             self.session['vehicle_losses_by_player'][destroyer_name] = {}
@@ -133,10 +315,79 @@ class StatsManager:
         self.total['vehicle_losses_by_player'][destroyer_name][vehicle_internal] = \
             self.total['vehicle_losses_by_player'][destroyer_name].get(vehicle_internal, 0) + 1
 
+        parent = self._get_vehicle_db().get_parent_vehicle(vehicle_internal)
+        for derived in self._derived.values():
+            if derived is not None:
+                losses = derived['vehicle_losses_by_player'].setdefault(destroyer_name, {})
+                losses[parent] = losses.get(parent, 0) + 1
+
+        self._record_delta({'vehicle_losses_by_player': {destroyer_name: {parent: 1}}})
+
+    def _update_streaks(self, timestamp: Optional[str], died: bool):
+        """
+        Aktualisiert Kill-Streak und Lebensdauer in Session und Total (O(1) pro Event)
+
+        Ein Leben reicht von Tod zu Tod (inkl. Respawn-Zeit - die Respawn-Zeile wird nur für
+        andere Spieler ausgewertet). Das erste Leben einer Game-Session bzw. Log-Datei beginnt
+        mit ihrem ersten Kill bzw. Tod (siehe end_life()).
+
+        Args:
+            timestamp: ISO-Zeitstempel des Events (None bei alten WAL-Einträgen)
+            died: Tod (sonst Kill)
+        """
+        for stats in (self.session, self.total):
+            streaks = stats['streaks']
+            if died:
+                if streaks['life_start'] and timestamp:
+                    life = (datetime.fromisoformat(timestamp)
+                            - datetime.fromisoformat(streaks['life_start'])).total_seconds()
+                    life = max(0.0, life)
+                    streaks['lives'] += 1
+                    streaks['alive_seconds'] += life
+                    streaks['longest_life'] = max(streaks['longest_life'], life)
+                streaks['current_streak'] = 0
+                streaks['life_start'] = timestamp
+            else:
+                streaks['current_streak'] += 1
+                streaks['best_streak'] = max(streaks['best_streak'], streaks['current_streak'])
+                if not streaks['life_start']:
+                    streaks['life_start'] = timestamp
+
+    @synchronized
+    def end_life(self):
+        """
+        Beendet das laufende Leben ungezählt (neue Game-Session bzw. Log-Datei)
+
+        Sonst zählt die Zeit zwischen dem letzten Tod der alten und dem ersten Tod der neuen
+        Session (z.B. eine Nacht offline) als ein Leben.
+        """
+        if not self.session['streaks']['life_start'] and not self.total['streaks']['life_start']:
+            return
+        if self._db is None:
+            self._wal.append('end_life')
+        self._apply_end_life()
+        self._persist_streaks()
         self.save()
+        self._publish_changes()
+
+    def _apply_end_life(self):
+        """Verwirft den Beginn des laufenden Lebens (auch beim WAL-Replay)"""
+        for stats in (self.session, self.total):
+            stats['streaks']['life_start'] = None
+        self._record_delta({})
+
+    def _persist_streaks(self):
+        """SQLite: Streak-Werte zeilenweise sichern (JSON: Teil des Snapshots)"""
+        if self._db is not None:
+            self._db.save_streaks(self.version, self.session['streaks'], self.total['streaks'])
     
+    @traced('stats.reset_session')
+    @synchronized
     def reset_session(self, remove_from_total: bool = False):
-        """Setzt Session zurück"""
+        """Setzt Session zurück (abgeschlossene Session wird archiviert, außer sie wird verworfen)"""
+        if not remove_from_total:
+            self._archive_session()
+
         if remove_from_total:
             # Entferne Session-Daten aus Total
             self.total['pve_kills'] = max(0, self.total['pve_kills'] - self.session['pve_kills'])
@@ -184,8 +435,36 @@ class StatsManager:
 
         self.session = self._create_empty_stats()
         self.session_start = datetime.now()
-        self.save()
+        # Kill-Streak läuft über Sessions weiter, die Lebensdauer nicht (Zeitpunkt unbekannt)
+        self.total['streaks']['life_start'] = None
+        self._invalidate()
+        self._save_now()
+        self._publish_changes()
     
+    def _archive_session(self):
+        """Schreibt eine Zusammenfassung der aktuellen Session ins Archiv (leere Sessions nicht)"""
+        session = self.session
+        if not (session['pve_kills'] or session['pvp_kills'] or session['deaths']
+                or session['vehicle_kills'] or session['vehicle_losses_by_player']):
+            return
+
+        def top(counts: Dict[str, int]) -> List[List]:
+            ranked = sorted(counts.items(), key=lambda item: item[1], reverse=True)
+            return [[name, count] for name, count in ranked[:self.ARCHIVE_TOP]]
+
+        self.history.append({
+            **self._format_counters(session, self._get_derived('session')),
+            'start': self.session_start.isoformat(),
+            'end': datetime.now().isoformat(),
+            'vehicle_kills': sum(session['vehicle_kills'].values()),
+            'vehicle_losses': sum(
+                sum(vehicles.values()) for vehicles in session['vehicle_losses_by_player'].values()),
+            'top_weapons': top(session['weapon_kills']),  # INTERN!
+            'top_victims': top({
+                victim: sum(weapons.values()) for victim, weapons in session['pvp_victims'].items()}),
+            'top_killers': top(session['death_by_players'])
+        })
+
     def merge_session_to_total(self):
         """Merged Session in Total (Server-Swap)"""
         self.save()
@@ -194,97 +473,277 @@ class StatsManager:
         """Gibt aktuelle Session-ID zurück"""
         return self.session.get('session_id', '')
 
+    @synchronized
     def set_session_id(self, session_id: str):
         """Setzt Session-ID"""
-        self.session['session_id'] = session_id
+        if self._db is not None:
+            self._db.set_session(self.version, session_id, self.session_start.isoformat())
+        else:
+            self._wal.append('set_session_id', session_id)
+        self._apply_set_session_id(session_id)
+        self._persist_streaks()
         self.save()
+        self._publish_changes()
 
-    def recalculate_npc_stats(self, npc_db):
+    def _apply_set_session_id(self, session_id: str):
+        """Setzt Session-ID (auch beim WAL-Replay)"""
+        if session_id != self.session.get('session_id', ''):
+            # Neue Game-Session - das laufende Leben endet ungezählt (siehe end_life())
+            self._apply_end_life()
+        self.session['session_id'] = session_id
+        self._record_delta({})
+
+    @synchronized
+    def recalculate_npc_stats(self, npc_db, pattern: Optional[str] = None) -> int:
         """
-        Bewertet alle Stats neu basierend auf aktuellen NPC-Patterns
+        Bewertet Stats neu basierend auf aktuellen NPC-Patterns
+
+        Geprüft werden nur Namen, die das geänderte Pattern enthalten (über den Namens-Index).
+        Die Korrektur geht nur in eine Richtung: als NPC erkannte Gegner werden aus den
+        PvP-Maps entfernt und ihre Kills zu PvE - ehemalige NPCs lassen sich nicht
+        zurückholen, da PvE-Kills ohne Namen gespeichert sind. Die Stunden- und Tages-Buckets
+        der Rollups werden genauso korrigiert (soweit sie die Gegnernamen enthalten).
 
         Args:
             npc_db: NPCDatabase Instanz mit aktuellen Patterns
-        """
-        for stats_type in ['session', 'total']:
-            stats = self.session if stats_type == 'session' else self.total
-
-            # Finde alle Spieler in pvp_victims die jetzt als NPCs erkannt werden
-            npcs_in_victims = []
-            for victim_name in list(stats['pvp_victims'].keys()):
-                if npc_db.is_npc(victim_name):
-                    npcs_in_victims.append(victim_name)
-
-            # Korrigiere pvp_victims
-            for npc_name in npcs_in_victims:
-                weapon_list = stats['pvp_victims'][npc_name]
-                # Reduziere PvP Kills um Anzahl der Kills
-                stats['pvp_kills'] = max(0, stats['pvp_kills'] - len(weapon_list))
-                # Erhöhe PvE Kills
-                stats['pve_kills'] += len(weapon_list)
-                # Entferne aus pvp_victims
-                del stats['pvp_victims'][npc_name]
-
-            # Finde alle NPCs in death_by_players
-            npcs_in_deaths = []
-            for killer_name in list(stats['death_by_players'].keys()):
-                if npc_db.is_npc(killer_name):
-                    npcs_in_deaths.append(killer_name)
-
-            # Korrigiere death_by_players
-            for npc_name in npcs_in_deaths:
-                # Entferne aus death_by_players
-                del stats['death_by_players'][npc_name]
-
-            # Finde alle NPCs in vehicle_losses_by_player
-            npcs_in_vehicle_losses = []
-            for destroyer_name in list(stats['vehicle_losses_by_player'].keys()):
-                if npc_db.is_npc(destroyer_name):
-                    npcs_in_vehicle_losses.append(destroyer_name)
-
-            # Korrigiere vehicle_losses_by_player
-            for npc_name in npcs_in_vehicle_losses:
-                del stats['vehicle_losses_by_player'][npc_name]
-
-        # Bereinige auch die Spielerdatenbank
-        from player_database import PlayerDatabase
-        player_db = PlayerDatabase()
-        removed_count = player_db.remove_npcs(npc_db)
+            pattern: Hinzugefügtes oder entferntes Pattern (None = alle Namen prüfen)
 
+        Returns:
+            Anzahl der als NPC erkannten Namen
+        """
+        candidates = self.names.search(pattern) if pattern is not None else self.names.all()
+        npc_names = sorted(name for name in candidates if npc_db.is_npc(name))
+        if not npc_names:
+            return 0
+
+        if self._db is None:
+            self._wal.append('reclassify_npcs', npc_names)
+        self._apply_reclassify_npcs(npc_names)
+        self.rollups.reclassify_npcs(npc_names)
+        if self._db is not None:
+            self._db.reclassify_stats(self.version, npc_names, {
+                section: {'pve_kills': stats['pve_kills'], 'pvp_kills': stats['pvp_kills']}
+                for section, stats in (('session', self.session), ('total', self.total))
+            }, self.PLAYER_CATEGORIES)
         self.save()
-        print(f"[{self.version}] Stats neu bewertet basierend auf NPC-Patterns")
-        if removed_count > 0:
-            print(f"[{self.version}] {removed_count} NPCs aus Spielerdatenbank entfernt")
-    
+        self._publish_changes()
+        print(f"[{self.version}] Stats neu bewertet: {len(npc_names)} NPCs aus PvP-Statistiken entfernt")
+        return len(npc_names)
+
+    def _apply_reclassify_npcs(self, npc_names: List[str]):
+        """Verschiebt Kills gegen NPCs nach PvE und entfernt sie aus den PvP-Maps (auch beim WAL-Replay)"""
+        for stats in (self.session, self.total):
+            for npc_name in npc_names:
+                weapons = stats['pvp_victims'].pop(npc_name, None)
+                if weapons:
+                    kill_count = sum(weapons.values())
+                    stats['pvp_kills'] = max(0, stats['pvp_kills'] - kill_count)
+                    stats['pve_kills'] += kill_count
+                stats['death_by_players'].pop(npc_name, None)
+                stats['vehicle_losses_by_player'].pop(npc_name, None)
+
+        for npc_name in npc_names:
+            self.names.discard(npc_name)
+        self._invalidate()
+
+    @traced('stats.get_all_stats')
     def get_all_stats(self) -> Dict:
-        """Gibt alle Statistiken zurück (INTERNE Namen!)"""
-        return {
-            'session': self._format_stats(self.session),
-            'total': self._format_stats(self.total),
+        """
+        Gibt den zuletzt veröffentlichten Stand zurück (INTERNE Namen!)
+
+        Liest ohne Lock - der Monitor-Thread ersetzt den Stand nur als Ganzes, Leser sehen
+        nie halb angewendete Änderungen. Enthaltene Maps dürfen nicht verändert werden.
+        """
+        # Parent-Zuordnungen geändert -> Fahrzeug-Aggregation neu veröffentlichen
+        from vehicle_database import VehicleDatabase
+        if self._published is None or self._parent_revision != VehicleDatabase.parent_revision:
+            self.publish()
+
+        # Flache Kopien - Aufrufer (z.B. /api/stats) ersetzen einzelne Einträge
+        published = self._published
+        return {**published, 'session': dict(published['session']), 'total': dict(published['total'])}
+
+    @contextmanager
+    def batch(self):
+        """Veröffentlicht Änderungen erst am Ende des Blocks (ein Stand pro Log-Batch)"""
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                self._publish_changes()
+
+    @synchronized
+    def publish(self):
+        """Veröffentlicht den aktuellen Stand für get_all_stats"""
+        self._publish()
+
+    def _publish_changes(self):
+        """Veröffentlicht nach einer Änderung - innerhalb von batch() erst am Ende"""
+        if not self._batch_depth:
+            self._publish()
+
+    def _publish(self):
+        """
+        Erstellt einen neuen unveränderlichen Stand (Copy-on-Write, unter self._lock)
+
+        Nur seit dem letzten Stand geänderte Maps werden kopiert, alle anderen teilt der
+        neue Stand mit dem vorherigen.
+        """
+        # Parent-Zuordnungen geändert -> verwirft abgeleitete Werte
+        self._get_vehicle_db()
+
+        if self._published is not None and self._published_revision == self._revision:
+            return
+
+        previous = self._published
+        copy_all = previous is None or self._republish_all
+        published = {
             'session_start': self.session_start.isoformat(),
             'session_id': self.session.get('session_id', '')
         }
+        for section in ('session', 'total'):
+            stats = self.session if section == 'session' else self.total
+            formatted = self._format_stats(stats, self._get_derived(section))
+            for category in self.MAP_CATEGORIES:
+                if copy_all:
+                    formatted[category] = _copy_counts(formatted[category])
+                elif category in self._dirty_maps:
+                    # Äußere Map flach kopieren, nur geänderte Einträge neu kopieren
+                    current = formatted[category]
+                    counts = dict(previous[section][category])
+                    for key in self._dirty_maps[category]:
+                        if key in current:
+                            value = current[key]
+                            counts[key] = dict(value) if isinstance(value, dict) else value
+                    formatted[category] = counts
+                else:
+                    formatted[category] = previous[section][category]
+            published[section] = formatted
+
+        # Eine Referenzzuweisung - Leser sehen den alten oder den neuen Stand
+        self._published = published
+        self._published_revision = self._revision
+        self._dirty_maps = {}
+        self._republish_all = False
+
+    @synchronized
+    def get_snapshot(self) -> Dict:
+        """
+        Vollständiger Stand für einen einzelnen Client (stats_updated)
+
+        Ausstehende Änderungen werden vorher als Delta versiegelt - der Client
+        ignoriert danach alle Deltas bis einschließlich seq.
+        """
+        if not self._resync:
+            self._seal_delta()
+        self._publish()
+        return {'version': self.version, 'seq': self._seq, 'stats': self.get_all_stats()}
+
+    @synchronized
+    def pop_updates(self) -> List[Tuple[str, Dict]]:
+        """
+        Gibt alle seit dem letzten Aufruf angefallenen Socket.IO Updates zurück
+
+        Returns:
+            Liste von (event, payload): ein stats_delta pro Änderungsblock oder ein
+            vollständiges stats_updated nach nicht-inkrementellen Änderungen
+        """
+        if self._resync:
+            self._resync = False
+            self._outbox = []
+            self._pending_delta = {}
+            self._delta_pending = False
+            self._seq += 1
+            self._publish()
+            return [('stats_updated', {'version': self.version, 'seq': self._seq, 'stats': self.get_all_stats()})]
+
+        self._seal_delta()
+        updates = [('stats_delta', delta) for delta in self._outbox]
+        self._outbox = []
+        return updates
+
+    def _record_delta(self, increments: Dict):
+        """
+        Merkt eine inkrementelle Änderung für das nächste stats_delta
+
+        Args:
+            increments: Map-Zuwächse, z.B. {'weapon_kills': {weapon: 1}} (gilt für session und total)
+        """
+        self._revision += 1
+        for category, counts in increments.items():
+            self._dirty_maps.setdefault(category, set()).update(counts)
+        _merge_counts(self._pending_delta, increments)
+        self._delta_pending = True
+
+    def _seal_delta(self):
+        """Schließt die ausstehenden Änderungen als Delta mit neuer Sequenznummer ab"""
+        if not self._delta_pending:
+            return
+
+        self._seq += 1
+        self._outbox.append({
+            'version': self.version,
+            'seq': self._seq,
+            'inc': self._pending_delta,  # Zuwächse - gelten für session UND total
+            'session': self._format_counters(self.session, self._get_derived('session')),
+            'total': self._format_counters(self.total, self._get_derived('total'))
+        })
+        self._pending_delta = {}
+        self._delta_pending = False
+
+    def _invalidate(self):
+        """Verwirft abgeleitete Werte und Cache (nach nicht-inkrementellen Änderungen)"""
+        self._derived = {'session': None, 'total': None}
+        self._revision += 1
+        self._republish_all = True
+        self._resync = True
+
+    def _get_vehicle_db(self):
+        """Gemeinsame VehicleDatabase - verwirft abgeleitete Werte wenn Parent-Zuordnungen geändert wurden"""
+        from catalogs import get_vehicle_db
+        from vehicle_database import VehicleDatabase
+
+        if self._vehicle_db is None:
+            self._vehicle_db = get_vehicle_db()
+        if self._parent_revision != VehicleDatabase.parent_revision:
+            self._parent_revision = VehicleDatabase.parent_revision
+            self._invalidate()
+
+        return self._vehicle_db
+
+    def _get_derived(self, section: str) -> Dict:
+        """Gibt abgeleitete Werte eines Abschnitts zurück (berechnet sie bei Bedarf komplett)"""
+        if self._derived[section] is None:
+            stats = self.session if section == 'session' else self.total
+            # Neu gefundene Parent-Basen werden einmal am Ende gespeichert
+            with self._get_vehicle_db().batch():
+                self._derived[section] = {
+                    # Berechne PvP Deaths (Anzahl der Tode durch Spieler)
+                    'pvp_deaths': sum(stats['death_by_players'].values()),
+                    # Aggregiere vehicle_kills nach parent_vehicle
+                    'vehicle_kills': self._aggregate_vehicle_kills(stats['vehicle_kills']),
+                    # Aggregiere vehicle_losses_by_player
+                    'vehicle_losses_by_player': {
+                        player: self._aggregate_vehicle_kills(vehicles)
+                        for player, vehicles in stats['vehicle_losses_by_player'].items()
+                    }
+                }
+        return self._derived[section]
     
-    def _format_stats(self, stats: Dict) -> Dict:
-        """Formatiert Statistiken für JSON (mit Parent-Vehicle-Aggregation!)"""
+    def _format_counters(self, stats: Dict, derived: Dict) -> Dict:
+        """Formatiert die skalaren Werte eines Abschnitts (auch Teil jedes stats_delta)"""
         total_kills = stats['pve_kills'] + stats['pvp_kills']
         total_deaths = stats['deaths']
 
-        # Berechne PvP Deaths (Anzahl der Tode durch Spieler)
-        pvp_deaths = sum(stats['death_by_players'].values())
-
         kd_ratio = 0.0
         if total_deaths > 0:
             kd_ratio = round(total_kills / total_deaths, 2)
 
-        # Aggregiere vehicle_kills nach parent_vehicle
-        aggregated_vehicle_kills = self._aggregate_vehicle_kills(stats['vehicle_kills'])
-
-        # Aggregiere vehicle_losses_by_player
-        aggregated_vehicle_losses = {}
-        for player, vehicles in stats['vehicle_losses_by_player'].items():
-            aggregated_vehicles = self._aggregate_vehicle_kills(vehicles)
-            aggregated_vehicle_losses[player] = aggregated_vehicles
+        streaks = stats['streaks']
+        lives = streaks['lives']
 
         return {
             'session_id': stats.get('session_id', ''),
@@ -292,14 +751,26 @@ class StatsManager:
             'pvp_kills': stats['pvp_kills'],
             'total_kills': total_kills,
             'deaths': total_deaths,
-            'pvp_deaths': pvp_deaths,
+            'pvp_deaths': derived['pvp_deaths'],
             'kd_ratio': kd_ratio,
+            'current_streak': streaks['current_streak'],
+            'best_streak': streaks['best_streak'],
+            'lives': lives,
+            'avg_life_seconds': round(streaks['alive_seconds'] / lives, 1) if lives else 0.0,
+            'longest_life_seconds': round(streaks['longest_life'], 1),
+            'life_start': streaks['life_start']  # Frontend kann die aktuelle Lebensdauer hochzählen
+        }
+
+    def _format_stats(self, stats: Dict, derived: Dict) -> Dict:
+        """Formatiert Statistiken für JSON (mit Parent-Vehicle-Aggregation!)"""
+        return {
+            **self._format_counters(stats, derived),
             'weapon_kills': stats['weapon_kills'],  # INTERN!
-            'pvp_victims': stats['pvp_victims'],  # Victims -> [INTERNE Waffen]
+            'pvp_victims': stats['pvp_victims'],  # Victims -> {INTERNE Waffe -> Count}
             'death_weapons': stats['death_weapons'],  # INTERN!
             'death_by_players': stats['death_by_players'],
-            'vehicle_kills': aggregated_vehicle_kills,  # AGGREGIERT!
-            'vehicle_losses_by_player': aggregated_vehicle_losses  # AGGREGIERT!
+            'vehicle_kills': derived['vehicle_kills'],  # AGGREGIERT!
+            'vehicle_losses_by_player': derived['vehicle_losses_by_player']  # AGGREGIERT!
         }
 
     def _aggregate_vehicle_kills(self, vehicle_kills: Dict[str, int]) -> Dict[str, int]:
@@ -312,60 +783,150 @@ class StatsManager:
         Returns:
             Dict mit parent_vehicle -> aggregated_count
         """
-        # Lazy-load VehicleDatabase (nur beim ersten Aufruf instanziieren)
-        if self._vehicle_db is None:
-            from vehicle_database import VehicleDatabase
-            self._vehicle_db = VehicleDatabase()
+        vehicle_db = self._get_vehicle_db()
 
         aggregated = {}
         for vehicle_internal, count in vehicle_kills.items():
             # Hole Parent-Vehicle (falls vorhanden, sonst vehicle selbst)
-            parent = self._vehicle_db.get_parent_vehicle(vehicle_internal)
+            parent = vehicle_db.get_parent_vehicle(vehicle_internal)
             # Addiere zum Parent
             aggregated[parent] = aggregated.get(parent, 0) + count
 
         return aggregated
     
+    def _log_change(self, counters: List[Tuple[str, ...]], op: str, *args):
+        """
+        Schreibt eine Änderung fort, bevor sie angewendet wird
+
+        Args:
+            counters: Betroffene Zähler (category, [name, [detail]]) - SQLite erhöht nur diese Zeilen
+            op, args: WAL-Eintrag (JSON-Backend)
+        """
+        if self._db is not None:
+            self._db.increment_stats(self.version, counters)
+        else:
+            self._wal.append(op, *args)
+
     def save(self):
-        """Speichert Statistiken"""
-        data = {
-            'last_updated': datetime.now().isoformat(),
-            'session_start': self.session_start.isoformat(),
-            'session': {
-                'session_id': self.session.get('session_id', ''),
-                'pve_kills': self.session['pve_kills'],
-                'pvp_kills': self.session['pvp_kills'],
-                'deaths': self.session['deaths'],
-                'weapon_kills': self.session['weapon_kills'],
-                'pvp_victims': self.session['pvp_victims'],
-                'death_weapons': self.session['death_weapons'],
-                'death_by_players': self.session['death_by_players'],
-                'vehicle_kills': self.session['vehicle_kills'],
-                'vehicle_losses_by_player': self.session['vehicle_losses_by_player']
-            },
-            'total': {
-                'pve_kills': self.total['pve_kills'],
-                'pvp_kills': self.total['pvp_kills'],
-                'deaths': self.total['deaths'],
-                'weapon_kills': self.total['weapon_kills'],
-                'pvp_victims': self.total['pvp_victims'],
-                'death_weapons': self.total['death_weapons'],
-                'death_by_players': self.total['death_by_players'],
-                'vehicle_kills': self.total['vehicle_kills'],
-                'vehicle_losses_by_player': self.total['vehicle_losses_by_player']
+        """Markiert Statistiken zum Speichern (geschrieben wird gebündelt, siehe persistence.py)"""
+        if self._db is not None:
+            return  # SQLite: Zeilen sind bereits geschrieben
+        persistence.mark_dirty('stats', self.stats_file, self._write, delay=self.SNAPSHOT_INTERVAL)
+
+    def _save_now(self):
+        """Schreibt sofort einen Snapshot (für seltene Änderungen, die nicht im WAL stehen)"""
+        if self._db is not None:
+            with self._lock:
+                self._db.replace_stats(self.version, self.session, self.total, self.session_start.isoformat())
+                self._persist_streaks()
+            return
+        self.save()
+        persistence.flush(self.stats_file)
+
+    @traced('stats.save')
+    @timed(STORE_SAVE_SECONDS, store='stats')
+    def _write(self):
+        """Schreibt Statistiken auf die Platte"""
+        with self._lock:
+            wal_seq = self._wal.last_seq
+            data = {
+                'last_updated': datetime.now().isoformat(),
+                'wal_seq': wal_seq,  # Letzter enthaltener WAL-Eintrag
+                'session_start': self.session_start.isoformat(),
+                'session': {
+                    'session_id': self.session.get('session_id', ''),
+                    'pve_kills': self.session['pve_kills'],
+                    'pvp_kills': self.session['pvp_kills'],
+                    'deaths': self.session['deaths'],
+                    'weapon_kills': self.session['weapon_kills'],
+                    'pvp_victims': self.session['pvp_victims'],
+                    'death_weapons': self.session['death_weapons'],
+                    'death_by_players': self.session['death_by_players'],
+                    'vehicle_kills': self.session['vehicle_kills'],
+                    'vehicle_losses_by_player': self.session['vehicle_losses_by_player'],
+                    'streaks': dict(self.session['streaks'])
+                },
+                'total': {
+                    'pve_kills': self.total['pve_kills'],
+                    'pvp_kills': self.total['pvp_kills'],
+                    'deaths': self.total['deaths'],
+                    'weapon_kills': self.total['weapon_kills'],
+                    'pvp_victims': self.total['pvp_victims'],
+                    'death_weapons': self.total['death_weapons'],
+                    'death_by_players': self.total['death_by_players'],
+                    'vehicle_kills': self.total['vehicle_kills'],
+                    'vehicle_losses_by_player': self.total['vehicle_losses_by_player'],
+                    'streaks': dict(self.total['streaks'])
+                }
             }
-        }
-        
+            content = dump_json(data)
+
         try:
-            with open(self.stats_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            write_text_file(self.stats_file, content)
         except Exception as e:
             print(f"Fehler beim Speichern: {e}")
+            return
+
+        self._wal.compact(wal_seq)
     
     def load(self):
-        """Lädt Statistiken"""
-        if not os.path.exists(self.stats_file):
+        """Lädt Statistiken (Snapshot + Änderungen aus dem WAL bzw. aus SQLite)"""
+        if self._db is not None:
+            self._load_from_db()
+            self._invalidate()
+            self._index_names()
             return
+
+        # Ausstehende Änderungen einer anderen Instanz zuerst schreiben
+        persistence.flush(self.stats_file)
+
+        self._wal = persistence.get_wal(f"{self.stats_file}.wal")
+        snapshot_seq = self._load_snapshot()
+
+        applied = replay_wal(self, self._wal, snapshot_seq)
+        self._invalidate()
+        self._index_names()
+        if applied:
+            print(f"[{self.version}] {applied} Änderungen aus dem WAL wiederhergestellt")
+            self.save()
+
+    def _index_names(self):
+        """Baut den Namens-Index aus Session und Total neu auf"""
+        self.names = NameIndex(
+            name
+            for stats in (self.session, self.total)
+            for category in self.PLAYER_CATEGORIES
+            for name in stats[category]
+        )
+
+    def _load_from_db(self):
+        """Lädt Session und Total aus der SQLite-Datenbank"""
+        try:
+            data = self._db.load_stats(self.version)
+        except Exception as e:
+            print(f"Fehler beim Laden: {e}")
+            return
+        if data is None:
+            return
+
+        for section, stats in (('session', self.session), ('total', self.total)):
+            for key, value in data[section].items():
+                stats[key] = value
+        self.session['session_id'] = data['session_id']
+        streaks = self._db.load_streaks(self.version)
+        if streaks:
+            self.session['streaks'].update(streaks.get('session', {}))
+            self.total['streaks'].update(streaks.get('total', {}))
+        if data['session_start']:
+            try:
+                self.session_start = datetime.fromisoformat(data['session_start'])
+            except ValueError:
+                pass
+
+    def _load_snapshot(self) -> int:
+        """Lädt den Snapshot, gibt die enthaltene WAL-seq zurück"""
+        if not os.path.exists(self.stats_file):
+            return 0
         
         try:
             with open(self.stats_file, 'r', encoding='utf-8') as f:
@@ -378,11 +939,12 @@ class StatsManager:
             self.session['pvp_kills'] = session_data.get('pvp_kills', 0)
             self.session['deaths'] = session_data.get('deaths', 0)
             self.session['weapon_kills'] = session_data.get('weapon_kills', {})
-            self.session['pvp_victims'] = session_data.get('pvp_victims', {})
+            self.session['pvp_victims'] = self._migrate_pvp_victims(session_data.get('pvp_victims', {}))
             self.session['death_weapons'] = session_data.get('death_weapons', {})
             self.session['death_by_players'] = session_data.get('death_by_players', {})
             self.session['vehicle_kills'] = session_data.get('vehicle_kills', {})
             self.session['vehicle_losses_by_player'] = session_data.get('vehicle_losses_by_player', {})
+            self.session['streaks'].update(session_data.get('streaks', {}))
 
             # Total
             total_data = data.get('total', {})
@@ -390,11 +952,12 @@ class StatsManager:
             self.total['pvp_kills'] = total_data.get('pvp_kills', 0)
             self.total['deaths'] = total_data.get('deaths', 0)
             self.total['weapon_kills'] = total_data.get('weapon_kills', {})
-            self.total['pvp_victims'] = total_data.get('pvp_victims', {})
+            self.total['pvp_victims'] = self._migrate_pvp_victims(total_data.get('pvp_victims', {}))
             self.total['death_weapons'] = total_data.get('death_weapons', {})
             self.total['death_by_players'] = total_data.get('death_by_players', {})
             self.total['vehicle_kills'] = total_data.get('vehicle_kills', {})
             self.total['vehicle_losses_by_player'] = total_data.get('vehicle_losses_by_player', {})
+            self.total['streaks'].update(total_data.get('streaks', {}))
 
             # Session Start
             if 'session_start' in data:
@@ -402,6 +965,42 @@ class StatsManager:
                     self.session_start = datetime.fromisoformat(data['session_start'])
                 except:
                     pass
+
+            # Altes Listen-Format -> einmalig im neuen Format speichern
+            legacy_victims = any(
+                isinstance(weapons, list)
+                for section in (session_data, total_data)
+                for weapons in section.get('pvp_victims', {}).values()
+            )
+            if legacy_victims:
+                print(f"[{self.version}] pvp_victims in Zähler-Format konvertiert")
+                self.save()
+
+            return data.get('wal_seq', 0)
         
         except Exception as e:
-            print(f"Fehler beim Laden: {e}")
\ No newline at end of file
+            print(f"Fehler beim Laden: {e}")
+            return 0
+
+    @staticmethod
+    def _migrate_pvp_victims(victims: Dict) -> Dict[str, Dict[str, int]]:
+        """
+        Konvertiert pvp_victims aus dem alten Format (Spieler -> [Waffe, Waffe, ...])
+        in Zähler (Spieler -> {Waffe -> Count})
+
+        Args:
+            victims: pvp_victims aus der Datei (altes oder neues Format)
+
+        Returns:
+            pvp_victims im Zähler-Format
+        """
+        migrated = {}
+        for victim, weapons in victims.items():
+            if isinstance(weapons, list):
+                counts = {}
+                for weapon in weapons:
+                    counts[weapon] = counts.get(weapon, 0) + 1
+                migrated[victim] = counts
+            else:
+                migrated[victim] = weapons
+        return migrated
\ No newline at end of file
@@ -0,0 +1,225 @@
+"""
+Verse Combat Log - Stats Rollups
+Stündliche und tägliche Zeitreihen der Statistiken pro Version (für Trend-Abfragen)
+
+Jedes Event wird beim Eintreffen in den Stunden- und Tages-Bucket seines Log-Zeitstempels
+(UTC) gezählt. Bereichsabfragen lesen nur die betroffenen Buckets - keine Neuberechnung.
+"""
+
+import bisect
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from utils import get_data_file_path
+from tracing import traced
+from metrics import STORE_SAVE_SECONDS, timed
+from persistence import persistence, synchronized, write_text_file, replay_wal
+
+# Auflösung -> strftime-Format des Bucket-Schlüssels (sortiert lexikografisch = zeitlich)
+RESOLUTIONS = {
+    'hour': '%Y-%m-%dT%H',
+    'day': '%Y-%m-%d'
+}
+
+
+def bucket_key(timestamp: Optional[datetime], resolution: str = 'hour') -> str:
+    """
+    Gibt den Bucket-Schlüssel eines Zeitpunkts zurück
+
+    Args:
+        timestamp: Log-Zeitstempel (ohne Zeitzone = UTC, None = jetzt)
+        resolution: 'hour' oder 'day'
+    """
+    if timestamp is None:
+        timestamp = datetime.now(timezone.utc)
+    elif timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc)
+    return timestamp.strftime(RESOLUTIONS[resolution])
+
+
+class StatsRollups:
+    """Verwaltet Stunden- und Tages-Buckets für eine SC Version"""
+
+    # Änderungen sind über das WAL sofort crash-sicher - Snapshots nur alle 30s
+    SNAPSHOT_INTERVAL = 30.0
+
+    COUNTERS = ('pve_kills', 'pvp_kills', 'deaths', 'pvp_deaths')
+    MAPS = ('weapon_kills', 'vehicle_kills')
+    # Gegnernamen pro Bucket - nur für reclassify_npcs(), nicht Teil der Abfragen
+    PLAYER_MAPS = ('pvp_victims', 'pvp_killers')
+
+    def __init__(self, version: str):
+        self.version = version
+        self.rollup_file = get_data_file_path(f"rollups_{version.lower()}.json")
+
+        # Auflösung -> Bucket-Schlüssel -> {Zähler, Maps} (nur Werte != 0 werden gespeichert)
+        self.buckets: Dict[str, Dict[str, Dict]] = {resolution: {} for resolution in RESOLUTIONS}
+        # Sortierte Bucket-Schlüssel pro Auflösung für Bereichsabfragen (bisect)
+        self._keys: Dict[str, List[str]] = {resolution: [] for resolution in RESOLUTIONS}
+
+        self._lock = threading.RLock()
+        self.load()
+
+    @synchronized
+    def record(self, timestamp: Optional[datetime], increments: Dict):
+        """
+        Zählt ein Event in die Buckets seines Zeitstempels
+
+        Args:
+            timestamp: Log-Zeitstempel des Events
+            increments: Zuwächse, z.B. {'pvp_kills': 1, 'weapon_kills': {weapon: 1}}
+        """
+        hour = bucket_key(timestamp, 'hour')
+        self._wal.append('record', hour, increments)
+        self._apply_record(hour, increments)
+        self.save()
+
+    def _apply_record(self, hour: str, increments: Dict):
+        """Zählt Zuwächse in Stunden- und Tages-Bucket (auch beim WAL-Replay)"""
+        # Tages-Schlüssel ist Präfix des Stunden-Schlüssels
+        for resolution, key in (('hour', hour), ('day', hour[:10])):
+            bucket = self._get_bucket(resolution, key)
+            for name, value in increments.items():
+                if isinstance(value, dict):
+                    counts = bucket.setdefault(name, {})
+                    for item, count in value.items():
+                        counts[item] = counts.get(item, 0) + count
+                else:
+                    bucket[name] = bucket.get(name, 0) + value
+
+    @synchronized
+    def reclassify_npcs(self, npc_names: List[str]):
+        """
+        Verschiebt Kills gegen nachträglich erkannte NPCs von PvP nach PvE (wie StatsManager)
+
+        Buckets ohne Gegnernamen (vor deren Erfassung geschrieben) bleiben unverändert.
+        """
+        self._wal.append('reclassify_npcs', npc_names)
+        self._apply_reclassify_npcs(npc_names)
+        self.save()
+
+    def _apply_reclassify_npcs(self, npc_names: List[str]):
+        """Korrigiert alle Buckets mit Kills/Toden durch die NPCs (auch beim WAL-Replay)"""
+        for buckets in self.buckets.values():
+            for bucket in buckets.values():
+                victims = bucket.get('pvp_victims', {})
+                killers = bucket.get('pvp_killers', {})
+                kills = sum(victims.pop(name, 0) for name in npc_names)
+                deaths = sum(killers.pop(name, 0) for name in npc_names)
+                if kills:
+                    bucket['pve_kills'] = bucket.get('pve_kills', 0) + kills
+                    self._decrement(bucket, 'pvp_kills', kills)
+                if deaths:
+                    self._decrement(bucket, 'pvp_deaths', deaths)
+                # Nur Werte != 0 speichern
+                for name in self.PLAYER_MAPS:
+                    if name in bucket and not bucket[name]:
+                        del bucket[name]
+
+    @staticmethod
+    def _decrement(bucket: Dict, name: str, count: int):
+        """Verringert einen Zähler (nicht unter 0, 0 wird entfernt)"""
+        value = bucket.get(name, 0) - count
+        if value > 0:
+            bucket[name] = value
+        else:
+            bucket.pop(name, None)
+
+    def _get_bucket(self, resolution: str, key: str) -> Dict:
+        """Gibt einen Bucket zurück, legt ihn bei Bedarf an (Schlüsselliste bleibt sortiert)"""
+        buckets = self.buckets[resolution]
+        if key not in buckets:
+            buckets[key] = {}
+            keys = self._keys[resolution]
+            # Live-Events kommen chronologisch - Einfügen am Ende ist der Normalfall
+            if not keys or key > keys[-1]:
+                keys.append(key)
+            else:
+                bisect.insort(keys, key)
+        return buckets[key]
+
+    @synchronized
+    def query(self, resolution: str = 'day', start: Optional[datetime] = None,
+              end: Optional[datetime] = None) -> List[Dict]:
+        """
+        Gibt alle Buckets im Zeitraum zurück (leere Buckets werden ausgelassen)
+
+        Args:
+            resolution: 'hour' oder 'day'
+            start: Erster Zeitpunkt (inklusive, None = ohne Grenze)
+            end: Letzter Zeitpunkt (inklusive, None = ohne Grenze)
+
+        Returns:
+            Liste chronologisch sortierter Buckets (INTERNE Namen!)
+        """
+        keys = self._keys[resolution]
+        first = bisect.bisect_left(keys, bucket_key(start, resolution)) if start else 0
+        last = bisect.bisect_right(keys, bucket_key(end, resolution)) if end else len(keys)
+
+        buckets = self.buckets[resolution]
+        return [self._format_bucket(key, buckets[key]) for key in keys[first:last]]
+
+    def _format_bucket(self, key: str, bucket: Dict) -> Dict:
+        """Formatiert einen Bucket für JSON (fehlende Werte = 0)"""
+        total_kills = bucket.get('pve_kills', 0) + bucket.get('pvp_kills', 0)
+        deaths = bucket.get('deaths', 0)
+
+        formatted = {'bucket': key}
+        for name in self.COUNTERS:
+            formatted[name] = bucket.get(name, 0)
+        formatted['total_kills'] = total_kills
+        formatted['kd_ratio'] = round(total_kills / deaths, 2) if deaths > 0 else 0.0
+        for name in self.MAPS:
+            formatted[name] = dict(bucket.get(name, {}))
+        return formatted
+
+    def save(self):
+        """Markiert Rollups zum Speichern (geschrieben wird gebündelt, siehe persistence.py)"""
+        persistence.mark_dirty('rollups', self.rollup_file, self._write, delay=self.SNAPSHOT_INTERVAL)
+
+    @traced('rollups.save')
+    @timed(STORE_SAVE_SECONDS, store='rollups')
+    def _write(self):
+        """Schreibt Rollups auf die Platte (kompakt - Datei wächst mit jeder Spielstunde)"""
+        with self._lock:
+            wal_seq = self._wal.last_seq
+            data = {
+                'last_updated': datetime.now().isoformat(),
+                'wal_seq': wal_seq,  # Letzter enthaltener WAL-Eintrag
+                'buckets': self.buckets
+            }
+            content = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+        try:
+            write_text_file(self.rollup_file, content)
+        except Exception as e:
+            print(f"Fehler beim Speichern der Rollups: {e}")
+            return
+
+        self._wal.compact(wal_seq)
+
+    def load(self):
+        """Lädt Rollups (Snapshot + Änderungen aus dem WAL)"""
+        # Ausstehende Änderungen einer anderen Instanz zuerst schreiben
+        persistence.flush(self.rollup_file)
+
+        self._wal = persistence.get_wal(f"{self.rollup_file}.wal")
+        snapshot_seq = 0
+
+        if os.path.exists(self.rollup_file):
+            try:
+                with open(self.rollup_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                for resolution in RESOLUTIONS:
+                    self.buckets[resolution] = data.get('buckets', {}).get(resolution, {})
+                    self._keys[resolution] = sorted(self.buckets[resolution])
+                snapshot_seq = data.get('wal_seq', 0)
+            except Exception as e:
+                print(f"Fehler beim Laden der Rollups: {e}")
+
+        applied = replay_wal(self, self._wal, snapshot_seq)
+        if applied:
+            print(f"[{self.version}] {applied} Rollup-Änderungen aus dem WAL wiederhergestellt")
+            self.save()
@@ -0,0 +1,174 @@
+"""
+Verse Combat Log - Pipeline Tracing
+Leichtgewichtige Spans im Ringpuffer, exportierbar als Chrome/Perfetto Trace (JSON)
+"""
+
+import functools
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+
+class _NoopSpan:
+    """Span-Ersatz wenn Tracing aus ist (keine Zeitmessung, keine Allokation)"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    """Misst einen Abschnitt und legt ihn beim Verlassen im Ringpuffer ab"""
+
+    __slots__ = ('tracer', 'name', 'category', 'args', 'start')
+
+    def __init__(self, tracer: 'Tracer', name: str, category: str, args: Optional[Dict]):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer._record(self.name, self.category, self.start, time.perf_counter_ns(), self.args)
+        return False
+
+
+class Tracer:
+    """Sammelt Spans der Pipeline (Log lesen, Regex, Stats, Speichern, Emit)"""
+
+    DEFAULT_CAPACITY = 20000
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.enabled = False
+        # deque.append ist threadsicher - Monitor-Threads und Flask schreiben parallel
+        self._spans = deque(maxlen=capacity)
+        self._origin_ns = time.perf_counter_ns()
+        self._thread_names: Dict[int, str] = {}
+
+    def start(self):
+        """Aktiviert Tracing"""
+        self.enabled = True
+        print(f"🔬 Tracing aktiviert (Ringpuffer: {self._spans.maxlen} Spans)")
+
+    def stop(self):
+        """Deaktiviert Tracing (Puffer bleibt für den Export erhalten)"""
+        self.enabled = False
+        print("🔬 Tracing deaktiviert")
+
+    def clear(self):
+        """Leert den Ringpuffer"""
+        self._spans.clear()
+
+    def span(self, name: str, category: str = 'pipeline', **args):
+        """
+        Context-Manager für einen Abschnitt
+
+        Args:
+            name: Name des Spans (z.B. 'log.read')
+            category: Kategorie für die Trace-Ansicht
+            **args: Zusätzliche Werte, die im Trace angezeigt werden
+        """
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, name, category, args or None)
+
+    def _record(self, name: str, category: str, start_ns: int, end_ns: int, args: Optional[Dict]):
+        """Legt einen fertigen Span im Ringpuffer ab"""
+        thread = threading.current_thread()
+        tid = thread.ident
+        if tid not in self._thread_names:
+            self._thread_names[tid] = thread.name
+        self._spans.append((name, category, start_ns, end_ns, tid, args))
+
+    def get_status(self) -> Dict:
+        """Gibt Tracing-Status zurück"""
+        return {
+            'enabled': self.enabled,
+            'spans': len(self._spans),
+            'capacity': self._spans.maxlen
+        }
+
+    def export_chrome_trace(self) -> Dict:
+        """
+        Exportiert den Ringpuffer im Chrome Trace Event Format
+
+        Die Datei kann in chrome://tracing oder https://ui.perfetto.dev geöffnet werden.
+
+        Returns:
+            Dict mit 'traceEvents' (Complete Events, ph='X')
+        """
+        pid = os.getpid()
+        events = []
+
+        # Thread-Namen als Metadaten (Monitor-Threads sind so unterscheidbar)
+        for tid, thread_name in list(self._thread_names.items()):
+            events.append({
+                'name': 'thread_name',
+                'ph': 'M',
+                'pid': pid,
+                'tid': tid,
+                'args': {'name': thread_name}
+            })
+
+        for name, category, start_ns, end_ns, tid, args in list(self._spans):
+            event = {
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'ts': (start_ns - self._origin_ns) / 1000,  # Mikrosekunden
+                'dur': (end_ns - start_ns) / 1000,
+                'pid': pid,
+                'tid': tid
+            }
+            if args:
+                event['args'] = args
+            events.append(event)
+
+        return {
+            'traceEvents': events,
+            'displayTimeUnit': 'ms'
+        }
+
+
+# Prozessweite Instanz
+tracer = Tracer()
+
+
+def span(name: str, category: str = 'pipeline', **args):
+    """Kurzform für tracer.span()"""
+    if not tracer.enabled:
+        return _NOOP_SPAN
+    return _Span(tracer, name, category, args or None)
+
+
+def traced(name: str, category: str = 'pipeline'):
+    """
+    Decorator: Misst jeden Aufruf der Funktion als Span
+
+    Args:
+        name: Name des Spans
+        category: Kategorie für die Trace-Ansicht
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with _Span(tracer, name, category, None):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Verse Combat Log - Vehicle Benchmark
+Misst die Basisnamen-Suche für Fahrzeuge (INI-Treffer, Event-Suffixe, Rückwärts-Suche)
+
+Vergleicht die bisherige Suche (Suffix-Liste linear, dann eine Dict-Abfrage pro gekürztem
+Namen) mit dem Token-Trie:
+
+    python vehicle_benchmark.py --names 10000
+
+Namen werden aus den Fahrzeugen der internalNames.ini erzeugt (mit Event-Suffixen, Varianten
+und unbekannten Fahrzeugen). Zusätzlich wird gemessen, wie viele save()-Aufrufe und Schreibvorgänge
+das Speichern automatisch gefundener Basen kostet (einzeln vs. gebündelt mit batch()) - in einer
+eigenen Datenbank (vehicles_db_benchmark.json), echte Zuordnungen bleiben unberührt.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from metrics import STORE_SAVE_REQUESTS, STORE_SAVE_SECONDS
+from names_parser import NamesParser
+from persistence import persistence
+from vehicle_database import EVENT_SUFFIXES, VehicleDatabase
+
+BENCHMARK_DB = 'vehicles_db_benchmark.json'
+
+VARIANT_TOKENS = ['Collector', 'Military', 'Wreck', 'Template', 'S42', 'Boarding', 'Unmanned']
+
+
+def legacy_find(names_parser: NamesParser, normalized: str) -> tuple:
+    """Bisherige Suche (vor dem Token-Trie), gibt (Display-Name, Parent) zurück"""
+    ini_name = names_parser.get_vehicle_name(normalized)
+    if ini_name:
+        return ini_name, None
+
+    for suffix in EVENT_SUFFIXES:
+        if normalized.endswith(suffix):
+            base_candidate = normalized[:-len(suffix)]
+            ini_name = names_parser.get_vehicle_name(base_candidate)
+            if ini_name:
+                return ini_name, base_candidate
+            break
+
+    parts = normalized.split('_')
+    if len(parts) > 2:
+        for i in range(len(parts) - 1, 1, -1):
+            shortened = '_'.join(parts[:i])
+            ini_name = names_parser.get_vehicle_name(shortened)
+            if ini_name:
+                return ini_name, shortened
+
+    return None, None
+
+
+def generate_names(rng: random.Random, base_names: list, count: int) -> dict:
+    """Je ein Viertel direkte Treffer, Event-Varianten, Sub-Varianten und Unbekannte"""
+    names = {'Direkt': [], 'Event-Suffix': [], 'Variante': [], 'Unbekannt': []}
+    for _ in range(count // 4):
+        base = rng.choice(base_names)
+        names['Direkt'].append(base)
+        names['Event-Suffix'].append(base + rng.choice(EVENT_SUFFIXES))
+        names['Variante'].append(base + ''.join('_' + rng.choice(VARIANT_TOKENS) for _ in range(rng.randint(1, 3))))
+        names['Unbekannt'].append(f"XNAA_Unknown_{rng.randint(1, 999)}_" + rng.choice(VARIANT_TOKENS))
+    return names
+
+
+def timed_run(find, names) -> tuple:
+    """Sucht alle Namen, gibt (µs pro Name, Ergebnisse) zurück"""
+    start = time.perf_counter()
+    results = [find(name) for name in names]
+    return (time.perf_counter() - start) / len(names) * 1_000_000, results
+
+
+def unseen_variants(rng: random.Random, base_names: list, count: int, prefix: str) -> list:
+    """Noch nie gesehene Varianten bekannter Fahrzeuge (jede führt zu einer gefundenen Basis)"""
+    return [f"{rng.choice(base_names)}_{rng.choice(VARIANT_TOKENS)}_{prefix}{i}" for i in range(count)]
+
+
+def discovery_run(names: list, batched: bool) -> tuple:
+    """
+    Löst alle Namen in einer leeren Benchmark-DB auf und schreibt sie
+
+    Returns:
+        (Sekunden inkl. Schreiben, save()-Aufrufe, Schreibvorgänge)
+    """
+    vehicle_db = VehicleDatabase(BENCHMARK_DB)
+    requests_before = STORE_SAVE_REQUESTS.get(store='vehicles')
+    writes_before = STORE_SAVE_SECONDS.get_count(store='vehicles')
+    try:
+        start = time.perf_counter()
+        if batched:
+            with vehicle_db.batch():
+                for name in names:
+                    vehicle_db.get_display_name(name)
+        else:
+            for name in names:
+                vehicle_db.get_display_name(name)
+        persistence.flush(vehicle_db.db_file)
+        duration = time.perf_counter() - start
+    finally:
+        cleanup(vehicle_db)
+
+    return (duration,
+            STORE_SAVE_REQUESTS.get(store='vehicles') - requests_before,
+            STORE_SAVE_SECONDS.get_count(store='vehicles') - writes_before)
+
+
+def cleanup(vehicle_db: VehicleDatabase):
+    """Entfernt die Benchmark-Datei"""
+    persistence.flush(vehicle_db.db_file)
+    for path in (vehicle_db.db_file, f"{vehicle_db.db_file}.tmp"):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark für die Fahrzeug-Basisnamen-Suche')
+    parser.add_argument('--names', type=int, default=10000, help='Anzahl Fahrzeugnamen')
+    parser.add_argument('--repeats', type=int, default=5, help='Durchläufe (bester zählt)')
+    args = parser.parse_args()
+
+    names_parser = NamesParser()
+    base_names = list(names_parser.get_all_vehicle_names())
+    if not base_names:
+        print("⚠️  Keine Fahrzeuge in der internalNames.ini gefunden")
+        return
+
+    categories = generate_names(random.Random(42), base_names, args.names)
+    vehicle_db = VehicleDatabase()
+
+    print(f"\n=== {args.names} Namen, {len(base_names)} INI-Fahrzeuge ===\n")
+    print(f"  {'Art':16}{'Linear (alt)':>14}{'Token-Trie':>14}")
+    for category, names in categories.items():
+        legacy = [timed_run(lambda name: legacy_find(names_parser, name), names) for _ in range(args.repeats)]
+        trie = [timed_run(vehicle_db._find_ini_match, names) for _ in range(args.repeats)]
+        legacy_us, legacy_results = min(legacy, key=lambda run: run[0])
+        trie_us, trie_results = min(trie, key=lambda run: run[0])
+
+        mismatches = sum(1 for a, b in zip(legacy_results, trie_results) if a != b)
+        note = f"  ⚠️  {mismatches} Ergebnisse weichen ab" if mismatches else ''
+        print(f"  {category:16}{legacy_us:>11.2f} µs{trie_us:>11.2f} µs{note}")
+
+    # Gefundene Basen speichern - jede neue Variante ergänzt custom_names und parent_vehicles
+    rng = random.Random(7)
+    print(f"\n=== {args.names} neue Varianten speichern ===\n")
+    print(f"  {'Modus':16}{'Dauer':>10}{'save()':>10}{'Schreibvorgänge':>18}")
+    for label, batched in (('Einzeln (alt)', False), ('batch()', True)):
+        names = unseen_variants(rng, base_names, args.names, label[0])
+        duration, save_calls, writes = discovery_run(names, batched)
+        print(f"  {label:16}{duration * 1000:>7.0f} ms{save_calls:>10}{writes:>18}")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,37 +5,84 @@ Verse Combat Log - Vehicle Database
 import json
 import os
 import re
-from typing import Dict
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
 from utils import get_data_file_path
+from tracing import traced
+from metrics import STORE_SAVE_SECONDS, timed
+from persistence import persistence, synchronized, dump_json, write_text_file, file_mtime
+from sqlite_store import get_database
+from display_names import VEHICLE_NAMES, VEHICLE_PARENTS
+from names_parser import TokenTrie
+
+# Event-Suffixe die automatisch zur Basis führen sollen
+EVENT_SUFFIXES = (
+    '_PU_AI_NT', '_PU_AI_CRIM', '_PU_AI',
+    '_NT', '_NonLethal', '_QIG', '_Event',
+    '_Temp', '_Stealth'
+)
+
+# Suffixe rückwärts nach Tokens - ein Durchlauf vom Namensende findet den längsten Suffix
+_SUFFIX_TRIE = TokenTrie()
+for _suffix in EVENT_SUFFIXES:
+    _tokens = _suffix.split('_')[1:]
+    _SUFFIX_TRIE.insert(_tokens[::-1], _suffix)
+
+
+def match_event_suffix(tokens: List[str]) -> int:
+    """Gibt die Token-Anzahl des längsten Event-Suffixes zurück (0 = keiner)"""
+    # Vom Namensende rückwärts - das erste Token gehört immer zur Basis
+    return _SUFFIX_TRIE.longest_match(tokens[:0:-1])[0]
 
 
 class VehicleDatabase:
     """Verwaltet Fahrzeug Custom-Namen"""
 
+    # Wird bei manuellen Änderungen der Parent-Zuordnungen erhöht (über alle Instanzen)
+    # StatsManager verwirft daran seine gecachte Fahrzeug-Aggregation
+    parent_revision = 0
+    # Wird bei Änderungen der Custom-Namen/Parents erhöht - ältere Instanzen laden vor der
+    # nächsten Namensauflösung neu, statt veraltete Namen in den gemeinsamen Cache zu legen
+    names_revision = 0
+
     def __init__(self, db_file: str = "vehicles_db.json"):
         self.db_file = get_data_file_path(db_file)
         self.custom_names: Dict[str, str] = {}
         self.parent_vehicles: Dict[str, str] = {}  # vehicle -> parent_vehicle (für Statistik-Aggregation)
+        # Optionales SQLite-Backend (None = JSON-Datei)
+        self._db = get_database()
+        # Kataloge werden von Parsern, Managern und Routen gemeinsam genutzt (siehe catalogs.py)
+        self._lock = threading.RLock()
+        self._mtime = None  # Änderungszeit der Datei beim letzten Laden/Schreiben
+        # Automatisch gefundene Basen - innerhalb von batch() erst am Ende gespeichert
+        self._batch_depth = 0
+        self._pending_discoveries = 0
 
         # Vorkompiliertes Regex-Pattern für Performance
         self._entity_id_pattern = re.compile(r'_\d{13}$')
 
-        # Event-Suffixe die automatisch zur Basis führen sollen
-        self.event_suffixes = [
-            '_PU_AI_NT', '_PU_AI_CRIM', '_PU_AI',
-            '_NT', '_NonLethal', '_QIG', '_Event',
-            '_Temp', '_Stealth'
-        ]
-
         self.load()
 
         # Lade Names Parser für Fallback
         from names_parser import NamesParser
         self.names_parser = NamesParser()
     
+    @synchronized
     def load(self):
         """Lädt Datenbank"""
-        if os.path.exists(self.db_file):
+        self._revision = VehicleDatabase.names_revision
+        # Ausstehende Änderungen einer anderen Instanz zuerst schreiben
+        persistence.flush(self.db_file)
+        self._mtime = file_mtime(self.db_file)
+
+        if self._db is not None:
+            try:
+                self.custom_names = self._db.load_catalog('vehicle_names')
+                self.parent_vehicles = self._db.load_catalog('vehicle_parents')
+            except Exception as e:
+                print(f"Fehler beim Laden der Fahrzeug-DB: {e}")
+        elif os.path.exists(self.db_file):
             try:
                 with open(self.db_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
@@ -44,22 +91,66 @@ class VehicleDatabase:
             except Exception as e:
                 print(f"Fehler beim Laden der Fahrzeug-DB: {e}")
 
+    @contextmanager
+    def batch(self):
+        """Speichert automatisch gefundene Basen erst am Ende des Blocks (ein save() pro Log-Batch)"""
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                self._save_discoveries()
+
+    def _save_discoveries(self):
+        """Speichert gefundene Basen - innerhalb von batch() erst am Ende (unter self._lock)"""
+        if self._pending_discoveries and not self._batch_depth:
+            self._pending_discoveries = 0
+            self.save()
+
+    def refresh(self):
+        """Lädt neu, falls die Datei außerhalb dieser Instanz geändert wurde (nur JSON-Backend)"""
+        if self._db is not None or file_mtime(self.db_file) == self._mtime:
+            return
+        with self._lock:
+            if file_mtime(self.db_file) == self._mtime:
+                return
+            VehicleDatabase.names_revision += 1
+            VehicleDatabase.parent_revision += 1
+            self.load()
+            VEHICLE_NAMES.clear()
+            VEHICLE_PARENTS.clear()
+
     def save(self):
-        """Speichert Datenbank"""
+        """Markiert Datenbank zum Speichern (geschrieben wird gebündelt, siehe persistence.py)"""
+        persistence.mark_dirty('vehicles', self.db_file, self._write)
+
+    @traced('vehicles.save')
+    @timed(STORE_SAVE_SECONDS, store='vehicles')
+    def _write(self):
+        """Schreibt Datenbank auf die Platte"""
         # Nur speichern wenn es etwas zu speichern gibt
         if not self.custom_names and not self.parent_vehicles:
             return
 
+        # Flache Kopien sind atomar - Änderungen während des Schreibens stören nicht
         data = {
-            'custom_names': self.custom_names,
-            'parent_vehicles': self.parent_vehicles
+            'custom_names': dict(self.custom_names),
+            'parent_vehicles': dict(self.parent_vehicles)
         }
 
         try:
+            if self._db is not None:
+                self._db.replace_catalogs({
+                    'vehicle_names': data['custom_names'],
+                    'vehicle_parents': data['parent_vehicles']
+                })
+                return
             # Erstelle Verzeichnis falls nicht vorhanden
             os.makedirs(os.path.dirname(self.db_file), exist_ok=True)
-            with open(self.db_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            write_text_file(self.db_file, dump_json(data))
+            self._mtime = file_mtime(self.db_file)
         except Exception as e:
             print(f"Fehler beim Speichern der Fahrzeug-DB: {e}")
     
@@ -88,9 +179,30 @@ class VehicleDatabase:
         5. Auto-generierter Name als Fallback
 
         Parent-Vehicles werden NUR gespeichert wenn eine Aggregation gefunden wurde!
+        Ergebnisse werden gecacht (invalidiert über den normalisierten Namen).
         """
-        # Normalisiere zuerst (entfernt Entity-IDs)
-        normalized = self.normalize_vehicle_name(internal_name)
+        display_name = VEHICLE_NAMES.get(internal_name)
+        if display_name is None:
+            normalized = self.normalize_vehicle_name(internal_name)
+            display_name = self._resolve_display_name(normalized)
+            VEHICLE_NAMES.put(internal_name, display_name, normalized)
+        return display_name
+
+    def resolve_many(self, internal_names: Iterable[str]) -> Dict[str, str]:
+        """
+        Gibt Anzeigenamen für viele Namen zurück (jeder eindeutige Name wird nur einmal aufgelöst,
+        neu gefundene Basen werden einmal am Ende gespeichert)
+
+        Returns:
+            Dict mit internal_name -> display_name
+        """
+        with self.batch():
+            return {name: self.get_display_name(name) for name in set(internal_names)}
+
+    @synchronized
+    def _resolve_display_name(self, normalized: str) -> str:
+        if self._revision != VehicleDatabase.names_revision:
+            self.load()
 
         # Filtere ungültige Namen (Default_XXXXX, etc.)
         if normalized.startswith('Default_') or normalized.startswith('Unknown_'):
@@ -100,53 +212,75 @@ class VehicleDatabase:
         if normalized in self.custom_names:
             return self.custom_names[normalized]
 
-        # 2. Aus internalNames.ini (direkt)
-        ini_name = self.names_parser.get_vehicle_name(normalized)
+        ini_name, parent = self._find_ini_match(normalized)
+        if parent is not None:
+            # Basis gefunden - Speichere BEIDES: Custom-Name UND Parent
+            self.custom_names[normalized] = ini_name
+            self.parent_vehicles[normalized] = parent
+            self._pending_discoveries += 1
+            self._save_discoveries()
         if ini_name:
-            # Direkt gefunden - KEIN parent speichern (redundant)
             return ini_name
 
-        # 3. Intelligente Event-Suffix-Erkennung
-        # Prüfe ob bekannte Event-Suffixe vorhanden sind und entferne sie zuerst
-        for suffix in self.event_suffixes:
-            if normalized.endswith(suffix):
-                base_candidate = normalized[:-len(suffix)]
-                # Prüfe ob Basis in INI existiert
-                ini_name = self.names_parser.get_vehicle_name(base_candidate)
-                if ini_name:
-                    # Gefunden! Speichere BEIDES: Custom-Name UND Parent
-                    self.custom_names[normalized] = ini_name
-                    self.parent_vehicles[normalized] = base_candidate  # Parent = Basis
-                    self.save()
-                    return ini_name
-                # Wenn Basis nicht in INI, weitermachen mit Rückwärts-Suche
-                break  # Nur ersten passenden Suffix behandeln
-
-        # 4. Rückwärts-Suche durch Unterstriche (falls Event-Suffixe nicht erkannt)
-        parts = normalized.split('_')
-        if len(parts) > 2:  # Mindestens 3 Teile (z.B. MISC_Prospector_XX)
-            # Von hinten nach vorne durch alle Kombinationen
-            for i in range(len(parts) - 1, 1, -1):
-                shortened = '_'.join(parts[:i])
-                ini_name = self.names_parser.get_vehicle_name(shortened)
-                if ini_name:
-                    # Gefunden! Speichere BEIDES: Custom-Name UND Parent
-                    self.custom_names[normalized] = ini_name
-                    self.parent_vehicles[normalized] = shortened  # Parent = gefundene Basis
-                    self.save()
-                    return ini_name
-
         # 5. Auto-Generate (erste 3 Teile) als letzter Fallback
         # Keine Basis gefunden - KEIN parent speichern (bleibt separat)
         parts = normalized.split('_')
         display_name = ' '.join(parts[:min(3, len(parts))])
         return display_name
-    
+
+    def _find_ini_match(self, normalized: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Sucht den Namen in der INI (Token-Tries statt Suffix-Liste und einer Dict-Abfrage
+        pro gekürztem Namen)
+
+        Returns:
+            (Display-Name, Parent) - Parent nur bei Aggregation auf eine Basis, (None, None) ohne Treffer
+        """
+        # 2. Aus internalNames.ini (direkt) - KEIN parent (redundant)
+        ini_name = self.names_parser.get_vehicle_name(normalized)
+        if ini_name:
+            return ini_name, None
+
+        tokens = normalized.split('_')
+
+        # 3. Intelligente Event-Suffix-Erkennung (längster bekannter Suffix)
+        suffix_length = match_event_suffix(tokens)
+        if suffix_length:
+            base_candidate = '_'.join(tokens[:-suffix_length])
+            ini_name = self.names_parser.get_vehicle_name(base_candidate)
+            if ini_name:
+                # Parent = Basis
+                return ini_name, base_candidate
+
+        # 4. Längster bekannter Präfix (mindestens 2 Tokens, z.B. MISC_Prospector) in einem Durchlauf
+        base_length, ini_name = self.names_parser.match_vehicle_base(tokens)
+        if base_length >= 2:
+            return ini_name, '_'.join(tokens[:base_length])
+
+        return None, None
+
+    @synchronized
     def set_custom_name(self, internal_name: str, display_name: str):
         """Setzt einen Custom-Namen"""
         normalized = self.normalize_vehicle_name(internal_name)
         self.custom_names[normalized] = display_name
+        VEHICLE_NAMES.invalidate(normalized)
+        VehicleDatabase.names_revision += 1
+        self._revision = VehicleDatabase.names_revision
+        self.save()
+
+    @synchronized
+    def remove_custom_name(self, internal_name: str) -> bool:
+        """Entfernt einen Custom-Namen (Anzeige fällt auf INI/Auto-Generated zurück)"""
+        normalized = self.normalize_vehicle_name(internal_name)
+        if normalized not in self.custom_names:
+            return False
+        del self.custom_names[normalized]
+        VEHICLE_NAMES.invalidate(normalized)
+        VehicleDatabase.names_revision += 1
+        self._revision = VehicleDatabase.names_revision
         self.save()
+        return True
 
     def get_parent_vehicle(self, internal_name: str) -> str:
         """
@@ -158,19 +292,30 @@ class VehicleDatabase:
         Returns:
             Parent-Vehicle interner Name (falls aggregiert), sonst normalisierter Name
         """
-        normalized = self.normalize_vehicle_name(internal_name)
+        parent = VEHICLE_PARENTS.get(internal_name)
+        if parent is None:
+            normalized = self.normalize_vehicle_name(internal_name)
+            parent = self._resolve_parent_vehicle(internal_name, normalized)
+            VEHICLE_PARENTS.put(internal_name, parent, normalized)
+        return parent
+
+    def _resolve_parent_vehicle(self, internal_name: str, normalized: str) -> str:
+        if self._revision != VehicleDatabase.names_revision:
+            self.load()
 
         # Falls parent explizit gesetzt ist, verwende diesen
         if normalized in self.parent_vehicles:
             return self.parent_vehicles[normalized]
 
-        # Falls nicht: Führe get_display_name aus um parent evtl. automatisch zu setzen
-        self.get_display_name(internal_name)
+        # Falls nicht: Namenssuche ausführen um parent evtl. automatisch zu setzen
+        # (ungecacht - der Cache-Treffer einer anderen Instanz setzt hier keinen parent)
+        VEHICLE_NAMES.put(internal_name, self._resolve_display_name(normalized), normalized)
 
         # Falls jetzt parent gesetzt wurde (durch Aggregation), verwende diesen
         # Sonst: normalized (= keine Aggregation, Fahrzeug zählt für sich selbst)
         return self.parent_vehicles.get(normalized, normalized)
 
+    @synchronized
     def set_parent_vehicle(self, internal_name: str, parent_name: str):
         """
         Setzt Parent-Vehicle manuell
@@ -189,8 +334,80 @@ class VehicleDatabase:
             parent_normalized = self.normalize_vehicle_name(parent_name)
             self.parent_vehicles[normalized] = parent_normalized
 
+        VEHICLE_PARENTS.invalidate(normalized)
+        VehicleDatabase.parent_revision += 1
+        VehicleDatabase.names_revision += 1
+        self._revision = VehicleDatabase.names_revision
         self.save()
         print(f"📊 Parent-Vehicle gesetzt: {normalized} -> {self.parent_vehicles[normalized]}")
+
+    @synchronized
+    def apply_edits(self, edits: List[Dict]) -> int:
+        """
+        Wendet viele Änderungen auf einmal an (alle oder keine, ein save())
+
+        Jede Änderung ist ein Dict mit 'internal_name' und 'action':
+            'rename' (mit 'display_name'), 'remove_name' oder 'parent' (mit 'parent_name',
+            leer = sich selbst)
+
+        Parent-Änderungen erhöhen parent_revision einmal pro Aufruf - die Statistik verwirft
+        ihre Fahrzeug-Aggregation damit nur einmal statt pro Fahrzeug.
+
+        Returns:
+            Anzahl tatsächlich geänderter Einträge
+
+        Raises:
+            ValueError: Ungültige Änderung - es wurde nichts übernommen
+        """
+        # Auf Kopien arbeiten und erst am Ende austauschen - Leser sehen nie einen halben Stand
+        custom_names = dict(self.custom_names)
+        parent_vehicles = dict(self.parent_vehicles)
+        renamed = set()
+        reparented = set()
+
+        for i, edit in enumerate(edits):
+            internal_name = edit.get('internal_name') if isinstance(edit, dict) else None
+            if not internal_name:
+                raise ValueError(f"Änderung {i}: internal_name fehlt")
+            normalized = self.normalize_vehicle_name(internal_name)
+            action = edit.get('action')
+
+            if action == 'rename':
+                display_name = edit.get('display_name')
+                if not display_name:
+                    raise ValueError(f"Änderung {i}: display_name fehlt")
+                if custom_names.get(normalized) != display_name:
+                    custom_names[normalized] = display_name
+                    renamed.add(normalized)
+            elif action == 'remove_name':
+                if custom_names.pop(normalized, None) is not None:
+                    renamed.add(normalized)
+            elif action == 'parent':
+                parent_name = (edit.get('parent_name') or '').strip()
+                # Leer = auf sich selbst setzen (keine Aggregation)
+                parent = self.normalize_vehicle_name(parent_name) if parent_name else normalized
+                if parent_vehicles.get(normalized) != parent:
+                    parent_vehicles[normalized] = parent
+                    reparented.add(normalized)
+            else:
+                raise ValueError(f"Änderung {i}: unbekannte Aktion {action!r}")
+
+        if not renamed and not reparented:
+            return 0
+
+        self.custom_names = custom_names
+        self.parent_vehicles = parent_vehicles
+        for normalized in renamed:
+            VEHICLE_NAMES.invalidate(normalized)
+        for normalized in reparented:
+            VEHICLE_PARENTS.invalidate(normalized)
+        if reparented:
+            VehicleDatabase.parent_revision += 1
+        VehicleDatabase.names_revision += 1
+        self._revision = VehicleDatabase.names_revision
+        self.save()
+        print(f"📊 {len(renamed)} Fahrzeugnamen und {len(reparented)} Parent-Vehicles geändert")
+        return len(renamed) + len(reparented)
     
     def get_all_vehicles(self, used_vehicles: list = None) -> Dict[str, str]:
         """
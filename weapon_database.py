@@ -6,17 +6,32 @@ Speichert nur Custom-Namen, Fallback kommt aus internalNames.ini
 import json
 import os
 import re
-from typing import Dict, List
+import threading
+from typing import Dict, Iterable, List, Set
 from utils import get_data_file_path
+from tracing import traced
+from metrics import STORE_SAVE_SECONDS, timed
+from persistence import persistence, synchronized, dump_json, write_text_file, file_mtime
+from sqlite_store import get_database
+from display_names import WEAPON_NAMES
 
 
 class WeaponDatabase:
     """Verwaltet Custom-Waffennamen und Blacklist"""
 
+    # Wird bei Änderungen der Custom-Namen erhöht (über alle Instanzen) - ältere Instanzen
+    # laden vor der nächsten Namensauflösung neu, statt veraltete Namen in den Cache zu legen
+    names_revision = 0
+
     def __init__(self, db_file: str = "weapons_db.json"):
         self.db_file = get_data_file_path(db_file)
         self.custom_names: Dict[str, str] = {}  # Nur custom Namen
-        self.blacklist: List[str] = []
+        self.blacklist: Set[str] = set()  # Set - is_blacklisted() läuft pro Kill-Event
+        # Optionales SQLite-Backend (None = JSON-Datei)
+        self._db = get_database()
+        # Kataloge werden von Parsern, Managern und Routen gemeinsam genutzt (siehe catalogs.py)
+        self._lock = threading.RLock()
+        self._mtime = None  # Änderungszeit der Datei beim letzten Laden/Schreiben
 
         # Vorkompilierte Regex-Patterns für Performance
         self._entity_id_pattern = re.compile(r'_\d{10,}$')
@@ -29,32 +44,87 @@ class WeaponDatabase:
         from names_parser import NamesParser
         self.names_parser = NamesParser()
     
+    @synchronized
     def load(self):
         """Lädt Datenbank"""
-        if os.path.exists(self.db_file):
+        self._revision = WeaponDatabase.names_revision
+        # Ausstehende Änderungen einer anderen Instanz zuerst schreiben
+        persistence.flush(self.db_file)
+        self._mtime = file_mtime(self.db_file)
+
+        if self._db is not None:
+            try:
+                self.custom_names = self._db.load_catalog('weapon_names')
+                self.blacklist = set(self._db.load_catalog('weapon_blacklist'))
+            except Exception as e:
+                print(f"Fehler beim Laden der Waffen-DB: {e}")
+        elif os.path.exists(self.db_file):
             try:
                 with open(self.db_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
                     self.custom_names = data.get('custom_names', {})
-                    self.blacklist = data.get('blacklist', [])
+                    self.blacklist = set(data.get('blacklist', []))
             except Exception as e:
                 print(f"Fehler beim Laden der Waffen-DB: {e}")
     
+    def refresh(self):
+        """Lädt neu, falls die Datei außerhalb dieser Instanz geändert wurde (nur JSON-Backend)"""
+        if self._db is not None or file_mtime(self.db_file) == self._mtime:
+            return
+        with self._lock:
+            if file_mtime(self.db_file) == self._mtime:
+                return
+            WeaponDatabase.names_revision += 1
+            self.load()
+            WEAPON_NAMES.clear()
+
     def save(self):
-        """Speichert Datenbank"""
+        """Markiert Datenbank zum Speichern (geschrieben wird gebündelt, siehe persistence.py)"""
+        persistence.mark_dirty('weapons', self.db_file, self._write)
+
+    @traced('weapons.save')
+    @timed(STORE_SAVE_SECONDS, store='weapons')
+    def _write(self):
+        """Schreibt Datenbank auf die Platte (bzw. in die SQLite-Datenbank)"""
+        # Flache Kopien sind atomar - Änderungen während des Schreibens stören nicht
         data = {
-            'custom_names': self.custom_names,
-            'blacklist': self.blacklist
+            'custom_names': dict(self.custom_names),
+            'blacklist': sorted(self.blacklist)
         }
         
         try:
-            with open(self.db_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            if self._db is not None:
+                self._db.replace_catalogs({
+                    'weapon_names': data['custom_names'],
+                    'weapon_blacklist': {name: '' for name in data['blacklist']}
+                })
+                return
+            write_text_file(self.db_file, dump_json(data))
+            self._mtime = file_mtime(self.db_file)
         except Exception as e:
             print(f"Fehler beim Speichern der Waffen-DB: {e}")
     
     def get_display_name(self, internal_name: str) -> str:
-        """Gibt Anzeigenamen zurück (Custom > INI > Auto-Generated)"""
+        """Gibt Anzeigenamen zurück (Custom > INI > Auto-Generated, gecacht)"""
+        display_name = WEAPON_NAMES.get(internal_name)
+        if display_name is None:
+            display_name = self._resolve_display_name(internal_name)
+            WEAPON_NAMES.put(internal_name, display_name)
+        return display_name
+
+    def resolve_many(self, internal_names: Iterable[str]) -> Dict[str, str]:
+        """
+        Gibt Anzeigenamen für viele Namen zurück (jeder eindeutige Name wird nur einmal aufgelöst)
+
+        Returns:
+            Dict mit internal_name -> display_name
+        """
+        return {name: self.get_display_name(name) for name in set(internal_names)}
+
+    def _resolve_display_name(self, internal_name: str) -> str:
+        if self._revision != WeaponDatabase.names_revision:
+            self.load()
+
         # 1. Custom Name
         if internal_name in self.custom_names:
             return self.custom_names[internal_name]
@@ -96,26 +166,106 @@ class WeaponDatabase:
 
         return internal_name
     
+    @synchronized
     def set_custom_name(self, internal_name: str, display_name: str):
         """Setzt einen Custom-Namen"""
         self.custom_names[internal_name] = display_name
+        WEAPON_NAMES.invalidate(internal_name)
+        WeaponDatabase.names_revision += 1
+        self._revision = WeaponDatabase.names_revision
+        self.save()
+
+    @synchronized
+    def remove_custom_name(self, internal_name: str) -> bool:
+        """Entfernt einen Custom-Namen (Anzeige fällt auf INI/Auto-Generated zurück)"""
+        if internal_name not in self.custom_names:
+            return False
+        del self.custom_names[internal_name]
+        WEAPON_NAMES.invalidate(internal_name)
+        WeaponDatabase.names_revision += 1
+        self._revision = WeaponDatabase.names_revision
         self.save()
+        return True
 
     def is_blacklisted(self, internal_name: str) -> bool:
         """Prüft Blacklist-Status"""
         return internal_name in self.blacklist
     
+    @synchronized
     def add_to_blacklist(self, internal_name: str):
         """Fügt zur Blacklist hinzu"""
         if internal_name not in self.blacklist:
-            self.blacklist.append(internal_name)
+            self.blacklist.add(internal_name)
             self.save()
     
+    @synchronized
     def remove_from_blacklist(self, internal_name: str):
         """Entfernt von Blacklist"""
         if internal_name in self.blacklist:
-            self.blacklist.remove(internal_name)
+            self.blacklist.discard(internal_name)
             self.save()
+
+    @synchronized
+    def apply_edits(self, edits: List[Dict]) -> int:
+        """
+        Wendet viele Änderungen auf einmal an (alle oder keine, ein save())
+
+        Jede Änderung ist ein Dict mit 'internal_name' und 'action':
+            'rename' (mit 'display_name'), 'remove_name' oder 'blacklist' (mit 'blacklisted')
+
+        Returns:
+            Anzahl tatsächlich geänderter Einträge
+
+        Raises:
+            ValueError: Ungültige Änderung - es wurde nichts übernommen
+        """
+        # Auf Kopien arbeiten und erst am Ende austauschen - Leser sehen nie einen halben Stand
+        custom_names = dict(self.custom_names)
+        blacklist = set(self.blacklist)
+        renamed = set()
+        changed = 0
+
+        for i, edit in enumerate(edits):
+            internal_name = edit.get('internal_name') if isinstance(edit, dict) else None
+            if not internal_name:
+                raise ValueError(f"Änderung {i}: internal_name fehlt")
+            action = edit.get('action')
+
+            if action == 'rename':
+                display_name = edit.get('display_name')
+                if not display_name:
+                    raise ValueError(f"Änderung {i}: display_name fehlt")
+                if custom_names.get(internal_name) != display_name:
+                    custom_names[internal_name] = display_name
+                    renamed.add(internal_name)
+                    changed += 1
+            elif action == 'remove_name':
+                if custom_names.pop(internal_name, None) is not None:
+                    renamed.add(internal_name)
+                    changed += 1
+            elif action == 'blacklist':
+                if edit.get('blacklisted'):
+                    if internal_name not in blacklist:
+                        blacklist.add(internal_name)
+                        changed += 1
+                elif internal_name in blacklist:
+                    blacklist.discard(internal_name)
+                    changed += 1
+            else:
+                raise ValueError(f"Änderung {i}: unbekannte Aktion {action!r}")
+
+        if not changed:
+            return 0
+
+        self.custom_names = custom_names
+        self.blacklist = blacklist
+        if renamed:
+            for internal_name in renamed:
+                WEAPON_NAMES.invalidate(internal_name)
+            WeaponDatabase.names_revision += 1
+            self._revision = WeaponDatabase.names_revision
+        self.save()
+        return changed
     
     def get_all_weapons(self, used_weapons: list = None) -> Dict[str, str]:
         """
@@ -146,5 +296,5 @@ class WeaponDatabase:
         return all_weapons
     
     def get_blacklist(self) -> List[str]:
-        """Gibt Blacklist zurück"""
-        return self.blacklist
\ No newline at end of file
+        """Gibt Blacklist zurück (sortiert)"""
+        return sorted(self.blacklist)
\ No newline at end of file